@@ -0,0 +1,231 @@
+"""Compare the memory held by the uploader's job model with plain Python containers.
+
+Generates a CSV of ``--playlists`` x ``--songs`` rows (with ISRCs and
+Spotify IDs, ``--duplicate-rate`` of them repeating a song from another
+playlist), a run journal with one record per row and a listing of every
+playlist's videos. The structures are then built the way a resumed run
+holds them (journal replayed, CSV parsed, playlists listed), once per
+model and each model in a fresh interpreter:
+
+- ``plain``: what the uploader used to hold (Tracks with their own
+  strings, journal records as dicts under ``(playlist, query)`` keys,
+  playlist videos as sets of ID strings);
+- ``compact``: the real code paths (``parse_playlist_csv``,
+  ``RunJournal.replay`` and ``VideoSet``).
+
+Memory is what each structure adds to the allocated size (tracemalloc)
+once it is built, plus the peak while building it.
+
+Usage:
+    python benchmarks/bench_memory.py [--playlists N] [--songs M]
+        [--duplicate-rate P] [--engine csv|pandas] [--json]
+        [--min-reduction PCT]
+
+With ``--min-reduction`` the script exits non-zero when the compact model
+saves less than PCT percent in total, so it can guard against regressions.
+"""
+
+import argparse
+import csv
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, SRC_DIR)
+
+STRUCTURES = ("journal", "csv_rows", "playlist_videos")
+
+
+def write_inputs(directory, playlists, songs, duplicate_rate=0.0, seed=0):
+    """Write the CSV, journal and playlist listing; return their paths."""
+    rng = random.Random(seed)
+    catalog = []
+    csv_path = os.path.join(directory, "playlist.csv")
+    journal_path = os.path.join(directory, "run_journal.jsonl")
+    videos_path = os.path.join(directory, "playlist_videos.json")
+    listing = {}
+    with open(csv_path, "w", encoding="utf-8", newline="") as csv_file, open(
+        journal_path, "w", encoding="utf-8"
+    ) as journal_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(
+            ["Track name", "Artist name", "Album", "Playlist name", "Type", "ISRC", "Spotify - id"]
+        )
+        for p in range(playlists):
+            playlist = f"Playlist {p:04d}"
+            video_ids = listing[f"PL{p:030d}"] = []
+            for s in range(songs):
+                if catalog and rng.random() < duplicate_rate:
+                    track, artist, isrc, spotify_id, video_id = rng.choice(catalog)
+                else:
+                    number = len(catalog)
+                    track, artist = f"Track {p}-{s}", f"Artist {s % 97}"
+                    isrc = f"USRC1{number:07d}"
+                    spotify_id = f"{number:022d}"
+                    video_id = f"{number:011d}"
+                    catalog.append((track, artist, isrc, spotify_id, video_id))
+                writer.writerow([track, artist, "Album", playlist, "Track", isrc, spotify_id])
+                record = {
+                    "playlist": playlist,
+                    "query": f"{track} {artist}",
+                    "video_id": video_id,
+                    "status": "added",
+                }
+                journal_file.write(json.dumps(record) + "\n")
+                video_ids.append(video_id)
+    with open(videos_path, "w", encoding="utf-8") as file:
+        json.dump(listing, file)
+    return csv_path, journal_path, videos_path
+
+
+def build(structure, model, paths, engine):
+    """Build one structure in this process and return it."""
+    csv_path, journal_path, videos_path = paths
+    if structure == "csv_rows":
+        if model == "compact":
+            from config import config
+            from main import parse_playlist_csv
+
+            config["csv"] = {"engine": engine}
+            config["encoding_cache"] = {"enabled": False}
+            return parse_playlist_csv(csv_path)
+        from utils.track import Track, clean_identifier
+
+        playlists = {}
+        with open(csv_path, "r", encoding="utf-8", newline="") as file:
+            for row in csv.DictReader(file):
+                playlists.setdefault(row["Playlist name"].strip().title(), []).append(
+                    Track(
+                        f"{row['Track name'].strip()} {row['Artist name'].strip().title()}",
+                        clean_identifier(row["ISRC"], upper=True),
+                        clean_identifier(row["Spotify - id"]),
+                    )
+                )
+        return playlists
+    if structure == "journal":
+        if model == "compact":
+            from utils.run_journal import RunJournal
+
+            journal = RunJournal(journal_path)
+            journal.replay()
+            return journal
+        state = {}
+        with open(journal_path, "r", encoding="utf-8") as file:
+            for line in file:
+                record = json.loads(line)
+                state[(record["playlist"], record["query"])] = record
+        return state
+    with open(videos_path, "r", encoding="utf-8") as file:
+        listing = json.load(file)
+    if model == "compact":
+        from utils.job_model import VideoSet
+
+        return {playlist_id: VideoSet(video_ids) for playlist_id, video_ids in listing.items()}
+    return {playlist_id: set(video_ids) for playlist_id, video_ids in listing.items()}
+
+
+def measure(model, paths, engine):
+    """Build every structure in turn, keeping each; return its retained and peak bytes.
+
+    The structures are held together, as in a run, so strings and handles
+    shared between them are counted once.
+    """
+    import logging
+
+    import main  # noqa: F401  Keep module imports out of the measurement.
+    import utils.run_journal  # noqa: F401
+
+    logging.disable(logging.WARNING)
+    if engine == "pandas":
+        import pandas  # noqa: F401
+    held, results = [], {}
+    gc.collect()
+    tracemalloc.start()
+    for structure in STRUCTURES:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        held.append(build(structure, model, paths, engine))
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        results[structure] = {"retained": retained - before, "peak": peak - before}
+    tracemalloc.stop()
+    return results
+
+
+def measure_in_subprocess(model, paths, engine):
+    """Run measure() in a fresh interpreter, so the models cannot share strings."""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--measure", model, engine, *paths],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--playlists", type=int, default=500)
+    parser.add_argument("--songs", type=int, default=200)
+    parser.add_argument("--duplicate-rate", type=float, default=0.2)
+    parser.add_argument("--engine", choices=("csv", "pandas"), default="csv")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--min-reduction", type=float, default=None)
+    parser.add_argument("--measure", nargs=5, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        model, engine, *paths = args.measure
+        print(json.dumps(measure(model, paths, engine)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_inputs(directory, args.playlists, args.songs, args.duplicate_rate)
+        by_model = {
+            model: measure_in_subprocess(model, paths, args.engine)
+            for model in ("plain", "compact")
+        }
+    results = {
+        structure: {model: by_model[model][structure] for model in by_model}
+        for structure in STRUCTURES
+    }
+    plain = sum(result["plain"]["retained"] for result in results.values())
+    compact = sum(result["compact"]["retained"] for result in results.values())
+    reduction = 100.0 * (1 - compact / plain) if plain else 0.0
+
+    if args.json:
+        print(json.dumps({"rows": args.playlists * args.songs, "results": results}, indent=2))
+    else:
+        print(
+            f"{args.playlists * args.songs} rows in {args.playlists} playlists "
+            f"(duplicate rate {args.duplicate_rate}, {args.engine} engine)"
+        )
+        print(f"  {'structure':<16} {'plain MB':>10} {'compact MB':>11} {'peak MB':>17}")
+        for structure, result in results.items():
+            before, after = result["plain"], result["compact"]
+            print(
+                f"  {structure:<16} {before['retained'] / 1e6:10.1f} "
+                f"{after['retained'] / 1e6:11.1f} "
+                f"{before['peak'] / 1e6:8.1f} -> {after['peak'] / 1e6:5.1f}"
+            )
+        print(
+            f"  total retained: {plain / 1e6:.1f} MB -> {compact / 1e6:.1f} MB "
+            f"({reduction:.0f}% less)"
+        )
+
+    if args.min_reduction is not None and reduction < args.min_reduction:
+        print(f"FAIL: the compact model saves less than {args.min_reduction}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""End-to-end throughput benchmark of the upload pipeline against a local fake API.
+
+Generates a CSV of ``--playlists`` x ``--songs`` rows, starts
+``fake_youtube_api.py`` in a separate process (so its memory does not count),
+and runs the real pipeline (``run_sync`` or ``run_async`` from ``main``) with
+the on-disk caches disabled. Reports songs/sec, p50/p99 API call latency as
+seen by the client, peak RSS of the pipeline process and the fake server's
+call/quota/error counts.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--playlists N] [--songs M]
+        [--engine sync|async] [--latency S] [--error-rate P] [--json]
+        [--min-songs-per-sec X]
+
+With ``--min-songs-per-sec`` the script exits non-zero when throughput falls
+below the threshold, so it can guard against performance regressions.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, SRC_DIR)
+
+
+def write_csv(path, playlists, songs, duplicate_rate=0.0, seed=0):
+    """Write a playlist CSV; ``duplicate_rate`` of rows reuse a song from another playlist."""
+    rng = random.Random(seed)
+    catalog = []
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(
+            ["Track name", "Artist name", "Album", "Playlist name", "Type", "ISRC", "Spotify - id"]
+        )
+        for p in range(playlists):
+            for s in range(songs):
+                if catalog and rng.random() < duplicate_rate:
+                    track, artist = rng.choice(catalog)
+                else:
+                    track, artist = f"Track {p}-{s}", f"Artist {s % 97}"
+                    catalog.append((track, artist))
+                writer.writerow([track, artist, "Album", f"Playlist {p:04d}", "Track", "", ""])
+    return playlists * songs
+
+
+def start_fake_api(args):
+    """Start the fake API server in a subprocess; return ``(process, url)``."""
+    command = [
+        sys.executable,
+        os.path.join(BENCH_DIR, "fake_youtube_api.py"),
+        "--port", "0",
+        "--latency", str(args.latency),
+        "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate),
+        "--burst-every", str(args.burst_every),
+        "--burst-length", str(args.burst_length),
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    # "Fake YouTube Data API listening on http://127.0.0.1:PORT/youtube/v3/"
+    url = line.strip().rsplit(" ", 1)[-1].split("/youtube/v3/")[0]
+    return process, url
+
+
+def fetch_stats(url):
+    import urllib.request
+
+    with urllib.request.urlopen(f"{url}/_stats") as response:
+        return json.load(response)
+
+
+class LatencyRecorder:
+    """Record the wall time of every HTTP call made by httplib2 or httpx."""
+
+    def __init__(self):
+        self.samples = []
+
+    def install(self):
+        import httplib2
+
+        samples = self.samples
+        original_request = httplib2.Http.request
+
+        def timed_request(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original_request(self, *args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+
+        httplib2.Http.request = timed_request
+        try:
+            import httpx
+        except ImportError:
+            return self
+        original_send = httpx.AsyncClient.send
+
+        async def timed_send(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await original_send(self, *args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+
+        httpx.AsyncClient.send = timed_send
+        return self
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Not available on Windows.
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def configure(csv_path, workdir, args):
+    from config import config
+    from utils import quota
+
+    config["playlist_file"] = csv_path
+    for section in ("search_cache", "playlist_mirror", "match_index", "encoding_cache"):
+        config[section] = {"enabled": False}
+    config["rate_limit"] = {"qps": 1_000_000, "burst": 1_000_000}
+    config["csv"] = {**(config.get("csv", {}) or {}), "engine": args.csv_engine}
+    config["concurrency"] = {
+        "engine": args.engine,
+        "search_workers": args.search_workers,
+        "max_in_flight": args.max_in_flight,
+        "max_playlists": args.max_playlists,
+    }
+    config["retry"] = {
+        **(config.get("retry", {}) or {}),
+        "base_delay": 0.05,
+        "max_delay": 1.0,
+        "report_path": os.path.join(workdir, "failures.json"),
+    }
+    quota._quota_ledger = quota.QuotaLedger(None, daily_limit=10**9)
+
+
+def run_pipeline(url, workdir, args):
+    """Run the pipeline against ``url``; return the elapsed wall time in seconds."""
+    from google.oauth2.credentials import Credentials
+
+    import main
+    from playlist_management import async_client
+    from utils.query_normalizer import QueryMemo
+    from utils.run_journal import RunJournal
+
+    credentials = Credentials(token="benchmark")
+    journal = RunJournal(os.path.join(workdir, "journal.jsonl"))
+    memo = QueryMemo()
+    start = time.perf_counter()
+    if args.engine == "async":
+        async_client.API_ROOT = f"{url}/youtube/v3/"
+        asyncio.run(main.run_async(credentials, journal, memo))
+    else:
+        from authentication.service_factory import ServiceFactory
+
+        youtube = ServiceFactory(credentials, client_options={"api_endpoint": url})
+        main.run_sync(youtube, journal, memo)
+    journal.flush()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--playlists", type=int, default=5)
+    parser.add_argument("--songs", type=int, default=100)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0)
+    parser.add_argument("--engine", choices=("sync", "async"), default="sync")
+    parser.add_argument("--csv-engine", choices=("pandas", "csv"), default="csv")
+    parser.add_argument("--search-workers", type=int, default=4)
+    parser.add_argument("--max-in-flight", type=int, default=100)
+    parser.add_argument("--max-playlists", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--burst-every", type=int, default=0)
+    parser.add_argument("--burst-length", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's log.")
+    parser.add_argument("--min-songs-per-sec", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.ERROR, format="%(message)s"
+    )
+    recorder = LatencyRecorder().install()
+    process, url = start_fake_api(args)
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            csv_path = os.path.join(workdir, "playlist.csv")
+            rows = write_csv(csv_path, args.playlists, args.songs, args.duplicate_rate)
+            configure(csv_path, workdir, args)
+            elapsed = run_pipeline(url, workdir, args)
+        server = fetch_stats(url)
+    finally:
+        process.terminate()
+        process.wait()
+
+    results = {
+        "engine": args.engine,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "songs_per_sec": round(rows / elapsed, 1) if elapsed else None,
+        "calls": len(recorder.samples),
+        "latency_p50_ms": round(percentile(recorder.samples, 50) * 1000, 2),
+        "latency_p99_ms": round(percentile(recorder.samples, 99) * 1000, 2),
+        "peak_rss_mb": round(peak_rss_mb() or 0, 1),
+        "server": server,
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(
+            f"{args.engine} engine: {rows} rows ({args.playlists} playlists x {args.songs} songs)"
+        )
+        print(f"  elapsed       {results['seconds']:9.2f} s")
+        print(f"  throughput    {results['songs_per_sec']:9.1f} songs/s")
+        print(
+            f"  call latency  p50 {results['latency_p50_ms']:.1f} ms"
+            f"  p99 {results['latency_p99_ms']:.1f} ms  over {results['calls']} calls"
+        )
+        print(f"  peak RSS      {results['peak_rss_mb']:9.1f} MB")
+        print(
+            f"  server        {server['items']} items inserted, {server['quota_spent']} "
+            f"quota units, injected errors {server['errors']}"
+        )
+
+    if args.min_songs_per_sec is not None and results["songs_per_sec"] < args.min_songs_per_sec:
+        print(f"FAIL: throughput below {args.min_songs_per_sec} songs/s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Measure cold import time of the uploader's entry point.
+
+Each sample runs ``import main`` in a fresh interpreter with ``-X importtime``
+so no module is cached between samples, and reports the cumulative import
+time of ``main`` plus the wall-clock time of the whole process.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--max-import-ms MS]
+
+With ``--max-import-ms`` the script exits non-zero when the median import
+time exceeds the threshold, so it can guard against startup regressions.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+HEAVY_MODULES = ("pandas", "googleapiclient.discovery", "google_auth_oauthlib", "chardet")
+
+
+def sample(module):
+    """Import ``module`` in a fresh interpreter; return (import_ms, wall_ms, heavy)."""
+    code = (
+        f"import sys; import {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    import_us = 0
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            import_us = int(parts[1])
+    heavy = [name for name in result.stdout.strip().split(",") if name]
+    return import_us / 1000, wall_ms, heavy
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    samples = [sample(args.module) for _ in range(args.runs)]
+    import_ms = [s[0] for s in samples]
+    wall_ms = [s[1] for s in samples]
+    heavy = samples[-1][2]
+
+    print(f"import {args.module}: {args.runs} cold runs")
+    print(
+        f"  import time  median {statistics.median(import_ms):7.1f} ms"
+        f"  min {min(import_ms):7.1f} ms  max {max(import_ms):7.1f} ms"
+    )
+    print(
+        f"  process wall median {statistics.median(wall_ms):7.1f} ms"
+        f"  min {min(wall_ms):7.1f} ms  max {max(wall_ms):7.1f} ms"
+    )
+    print(f"  heavy modules loaded at import: {', '.join(heavy) or 'none'}")
+
+    if args.max_import_ms is not None and statistics.median(import_ms) > args.max_import_ms:
+        print(f"FAIL: median import time exceeds {args.max_import_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,363 @@
+"""Local stand-in for the parts of the YouTube Data API v3 the uploader uses.
+
+Implements ``playlists.list/insert``, ``playlistItems.list/insert/update/delete``
+and ``search.list`` over plain HTTP/1.1 with keep-alive, so the real pipeline
+(googleapiclient or the async httpx engine) can be pointed at it with
+``api_endpoint``/``API_ROOT``. Behaviour is configurable:
+
+- ``latency``/``jitter``: seconds each call takes (uniformly jittered).
+- ``error_rate``: share of calls answered with a 503 backendError.
+- ``burst_every``/``burst_length``: every ``burst_every`` calls, the next
+  ``burst_length`` calls get 429 rateLimitExceeded (``retry_after`` seconds).
+- ``daily_limit``: quota units before calls get 403 quotaExceeded.
+- ``no_result_rate``: share of searches that find nothing.
+
+``GET /_stats`` returns call counts, quota spent and injected errors.
+
+Usage:
+    python benchmarks/fake_youtube_api.py [--port 8089] [--latency 0.05] ...
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_PREFIX = "/youtube/v3/"
+QUOTA_COSTS = {
+    "playlists.list": 1,
+    "playlists.insert": 50,
+    "playlistItems.list": 1,
+    "playlistItems.insert": 50,
+    "playlistItems.update": 50,
+    "playlistItems.delete": 50,
+    "search.list": 100,
+}
+PAGE_SIZE = 50
+
+
+class FakeYouTubeAPI:
+    """In-memory account state plus the fault injection settings."""
+
+    def __init__(
+        self,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        burst_every=0,
+        burst_length=0,
+        retry_after=0,
+        daily_limit=None,
+        no_result_rate=0.0,
+        seed=0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.daily_limit = daily_limit
+        self.no_result_rate = no_result_rate
+        self.playlists = {}  # playlist ID -> {"title", "etag"}
+        self.items = {}  # playlist ID -> [(item ID, video ID)] in playlist order
+        self.calls = {}  # Every call, including those answered with an injected error
+        self.admitted = {}  # Calls that got past the injected errors
+        self.errors = {"503": 0, "429": 0, "quotaExceeded": 0}
+        self.quota_spent = 0
+        self._total_calls = 0
+        self._burst_left = 0
+        self._item_ids = 0
+        self._revision = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self):
+        with self._lock:
+            jitter = self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0
+        return max(0.0, self.latency + jitter)
+
+    def admit(self, method):
+        """Account for a call; return an injected ``(status, body, headers)`` error or None."""
+        with self._lock:
+            self._total_calls += 1
+            self.calls[method] = self.calls.get(method, 0) + 1
+            if self._burst_left:
+                self._burst_left -= 1
+                self.errors["429"] += 1
+                return 429, _error(429, "rateLimitExceeded"), {"Retry-After": str(self.retry_after)}
+            if self.burst_every and self._total_calls % self.burst_every == 0:
+                self._burst_left = self.burst_length
+            cost = QUOTA_COSTS[method]
+            if self.daily_limit is not None and self.quota_spent + cost > self.daily_limit:
+                self.errors["quotaExceeded"] += 1
+                return 403, _error(403, "quotaExceeded"), {}
+            self.quota_spent += cost
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.errors["503"] += 1
+                return 503, _error(503, "backendError"), {}
+            self.admitted[method] = self.admitted.get(method, 0) + 1
+        return None
+
+    def search(self, query):
+        with self._lock:
+            found = not (self.no_result_rate and self._rng.random() < self.no_result_rate)
+        if not found:
+            return {"items": []}
+        video_id = hashlib.sha1(query.casefold().encode("utf-8")).hexdigest()[:11]
+        return {"items": [{"id": {"kind": "youtube#video", "videoId": video_id}}]}
+
+    def list_playlists(self, page_token, ids=None):
+        wanted = set(ids.split(",")) if ids else None
+        with self._lock:
+            playlists = [
+                {
+                    "id": playlist_id,
+                    "etag": playlist["etag"],
+                    "snippet": {"title": playlist["title"]},
+                    "contentDetails": {"itemCount": len(self.items[playlist_id])},
+                }
+                for playlist_id, playlist in self.playlists.items()
+                if wanted is None or playlist_id in wanted
+            ]
+        return _page(playlists, page_token)
+
+    def insert_playlist(self, body):
+        title = body["snippet"]["title"]
+        with self._lock:
+            playlist_id = f"PL{len(self.playlists) + 1:08d}"
+            self.playlists[playlist_id] = {"title": title, "etag": f"{playlist_id}-0"}
+            self.items[playlist_id] = []
+        return {"id": playlist_id, "snippet": {"title": title}}
+
+    def list_items(self, playlist_id, page_token):
+        with self._lock:
+            if playlist_id not in self.items:
+                return None
+            items = [
+                {
+                    "id": item_id,
+                    "snippet": {
+                        "playlistId": playlist_id,
+                        "position": position,
+                        "resourceId": {"videoId": video_id},
+                    },
+                }
+                for position, (item_id, video_id) in enumerate(self.items[playlist_id])
+            ]
+        return _page(items, page_token)
+
+    def insert_item(self, body):
+        snippet = body["snippet"]
+        playlist_id = snippet["playlistId"]
+        video_id = snippet["resourceId"]["videoId"]
+        with self._lock:
+            if playlist_id not in self.items:
+                return None
+            self._item_ids += 1
+            item_id = f"{playlist_id}.{self._item_ids}"
+            self.items[playlist_id].append((item_id, video_id))
+            self._touch(playlist_id)
+        return {"id": item_id, "snippet": snippet}
+
+    def update_item(self, body):
+        """Move an item to ``snippet.position``, like a manually sorted playlist."""
+        snippet = body["snippet"]
+        playlist_id = snippet["playlistId"]
+        with self._lock:
+            items = self.items.get(playlist_id, [])
+            index = next((i for i, item in enumerate(items) if item[0] == body["id"]), None)
+            if index is None:
+                return None
+            item = items.pop(index)
+            items.insert(snippet.get("position", len(items)), item)
+            self._touch(playlist_id)
+        return {"id": body["id"], "snippet": snippet}
+
+    def delete_item(self, item_id):
+        with self._lock:
+            for playlist_id, items in self.items.items():
+                for index, item in enumerate(items):
+                    if item[0] == item_id:
+                        del items[index]
+                        self._touch(playlist_id)
+                        return {}
+        return None
+
+    def video_ids(self, playlist_id):
+        with self._lock:
+            return [video_id for _, video_id in self.items[playlist_id]]
+
+    def _touch(self, playlist_id):
+        self._revision += 1
+        self.playlists[playlist_id]["etag"] = f"{playlist_id}-{self._revision}"
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "admitted": dict(self.admitted),
+                "errors": dict(self.errors),
+                "quota_spent": self.quota_spent,
+                "playlists": len(self.playlists),
+                "items": sum(len(items) for items in self.items.values()),
+            }
+
+
+def _error(status, reason):
+    return {
+        "error": {
+            "code": status,
+            "message": reason,
+            "errors": [{"reason": reason, "domain": "youtube.quota", "message": reason}],
+        }
+    }
+
+
+def _page(items, page_token):
+    start = int(page_token or 0)
+    page = {"items": items[start : start + PAGE_SIZE]}
+    if start + PAGE_SIZE < len(items):
+        page["nextPageToken"] = str(start + PAGE_SIZE)
+    return page
+
+
+ROUTES = {
+    ("GET", "playlists"): "playlists.list",
+    ("POST", "playlists"): "playlists.insert",
+    ("GET", "playlistItems"): "playlistItems.list",
+    ("POST", "playlistItems"): "playlistItems.insert",
+    ("PUT", "playlistItems"): "playlistItems.update",
+    ("DELETE", "playlistItems"): "playlistItems.delete",
+    ("GET", "search"): "search.list",
+}
+
+
+class FakeYouTubeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep connections alive between calls.
+    disable_nagle_algorithm = True  # Headers and body go out in separate writes.
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, verb):
+        api = self.server.api
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+        if url.path == "/_stats":
+            return self._send(200, api.stats())
+        method = ROUTES.get((verb, url.path[len(API_PREFIX) :]))
+        if not url.path.startswith(API_PREFIX) or method is None:
+            return self._send(404, _error(404, "notFound"))
+
+        time.sleep(api.delay())
+        injected = api.admit(method)
+        if injected is not None:
+            return self._send(*injected)
+        if method == "search.list":
+            response = api.search(params.get("q", ""))
+        elif method == "playlists.list":
+            response = api.list_playlists(params.get("pageToken"), params.get("id"))
+        elif method == "playlists.insert":
+            response = api.insert_playlist(body)
+        elif method == "playlistItems.list":
+            response = api.list_items(params.get("playlistId"), params.get("pageToken"))
+        elif method == "playlistItems.insert":
+            response = api.insert_item(body)
+        elif method == "playlistItems.update":
+            response = api.update_item(body)
+        else:
+            response = api.delete_item(params.get("id"))
+        if response is None:
+            return self._send(404, _error(404, "playlistNotFound"))
+        self._send(200, response)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class FakeYouTubeServer(ThreadingHTTPServer):
+    """Threaded HTTP server bound to a FakeYouTubeAPI; ``url`` is its API endpoint."""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, api=None, host="127.0.0.1", port=0):
+        super().__init__((host, port), FakeYouTubeHandler)
+        self.api = api or FakeYouTubeAPI()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve on a daemon thread and return self."""
+        threading.Thread(target=self.serve_forever, name="fake-youtube", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--burst-every", type=int, default=0)
+    parser.add_argument("--burst-length", type=int, default=0)
+    parser.add_argument("--retry-after", type=int, default=0)
+    parser.add_argument("--daily-limit", type=int, default=None)
+    parser.add_argument("--no-result-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    api = FakeYouTubeAPI(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        burst_every=args.burst_every,
+        burst_length=args.burst_length,
+        retry_after=args.retry_after,
+        daily_limit=args.daily_limit,
+        no_result_rate=args.no_result_rate,
+    )
+    server = FakeYouTubeServer(api, port=args.port)
+    print(f"Fake YouTube Data API listening on {server.url}{API_PREFIX}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import functools
+import os
+import threading
+
+from authentication.service_factory import ServiceFactory, SharedCredentials
+from authentication.youtube_auth import (
+    TokenRefresher,
+    default_token_path,
+    get_credentials,
+    save_token,
+)
+from config import config
+from logger import logger
+from utils.quota import (
+    DEFAULT_DAILY_LIMIT,
+    QUOTA_COSTS,
+    QuotaExhausted,
+    QuotaLedger,
+    get_quota_ledger,
+    use_ledger,
+)
+
+# Methods that change the target account; only credentials with allow_writes run them.
+WRITE_METHODS = frozenset(
+    {"playlists.insert", "playlistItems.insert", "playlistItems.update", "playlistItems.delete"}
+)
+
+
+class PooledCredential:
+    """One OAuth client (and so one Cloud project quota) taking part in the pool.
+
+    Attributes:
+        name (str): Label used in logs.
+        ledger (QuotaLedger): The project's own daily quota ledger.
+        allow_writes (bool): Whether the token belongs to the account that
+            owns the target playlists, so inserts may use it.
+        credentials: OAuth credentials, set by CredentialPool.authenticate().
+        refresher (TokenRefresher): Renews the credentials of a secondary
+            member in the background; the caller refreshes the primary's.
+        client: AsyncYouTubeClient for the async engine, set by the caller.
+    """
+
+    def __init__(self, name, credentials_path, token_path, ledger, allow_writes=False):
+        self.name = name
+        self.credentials_path = credentials_path
+        self.token_path = token_path
+        self.ledger = ledger
+        self.allow_writes = allow_writes
+        self.exhausted = False
+        self.credentials = None
+        self.refresher = None
+        self.client = None
+        self._youtube = None
+
+    @property
+    def youtube(self):
+        """The ServiceFactory for this credential, created on first use."""
+        if self._youtube is None:
+            self._youtube = ServiceFactory(self.credentials)
+        return self._youtube
+
+    def remaining(self):
+        remaining = self.ledger.remaining()
+        return float("inf") if remaining is None else remaining
+
+
+class CredentialPool:
+    """Spread API calls over several OAuth credentials by remaining quota.
+
+    Every call goes to the credential with the most quota left that can
+    afford it (and, for write methods, has ``allow_writes``), and is charged
+    to that credential's ledger. A credential whose quota runs out is taken
+    out of rotation and the call is retried on the next one; QuotaExhausted
+    is only raised once no credential is left for the method.
+    """
+
+    def __init__(self, members):
+        if not members:
+            raise ValueError("A credential pool needs at least one credential.")
+        self.members = list(members)
+        self._lock = threading.Lock()
+
+    @property
+    def primary(self):
+        """The first writable credential; it lists and creates the playlists."""
+        return next((m for m in self.members if m.allow_writes), self.members[0])
+
+    def authenticate(self, primary_credentials=None):
+        """Load (or obtain via the OAuth flow) every member's credentials up front.
+
+        Like the primary credentials, each other member's token is renewed
+        by a TokenRefresher and saved to its token file after every refresh,
+        so the next run starts from it. stop() ends the refreshers.
+        """
+        for member in self.members:
+            if member is self.primary and primary_credentials is not None:
+                member.credentials = primary_credentials
+            elif member.credentials is None:
+                member.credentials = SharedCredentials(
+                    get_credentials(member.credentials_path, member.token_path, refresh=False),
+                    on_refresh=functools.partial(save_token, token_path=member.token_path),
+                )
+                member.refresher = TokenRefresher(
+                    member.credentials, margin=config.get("token_refresh_margin", 300)
+                ).start()
+        logger.info(
+            f"Credential pool: {len(self.members)} credentials, "
+            f"{self.remaining()} quota units left today."
+        )
+
+    def stop(self):
+        """Stop the members' background token refreshers."""
+        for member in self.members:
+            if member.refresher is not None:
+                member.refresher.stop()
+                member.refresher = None
+
+    def remaining(self, method=None):
+        """Return the quota units left across the members usable for ``method``.
+
+        Returns None if any of them has no daily limit.
+        """
+        left = [
+            member.ledger.remaining()
+            for member in self.members
+            if not member.exhausted and (method not in WRITE_METHODS or member.allow_writes)
+        ]
+        return None if None in left else sum(left)
+
+    def acquire(self, method):
+        """Return the usable member with the most quota left for ``method``.
+
+        Raises:
+            QuotaExhausted: If no member can afford the call.
+        """
+        with self._lock:
+            candidates = [
+                member
+                for member in self.members
+                if not member.exhausted
+                and (method not in WRITE_METHODS or member.allow_writes)
+                and member.ledger.can_afford(method)
+            ]
+        if not candidates:
+            raise QuotaExhausted(f"No pooled credential has quota left for {method}.")
+        return max(candidates, key=PooledCredential.remaining)
+
+    def release(self, member, method):
+        """Handle QuotaExhausted from ``member`` during ``method``.
+
+        A member with nothing left (or whose quota the API reported as
+        exceeded) leaves the rotation; one that can still afford cheaper
+        calls is merely skipped for ``method`` by acquire().
+        """
+        remaining = member.ledger.remaining()
+        if remaining is not None and remaining > 0:
+            logger.info(f"Credential '{member.name}' cannot afford {method} any more.")
+            return
+        with self._lock:
+            if member.exhausted:
+                return
+            member.exhausted = True
+            left = sum(1 for m in self.members if not m.exhausted)
+        logger.warning(
+            f"Credential '{member.name}' has used up its quota; {left} left in rotation."
+        )
+
+    def call(self, method, func):
+        """Run ``func(member)`` on the best member, moving on when its quota runs out.
+
+        API calls made by ``func`` are charged to the member's ledger.
+        """
+        while True:
+            member = self.acquire(method)
+            try:
+                with use_ledger(member.ledger):
+                    return func(member)
+            except QuotaExhausted:
+                self.release(member, method)
+
+    async def call_async(self, method, func):
+        """Coroutine form of call(); ``func(member)`` returns an awaitable."""
+        while True:
+            member = self.acquire(method)
+            try:
+                with use_ledger(member.ledger):
+                    return await func(member)
+            except QuotaExhausted:
+                self.release(member, method)
+
+    def split(self, method, items):
+        """Yield ``(member, chunk)`` pairs that share ``items`` out by remaining quota.
+
+        Each chunk holds as many items as its member can afford one
+        ``method`` call for, so batch requests can be sent per member.
+        """
+        items = list(items)
+        cost = QUOTA_COSTS.get(method, 0)
+        while items:
+            member = self.acquire(method)
+            remaining = member.ledger.remaining()
+            count = len(items) if remaining is None or not cost else max(1, remaining // cost)
+            chunk, items = items[:count], items[count:]
+            yield member, chunk
+
+
+_credential_pool = None
+
+
+def get_credential_pool():
+    """Return the shared credential pool, or None when it is disabled.
+
+    The main credentials (``credentials_path`` and ``token_path``) always take
+    part as the writable member charged to the ``quota`` ledger; the
+    ``credential_pool.credentials`` list adds further projects.
+    """
+    global _credential_pool
+    pool_config = config.get("credential_pool", {}) or {}
+    if not pool_config.get("enabled", False):
+        return None
+    if _credential_pool is None:
+        quota_config = config.get("quota", {}) or {}
+        members = [
+            PooledCredential(
+                "main",
+                config["credentials_path"],
+                default_token_path(),
+                get_quota_ledger(),
+                allow_writes=True,
+            )
+        ]
+        for index, entry in enumerate(pool_config.get("credentials", []) or [], start=1):
+            name = entry.get("name") or f"credential-{index}"
+            members.append(
+                PooledCredential(
+                    name,
+                    entry["credentials_path"],
+                    entry.get("token_path", f"token.{name}.json"),
+                    QuotaLedger(
+                        entry.get(
+                            "ledger_path", os.path.join(".cache", f"quota_ledger.{name}.json")
+                        ),
+                        daily_limit=entry.get(
+                            "daily_limit", quota_config.get("daily_limit", DEFAULT_DAILY_LIMIT)
+                        ),
+                        reserve=entry.get("reserve_units", quota_config.get("reserve_units", 0)),
+                        save_interval=quota_config.get("save_interval", 5.0),
+                    ),
+                    allow_writes=entry.get("allow_writes", False),
+                )
+            )
+        _credential_pool = CredentialPool(members)
+    return _credential_pool
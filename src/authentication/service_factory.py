@@ -0,0 +1,192 @@
+import importlib.metadata
+import json
+import os
+import threading
+
+from config import config
+from logger import logger
+from utils.lazy_import import LazyImport
+
+build_from_document = LazyImport("googleapiclient.discovery", "build_from_document")
+build_http = LazyImport("googleapiclient.http", "build_http")
+discovery_cache = LazyImport("googleapiclient.discovery_cache")
+AuthorizedHttp = LazyImport("google_auth_httplib2", "AuthorizedHttp")
+
+# Resources the uploader calls; building them once fills in the shared document.
+RESOURCES = ("playlists", "playlistItems", "search", "videos")
+
+_documents = {}
+_documents_lock = threading.RLock()
+
+
+def _library_version():
+    try:
+        return importlib.metadata.version("google-api-python-client")
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def _cache_path(service_name, version):
+    discovery_config = config.get("discovery", {}) or {}
+    if not discovery_config.get("enabled", True):
+        return None
+    directory = discovery_config.get("cache_dir", os.path.join(".cache", "discovery"))
+    return os.path.join(directory, f"{service_name}.{version}.json")
+
+
+def _load_cached_document(path):
+    """Return the cached document if it was written for the installed library version."""
+    if path is None or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            cached = json.load(file)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable discovery cache '{path}': {e}")
+        return None
+    if cached.get("library_version") != _library_version():
+        logger.debug(f"Discovery cache '{path}' is from another library version.")
+        return None
+    return cached["document"]
+
+
+def _store_cached_document(path, document):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "library_version": _library_version(),
+                "revision": document.get("revision"),
+                "document": document,
+            },
+            file,
+            separators=(",", ":"),
+        )
+    os.replace(tmp_path, path)
+
+
+def discovery_document(service_name="youtube", version="v3"):
+    """Return the parsed discovery document, loaded and parsed once per process.
+
+    googleapiclient fills in method parameters the first time a resource is
+    built from a document, so the shared document is primed by building
+    every resource once before it is handed out. The primed document is
+    cached on disk (``discovery.cache_dir``), keyed by the installed
+    google-api-python-client version, so later runs skip the priming.
+    """
+    key = (service_name, version)
+    with _documents_lock:
+        document = _documents.get(key)
+        if document is not None:
+            return document
+        path = _cache_path(service_name, version)
+        document = _load_cached_document(path)
+        if document is None:
+            document = json.loads(discovery_cache.get_static_doc(service_name, version))
+            service = build_from_document(document, http=build_http())
+            for resource in RESOURCES:
+                if hasattr(service, resource):
+                    getattr(service, resource)()
+            if path is not None:
+                try:
+                    _store_cached_document(path, document)
+                except OSError as e:
+                    logger.warning(f"Could not cache the discovery document: {e}")
+            logger.debug(f"Parsed the {service_name} {version} discovery document.")
+        _documents[key] = document
+        return document
+
+
+def prewarm():
+    """Import the client library and load the discovery document on a background thread.
+
+    Called early in a run so the work overlaps with reading the token and
+    the journal instead of delaying the first API call.
+    """
+    thread = threading.Thread(target=discovery_document, name="discovery-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+class SharedCredentials:
+    """Wrap OAuth credentials shared by several threads so only one refreshes at a time.
+
+    A thread that finds the token refreshed while it waited for the lock
+    uses the new token instead of refreshing again. ``on_refresh`` (e.g.
+    saving the token file) is called after every refresh. Other attributes
+    are read from the wrapped credentials. Pickling (for worker processes)
+    keeps only the credentials.
+    """
+
+    def __init__(self, credentials, on_refresh=None):
+        self._credentials = credentials
+        self._on_refresh = on_refresh
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"credentials": self._credentials}
+
+    def __setstate__(self, state):
+        self.__init__(state["credentials"])
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._credentials, name)
+
+    def refresh(self, request):
+        stale_token = self._credentials.token
+        with self._lock:
+            if self._credentials.token != stale_token and self._credentials.valid:
+                return
+            self._credentials.refresh(request)
+            logger.debug("Refreshed the shared OAuth token.")
+            if self._on_refresh is not None:
+                self._on_refresh(self._credentials)
+
+    def before_request(self, request, method, url, headers):
+        if not self._credentials.valid:
+            self.refresh(request)
+        self._credentials.apply(headers)
+
+
+class ServiceFactory:
+    """Give every thread its own YouTube service over its own authorized transport.
+
+    ``httplib2.Http`` (and so a googleapiclient service) must not be used by
+    two threads at once. The factory builds one service per thread from the
+    shared, already parsed discovery document; all of them use the same
+    credentials, which refresh under a lock.
+
+    The factory can be passed wherever a service object is expected:
+    attribute access (``youtube.search()``...) is forwarded to the calling
+    thread's service.
+    """
+
+    def __init__(self, credentials, client_options=None):
+        if not isinstance(credentials, SharedCredentials):
+            credentials = SharedCredentials(credentials)
+        self.credentials = credentials
+        self.client_options = client_options
+        self._local = threading.local()
+
+    def service(self):
+        """Return the calling thread's service, building it on first use."""
+        service = getattr(self._local, "service", None)
+        if service is None:
+            http = AuthorizedHttp(self.credentials, http=build_http())
+            with _documents_lock:
+                service = build_from_document(
+                    discovery_document(), http=http, client_options=self.client_options
+                )
+            self._local.service = service
+            logger.debug(f"Built a YouTube service for thread {threading.current_thread().name}.")
+        return service
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.service(), name)
@@ -1,47 +1,174 @@
 import os
 import pickle
 import sys
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+import threading
+from datetime import datetime, timezone
 
 from config import config
 from logger import logger
+from utils.lazy_import import LazyImport
+
+# The Google auth/discovery stack is heavy to import; load it on first use.
+InstalledAppFlow = LazyImport("google_auth_oauthlib.flow", "InstalledAppFlow")
+Request = LazyImport("google.auth.transport.requests", "Request")
+Credentials = LazyImport("google.oauth2.credentials", "Credentials")
+build = LazyImport("googleapiclient.discovery", "build")
 
 # Define the scopes
 SCOPES = ["https://www.googleapis.com/auth/youtube"]
 
 
-def authenticate_youtube():
-    """Authenticate the user and return the YouTube service object."""
-    creds = None
-    token_path = "token.pickle"
-    credentials_path = config["credentials_path"]
+def default_token_path():
+    """Return the token file configured in config.yaml."""
+    return config.get("token_path", "token.json")
+
+
+def load_token(token_path):
+    """Return the credentials stored at ``token_path``, or None.
 
-    # Token file stores the user's access and refresh tokens
+    Tokens are stored as JSON. A legacy pickled token (the same path with a
+    ``.pickle`` extension) is read once and converted.
+    """
     if os.path.exists(token_path):
-        with open(token_path, "rb") as token:
+        try:
+            creds = Credentials.from_authorized_user_file(token_path, SCOPES)
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable token file '{token_path}': {e}")
+            return None
+        logger.debug(f"Loaded credentials from {token_path}.")
+        return creds
+    legacy_path = os.path.splitext(token_path)[0] + ".pickle"
+    if os.path.exists(legacy_path):
+        with open(legacy_path, "rb") as token:
             creds = pickle.load(token)
-            logger.debug(f"Loaded credentials from {token_path}.")
-
-    # If no valid credentials, let the user log in
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            logger.info("Refreshed expired credentials.")
-        else:
-            if not os.path.exists(credentials_path):
-                logger.error(f"Missing '{credentials_path}' file.")
-                sys.exit(1)
-            flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
-            creds = flow.run_local_server(port=0)
-            logger.info("Obtained new credentials via OAuth flow.")
-
-        # Save the credentials for future use
-        with open(token_path, "wb") as token:
-            pickle.dump(creds, token)
-            logger.debug(f"Saved credentials to {token_path}.")
+        save_token(creds, token_path)
+        logger.info(f"Converted '{legacy_path}' to '{token_path}'; the old file can be deleted.")
+        return creds
+    return None
+
+
+def save_token(creds, token_path):
+    """Write the credentials to ``token_path`` as JSON, readable by the owner only."""
+    directory = os.path.dirname(token_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{token_path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as token:
+        token.write(creds.to_json())
+    os.replace(tmp_path, token_path)
+    logger.debug(f"Saved credentials to {token_path}.")
+
+
+def get_credentials(credentials_path=None, token_path=None, refresh=True):
+    """Load, refresh or obtain the user's OAuth credentials.
+
+    Args:
+        credentials_path (str, optional): OAuth client secrets file; defaults
+            to ``credentials_path`` from config.yaml.
+        token_path (str, optional): JSON file caching the user's access and
+            refresh tokens; defaults to ``token_path`` from config.yaml.
+        refresh (bool): Refresh an expired access token here. Pass False to
+            leave that to a TokenRefresher (or the first request) so it is
+            off the critical path.
+
+    Returns:
+        google.oauth2.credentials.Credentials: Credentials, also saved to the
+        token file for the next run.
+    """
+    if credentials_path is None:
+        credentials_path = config["credentials_path"]
+    if token_path is None:
+        token_path = default_token_path()
+
+    creds = load_token(token_path)
+    if creds and creds.valid:
+        return creds
+
+    if creds and creds.refresh_token:
+        if not refresh:
+            return creds
+        creds.refresh(Request())
+        logger.info("Refreshed expired credentials.")
+    else:
+        # No usable credentials; let the user log in.
+        if not os.path.exists(credentials_path):
+            logger.error(f"Missing '{credentials_path}' file.")
+            sys.exit(1)
+        flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
+        creds = flow.run_local_server(port=0)
+        logger.info("Obtained new credentials via OAuth flow.")
+
+    save_token(creds, token_path)
+    return creds
+
+
+class TokenRefresher:
+    """Renew the access token on a background thread shortly before it expires.
+
+    Long runs then never wait for a refresh on the request path. The
+    refresh goes through ``credentials.refresh``, so with SharedCredentials
+    it is serialized with (and saved like) refreshes made by requests.
+    """
+
+    def __init__(self, credentials, margin=300, retry_interval=30, clock=None):
+        self.credentials = credentials
+        self.margin = margin
+        self.retry_interval = retry_interval
+        self.refreshes = 0
+        self._clock = clock or (lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+        self._stop = threading.Event()
+        self._thread = None
+
+    def seconds_until_refresh(self):
+        """Return the seconds until the next refresh is due, or None if never."""
+        expiry = self.credentials.expiry
+        if expiry is None:
+            return None if self.credentials.valid else 0.0
+        return (expiry - self._clock()).total_seconds() - self.margin
+
+    def refresh_due(self):
+        """Refresh the token if it is due; return the seconds to wait before checking again."""
+        wait = self.seconds_until_refresh()
+        if wait is None:
+            return None
+        if wait > 0:
+            return wait
+        try:
+            self.credentials.refresh(Request())
+        except Exception as e:
+            logger.warning(f"Background token refresh failed: {e}")
+            return self.retry_interval
+        self.refreshes += 1
+        logger.debug("Refreshed the access token in the background.")
+        return self.seconds_until_refresh()
+
+    def _run(self):
+        while not self._stop.is_set():
+            wait = self.refresh_due()
+            if wait is None:
+                return
+            self._stop.wait(max(wait, 1.0))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="token-refresher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def authenticate_youtube(creds=None):
+    """Authenticate the user and return the YouTube service object.
 
+    Args:
+        creds (optional): Credentials from get_credentials(); obtained here if omitted.
+    """
+    if creds is None:
+        creds = get_credentials()
     try:
         youtube = build("youtube", "v3", credentials=creds)
         logger.info("Successfully built YouTube service object.")
@@ -1,6 +1,7 @@
 import os
-import yaml
 import sys
+import threading
+from collections.abc import MutableMapping
 
 
 def load_config(config_path="config.yaml"):
@@ -22,6 +23,8 @@ def load_config(config_path="config.yaml"):
     project_root = os.path.abspath(os.path.join(script_dir, ".."))
     full_config_path = os.path.join(project_root, config_path)
 
+    import yaml
+
     if not os.path.exists(full_config_path):
         print(f"Configuration file '{full_config_path}' not found.")
         sys.exit(1)
@@ -35,5 +38,58 @@ def load_config(config_path="config.yaml"):
         sys.exit(1)
 
 
-# Load configuration when the module is imported
-config = load_config()
+class LazyConfig(MutableMapping):
+    """Configuration mapping that reads config.yaml on first use.
+
+    Importing this module has no side effects; call ``init_config()`` to load
+    a specific file up front, otherwise the default file is loaded the first
+    time a key is read.
+    """
+
+    def __init__(self):
+        self._data = None
+        self._lock = threading.Lock()
+
+    def load(self, config_path="config.yaml"):
+        with self._lock:
+            self._data = load_config(config_path) or {}
+        return self
+
+    def use(self, data):
+        """Use ``data`` instead of reading a file, e.g. in worker processes."""
+        with self._lock:
+            self._data = data
+        return self
+
+    @property
+    def data(self):
+        if self._data is None:
+            self.load()
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        del self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        state = repr(self._data) if self._data is not None else "not loaded"
+        return f"<LazyConfig {state}>"
+
+
+config = LazyConfig()
+
+
+def init_config(config_path="config.yaml"):
+    """Explicitly load the configuration file and return the shared config mapping."""
+    return config.load(config_path)
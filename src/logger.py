@@ -1,13 +1,143 @@
+import atexit
+import itertools
+import json
 import logging
+import logging.handlers
+import queue
 import sys
+from datetime import datetime, timezone
 from config import config
 
 
+_configured = False
+_listener = None
+
+# Attributes every LogRecord has; anything else was passed with ``extra=``.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line.
+
+    Fields passed with ``extra=`` (e.g. ``query``, ``video_id`` and
+    ``status`` on per-song lines) are included as keys of their own.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Let one in ``every`` INFO-or-lower records through; warnings and errors always pass.
+
+    ``every=0`` drops them all, leaving the per-playlist summaries.
+    """
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = every
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        return bool(self.every) and next(self._counter) % self.every == 0
+
+
+# Argument types that cannot change between queueing and formatting.
+_IMMUTABLE_ARGS = (str, int, float, bytes, type(None))
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler merges ``%`` arguments into the message before
+    queueing, so records can be pickled. Records on an in-process queue
+    are never pickled, so when every argument is an immutable scalar (the
+    common case: queries, video IDs, counts) the calling thread only pays
+    for the enqueue. Any other argument, e.g. a list or dict that the
+    caller may change afterwards, is merged into the message first.
+    """
+
+    def prepare(self, record):
+        args = record.args
+        if args and not (
+            isinstance(args, tuple) and all(isinstance(arg, _IMMUTABLE_ARGS) for arg in args)
+        ):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+def _level(name, default):
+    return getattr(logging, str(name).upper(), default)
+
+
+def _file_handler(handler_config, default_filename):
+    """Build a file handler; with ``max_bytes`` the file is rotated at that size."""
+    filename = handler_config.get("filename", default_filename)
+    mode = handler_config.get("mode", "a")
+    encoding = handler_config.get("encoding", "utf-8")
+    max_bytes = int(handler_config.get("max_bytes", 0) or 0)
+    if max_bytes:
+        return logging.handlers.RotatingFileHandler(
+            filename,
+            mode=mode,
+            maxBytes=max_bytes,
+            backupCount=int(handler_config.get("backup_count", 5)),
+            encoding=encoding,
+        )
+    return logging.FileHandler(filename=filename, mode=mode, encoding=encoding)
+
+
+def configure_song_lines():
+    """Apply ``logging.song_lines`` to the ``songs`` logger, which logs one line per song.
+
+    'all' keeps every line, 'sample' one in ``logging.sample_every`` and
+    'none' only the warnings; each playlist still gets a summary line.
+    """
+    logging_config = config.get("logging", {}) or {}
+    song_lines = logging_config.get("song_lines", "all")
+    for existing in list(song_logger.filters):
+        song_logger.removeFilter(existing)
+    if song_lines == "sample":
+        every = max(1, int(logging_config.get("sample_every", 100)))
+        song_logger.addFilter(SamplingFilter(every))
+    elif song_lines == "none":
+        song_logger.addFilter(SamplingFilter(0))
+
+
 def setup_logging():
     """
     Set up logging configuration based on config.yaml settings.
+
+    The console, file and JSON-lines handlers run on a background
+    QueueListener thread unless ``logging.queue`` is false, so logging
+    calls only enqueue the record; formatting and writing happen off the
+    hot path. Safe to call more than once; handlers are only attached the
+    first time.
     """
-    logging_config = config.get("logging", {})
+    global _configured, _listener
+    logger = logging.getLogger()
+    if _configured:
+        return logger
+    _configured = True
+    logging_config = config.get("logging", {}) or {}
+    handlers_config = logging_config.get("handlers", {}) or {}
 
     # Set default values if not specified
     level = logging_config.get("level", "INFO").upper()
@@ -16,38 +146,70 @@ def setup_logging():
     )
     date_format = logging_config.get("datefmt", "%Y-%m-%d %H:%M:%S")
 
-    # Create a root logger
-    logger = logging.getLogger()
-    logger.setLevel(getattr(logging, level, logging.INFO))
+    # Configure the root logger
+    logger.setLevel(_level(level, logging.INFO))
 
     # Define formatters
     formatter = logging.Formatter(fmt=log_format, datefmt=date_format)
+    handlers = []
 
     # Console Handler
-    console_handler_config = logging_config.get("handlers", {}).get("console", {})
-    console_level = console_handler_config.get("level", level).upper()
+    console_handler_config = handlers_config.get("console", {}) or {}
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(getattr(logging, console_level, logging.INFO))
+    console_handler.setLevel(_level(console_handler_config.get("level", level), logging.INFO))
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
 
     # File Handler
-    file_handler_config = logging_config.get("handlers", {}).get("file", {})
+    file_handler_config = handlers_config.get("file", {}) or {}
     if file_handler_config:
-        file_level = file_handler_config.get("level", level).upper()
-        filename = file_handler_config.get("filename", "upload_playlist.log")
-        mode = file_handler_config.get("mode", "a")
-        encoding = file_handler_config.get("encoding", "utf-8")
+        file_handler = _file_handler(file_handler_config, "upload_playlist.log")
+        file_handler.setLevel(_level(file_handler_config.get("level", level), logging.INFO))
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    # JSON-lines Handler
+    json_handler_config = handlers_config.get("json", {}) or {}
+    if json_handler_config.get("enabled", False):
+        json_handler = _file_handler(json_handler_config, "upload_playlist.jsonl")
+        json_handler.setLevel(_level(json_handler_config.get("level", level), logging.INFO))
+        json_handler.setFormatter(JsonFormatter())
+        handlers.append(json_handler)
 
-        file_handler = logging.FileHandler(
-            filename=filename, mode=mode, encoding=encoding
+    if logging_config.get("queue", True):
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(DeferredQueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
         )
-        file_handler.setLevel(getattr(logging, file_level, logging.INFO))
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+    configure_song_lines()
 
     return logger
 
 
-# Initialize the logger
-logger = setup_logging()
+def shutdown_logging():
+    """Write out the records still queued and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def log_handlers():
+    """Return the handlers that write log records, behind the queue if there is one."""
+    if _listener is not None:
+        return list(_listener.handlers)
+    return list(logging.getLogger().handlers)
+
+
+# Modules log through the root logger; handlers are attached by setup_logging().
+logger = logging.getLogger()
+# Per-song lines, thinned out by ``logging.song_lines`` on large runs.
+song_logger = logging.getLogger("songs")
@@ -1,36 +1,101 @@
+import argparse
+import asyncio
+import contextlib
+import logging
 import os
 import sys
-import pandas as pd
-import time
-from authentication.youtube_auth import authenticate_youtube
-from playlist_management.playlist_creator import (
-    create_playlist,
-    get_existing_playlists,
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from authentication.credential_pool import get_credential_pool
+from authentication.service_factory import ServiceFactory, SharedCredentials, prewarm
+from authentication.youtube_auth import (
+    TokenRefresher,
+    default_token_path,
+    get_credentials,
+    save_token,
 )
+from playlist_management import async_client
+from playlist_management.playlist_creator import get_existing_playlists
+from playlist_management.batch_executor import get_batch_settings
+from playlist_management.pooled import (
+    get_or_create_playlist,
+    get_or_create_playlist_async,
+    pooled_batches,
+    pooled_call,
+    pooled_call_async,
+)
+from playlist_management.playlist_mirror import get_playlist_mirror
 from playlist_management.playlist_adder import (
+    get_playlist_items,
     add_video_to_playlist,
+    add_videos_to_playlist,
     get_existing_videos,
     search_video,
+    search_videos,
 )
+from utils.csv_stream import MissingColumnsError, iter_playlist_chunks, prefetch
 from utils.encoding_detector import detect_file_encoding
-from config import config
-from logger import logger
+from utils.job_model import VideoSet, intern_text
+from utils.lazy_import import LazyImport
+from utils.match_index import get_match_index
+from utils.metrics import export_metrics, get_metrics
+from utils.run_journal import get_run_journal
+from utils.ranking import get_ranking_settings
+from utils.row_fingerprints import get_row_fingerprints
+from utils.query_normalizer import QueryMemo, canonical_query, count_unique_queries
+from utils.quota import (
+    QuotaExhausted,
+    estimate_run_cost,
+    get_quota_ledger,
+    next_reset,
+)
+from utils.retry import get_circuit_breaker, get_failure_report
+from utils.search_cache import MISS, get_search_cache
+from utils.track import Track, as_track, clean_identifier
+from scheduler import get_scheduler_settings, schedule_playlists
+from planner import apply_plan, load_plan, log_plan, new_plan, plan_playlist, save_plan
+from workers import recover_worker_journals, run_workers
+from config import config, init_config
+from logger import logger, setup_logging, song_logger
+
+pd = LazyImport("pandas")
 
 # Constants
 TRACK_COL_NAME = "Track name"
 ARTIST_COL_NAME = "Artist name"
 PLAYLIST_COL_NAME = "Playlist name"
+ISRC_COL_NAME = "ISRC"
+SPOTIFY_ID_COL_NAME = "Spotify - id"
+CSV_COLUMNS = {
+    TRACK_COL_NAME,
+    ARTIST_COL_NAME,
+    PLAYLIST_COL_NAME,
+    ISRC_COL_NAME,
+    SPOTIFY_ID_COL_NAME,
+}
 
 
 def parse_playlist_csv(file_path):
-    """Parse the playlist CSV file and return a dictionary grouping songs by Playlist name."""
+    """Parse the playlist CSV file and return a dictionary grouping songs by Playlist name.
+
+    Songs are Track records carrying the search query plus the row's ISRC and
+    Spotify ID (None when the column is missing or blank).
+    """
+    if (config.get("csv", {}) or {}).get("engine", "pandas") == "csv":
+        return parse_playlist_csv_light(file_path)
     try:
-        encoding = detect_file_encoding(file_path)
+        with phase_timer("encoding"):
+            encoding = detect_file_encoding(file_path)
         if encoding is None:
             logger.warning("Could not detect encoding. Using 'utf-8' as fallback.")
             encoding = "utf-8"
+        # Only the columns the uploader uses are loaded, all as text.
         df = pd.read_csv(
-            file_path, encoding=encoding, on_bad_lines="skip"
+            file_path,
+            encoding=encoding,
+            on_bad_lines="skip",
+            usecols=lambda column: column in CSV_COLUMNS,
+            dtype=str,
         )  # For pandas >=1.3.0
         # Check if required columns exist
         required_columns = [TRACK_COL_NAME, ARTIST_COL_NAME, PLAYLIST_COL_NAME]
@@ -42,24 +107,35 @@ def parse_playlist_csv(file_path):
             sys.exit(1)
         # Drop rows with missing Playlist name, Track name, or Artist name
         df = df.dropna(subset=[PLAYLIST_COL_NAME, TRACK_COL_NAME, ARTIST_COL_NAME])
-        # Normalize text by stripping whitespace and converting to title case
+        # Normalize text by stripping whitespace and converting to title case.
+        # Playlist and artist names repeat, so they are kept as categoricals
+        # (one string per distinct name).
         df[PLAYLIST_COL_NAME] = (
-            df[PLAYLIST_COL_NAME].astype(str).str.strip().str.title()
+            df[PLAYLIST_COL_NAME].str.strip().str.title().astype("category")
         )
-        df[TRACK_COL_NAME] = df[TRACK_COL_NAME].astype(str).str.strip()
-        df[ARTIST_COL_NAME] = df[ARTIST_COL_NAME].astype(str).str.strip().str.title()
+        df[TRACK_COL_NAME] = df[TRACK_COL_NAME].str.strip()
+        df[ARTIST_COL_NAME] = df[ARTIST_COL_NAME].str.strip().str.title().astype("category")
+        for column in (ISRC_COL_NAME, SPOTIFY_ID_COL_NAME):
+            if column not in df.columns:
+                df[column] = None
+        # Combine Track name and Artist name to form search queries
+        queries = (df[TRACK_COL_NAME] + " " + df[ARTIST_COL_NAME].astype(str)).tolist()
+        isrcs = df[ISRC_COL_NAME].tolist()
+        spotify_ids = df[SPOTIFY_ID_COL_NAME].tolist()
+        del df[TRACK_COL_NAME], df[ARTIST_COL_NAME]
         # Group by Playlist name
-        grouped = df.groupby(PLAYLIST_COL_NAME)
         playlists = {}
-        for playlist_name, group in grouped:
-            # Combine Track name and Artist name to form search queries
-            group["Search Query"] = (
-                group[TRACK_COL_NAME].astype(str)
-                + " "
-                + group[ARTIST_COL_NAME].astype(str)
-            )
-            songs = group["Search Query"].tolist()
-            playlists[playlist_name] = songs
+        for playlist_name, rows in sorted(
+            df.groupby(PLAYLIST_COL_NAME, observed=True).indices.items()
+        ):
+            playlists[intern_text(str(playlist_name))] = [
+                Track(
+                    intern_text(queries[row]),
+                    clean_identifier(isrcs[row], upper=True),
+                    clean_identifier(spotify_ids[row]),
+                )
+                for row in rows
+            ]
         logger.debug(f"Parsed CSV and found {len(playlists)} unique playlists.")
         return playlists
     except FileNotFoundError:
@@ -73,71 +149,1091 @@ def parse_playlist_csv(file_path):
         sys.exit(1)
 
 
-def process_playlists(youtube, playlist_name, songs, existing_playlists):
+def parse_playlist_csv_light(file_path):
+    """Parse the playlist CSV with the csv module instead of pandas.
+
+    Produces the same result as parse_playlist_csv (playlists sorted by
+    name) without importing pandas, which keeps short runs fast.
+    """
+    playlists = {}
+    for playlist_name, songs in stream_playlist_csv(file_path, prefetch_chunks=0):
+        playlists.setdefault(playlist_name, []).extend(songs)
+    playlists = dict(sorted(playlists.items()))
+    logger.debug(f"Parsed CSV and found {len(playlists)} unique playlists.")
+    return playlists
+
+
+def stream_playlist_csv(file_path, prefetch_chunks=None):
+    """Stream the playlist CSV, yielding ``(playlist_name, songs)`` chunks as they are read.
+
+    Unlike parse_playlist_csv, the file is never fully loaded: rows are read
+    on a background thread with a bounded number of chunks in flight (see the
+    ``csv`` section of config.yaml), and a playlist may be yielded in several
+    chunks. ``prefetch_chunks=0`` reads on the calling thread.
+    """
+    csv_config = config.get("csv", {}) or {}
+    with phase_timer("encoding"):
+        encoding = detect_file_encoding(file_path)
+    if encoding is None:
+        logger.warning("Could not detect encoding. Using 'utf-8' as fallback.")
+        encoding = "utf-8"
+    chunks = iter_playlist_chunks(
+        file_path,
+        encoding,
+        TRACK_COL_NAME,
+        ARTIST_COL_NAME,
+        PLAYLIST_COL_NAME,
+        chunk_size=csv_config.get("chunk_size", 500),
+        max_buffered_rows=csv_config.get("max_buffered_rows", 10000),
+        isrc_col=ISRC_COL_NAME,
+        spotify_col=SPOTIFY_ID_COL_NAME,
+    )
+    if prefetch_chunks is None:
+        prefetch_chunks = csv_config.get("prefetch_chunks", 4)
+    if prefetch_chunks:
+        chunks = prefetch(chunks, prefetch_chunks)
+    try:
+        yield from chunks
+    except FileNotFoundError:
+        logger.error(f"Playlist file '{file_path}' not found.")
+        sys.exit(1)
+    except MissingColumnsError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Error reading playlist file: {e}")
+        sys.exit(1)
+
+
+def process_playlists(
+    youtube,
+    playlist_name,
+    songs,
+    existing_playlists,
+    journal=None,
+    video_sets=None,
+    memo=None,
+):
     logger.info(f"\nProcessing Playlist: '{playlist_name}'")
+    journal, songs = _pending_songs(journal, playlist_name, songs)
+    if not songs:
+        return
+
     playlist_id = get_or_create_playlist(youtube, playlist_name, existing_playlists)
     if not playlist_id:
         return
 
-    existing_videos = get_existing_videos(youtube, playlist_id)
+    existing_videos = _listed_videos(video_sets, playlist_id)
+    if existing_videos is None:
+        with phase_timer("listing"):
+            existing_videos = _keep_listed_videos(
+                video_sets, playlist_id, get_existing_videos(youtube, playlist_id)
+            )
+    try:
+        add_songs_to_playlist(
+            youtube, songs, playlist_id, existing_videos, journal, memo
+        )
+    finally:
+        _finish_playlist(journal)
+
+
+def _pending_songs(journal, playlist_name, songs):
+    """Bind the journal to a playlist and drop the songs a previous run completed.
+
+    Returns:
+        tuple: ``(playlist_journal or None, list of Tracks still to process)``.
+    """
+    songs = [as_track(song) for song in songs]
+    if journal is None:
+        return None, songs
+    journal = journal.for_playlist(playlist_name)
+    pending = [song for song in songs if not journal.is_done(song.query)]
+    if len(pending) < len(songs):
+        logger.info(
+            f" - Resuming: {len(songs) - len(pending)} songs already done in a previous run."
+        )
+    return journal, pending
+
+
+def _listed_videos(video_sets, playlist_id):
+    """Return the videos of a playlist already listed in this run, or None."""
+    if video_sets is None:
+        return None
+    # Another chunk of this playlist was already processed in this run.
+    return video_sets.get(playlist_id)
+
+
+def _keep_listed_videos(video_sets, playlist_id, video_ids):
+    """Remember a playlist's freshly listed videos for its later chunks and return them."""
+    existing_videos = video_ids if isinstance(video_ids, VideoSet) else VideoSet(video_ids)
+    if video_sets is not None:
+        video_sets[playlist_id] = existing_videos
     logger.info(
         f"   * Retrieved {len(existing_videos)} existing songs in the playlist."
     )
-    add_songs_to_playlist(youtube, songs, playlist_id, existing_videos)
+    return existing_videos
 
 
-def get_or_create_playlist(youtube, playlist_name, existing_playlists):
-    playlist_id = existing_playlists.get(playlist_name.lower())
-    if playlist_id:
-        logger.info(
-            f" - Playlist exists with ID: {playlist_id}. Adding songs to existing playlist."
+def _finish_playlist(journal):
+    """Write out the journal after a playlist (or chunk).
+
+    The playlist mirror is only written once, at the end of the run.
+    """
+    if journal is not None:
+        journal.flush()
+
+
+async def process_playlists_async(
+    client,
+    playlist_name,
+    songs,
+    existing_playlists,
+    journal=None,
+    video_sets=None,
+    memo=None,
+):
+    """Async counterpart of process_playlists.
+
+    All of the playlist's searches are started at once (the client bounds
+    how many are in flight); inserts are awaited one at a time in CSV order.
+    """
+    logger.info(f"\nProcessing Playlist: '{playlist_name}'")
+    journal, songs = _pending_songs(journal, playlist_name, songs)
+    if not songs:
+        return
+
+    playlist_id = await get_or_create_playlist_async(client, playlist_name, existing_playlists)
+    if not playlist_id:
+        return
+
+    existing_videos = _listed_videos(video_sets, playlist_id)
+    if existing_videos is None:
+        with phase_timer("listing"):
+            existing_videos = _keep_listed_videos(
+                video_sets,
+                playlist_id,
+                await async_client.get_existing_videos(client, playlist_id),
+            )
+
+    async def resolve(song):
+        return await resolve_track_async(client, song)
+
+    searches = [
+        asyncio.ensure_future(_search_song_async(song, journal, memo, resolve))
+        for song in songs
+    ]
+    logger.info("   * Adding %d songs to playlist '%s':", len(songs), playlist_name)
+    outcomes = Counter()
+    try:
+        for song, task in zip(songs, searches):
+            video_id = await task
+            if not _needs_insert(journal, outcomes, song, video_id, existing_videos):
+                continue
+            with phase_timer("insert"):
+                added = await pooled_call_async(
+                    client,
+                    "playlistItems.insert",
+                    lambda c: async_client.add_video_to_playlist(c, video_id, playlist_id),
+                )
+            _record_insert(journal, outcomes, song, video_id, added, existing_videos)
+        _log_song_summary(outcomes)
+    finally:
+        for task in searches:
+            task.cancel()
+        await async_client.run_blocking(_finish_playlist, journal)
+
+
+def _indexed_video(track):
+    """Return ``(match index or None, video ID it has for the track or None)``."""
+    index = get_match_index()
+    if index is None:
+        return None, None
+    video_id = index.lookup(track)
+    if video_id:
+        logger.debug("Match index hit for '%s': %s", track.query, video_id)
+    return index, video_id
+
+
+def _index_video(index, track, video_id):
+    if video_id and index is not None:
+        index.record(track, video_id)
+
+
+def resolve_track(youtube, track):
+    """Return the video ID for a track, consulting the match index before searching.
+
+    Tracks with an indexed ISRC or Spotify ID cost no search at all; videos
+    found by searching are recorded in the index under the track's IDs.
+    ``youtube`` is used from search worker threads, so it should be a
+    ServiceFactory.
+    """
+    index, video_id = _indexed_video(track)
+    if video_id:
+        return video_id
+    with phase_timer("search"):
+        video_id = pooled_call(
+            youtube, "search.list", lambda service: search_video(service, track.query)
         )
-    else:
-        logger.info(" - Playlist does not exist. Creating new playlist.")
-        playlist_description = (
-            f"Uploaded via Python script from CSV. Playlist: {playlist_name}"
+    _index_video(index, track, video_id)
+    return video_id
+
+
+async def resolve_track_async(client, track):
+    """Coroutine form of resolve_track for the async engine.
+
+    The match index is SQLite, so it is read and written off the event loop.
+    """
+    index, video_id = await async_client.run_blocking(_indexed_video, track)
+    if video_id:
+        return video_id
+    with phase_timer("search"):
+        video_id = await pooled_call_async(
+            client, "search.list", lambda c: async_client.search_video(c, track.query)
         )
-        playlist_id = create_playlist(youtube, playlist_name, playlist_description)
-        if not playlist_id:
-            logger.error(f"   * Failed to create playlist '{playlist_name}'. Skipping.")
-            return None
-        logger.info(f"   * Created playlist '{playlist_name}' with ID: {playlist_id}")
-        existing_playlists[playlist_name.lower()] = playlist_id
-    return playlist_id
-
-
-def add_songs_to_playlist(youtube, songs, playlist_id, existing_videos):
-    logger.info(f"   * Adding {len(songs)} songs to playlist:")
-    for idx, song in enumerate(songs, start=1):
-        logger.info(f"     {idx}. Searching for: {song}")
-        video_id = search_video(youtube, song)
-        if video_id:
-            if video_id in existing_videos:
-                logger.info(
-                    f"        - Video ID {video_id} already exists in the playlist. Skipping."
-                )
-            else:
-                add_video_to_playlist(youtube, video_id, playlist_id)
-                existing_videos.append(video_id)
-                logger.info(f"        - Added Video ID {video_id} to playlist.")
-                time.sleep(1)
+    await async_client.run_blocking(_index_video, index, track, video_id)
+    return video_id
+
+
+def _needs_search(track):
+    """Return True unless the match index or the search cache can answer a track.
+
+    Decides whether a repeat the QueryMemo answered actually saved a search.
+    """
+    index = get_match_index()
+    if index is not None and index.lookup(track):
+        return False
+    search_cache = get_search_cache()
+    if search_cache is None:
+        return True
+    return search_cache.peek(track.query, config.get("video_category_id", "10")) is MISS
+
+
+def _journaled_video(journal, song):
+    """Return the video an interrupted run already found for a song, or None."""
+    return journal.resolved_video(song.query) if journal is not None else None
+
+
+def _journal_search(journal, song, video_id):
+    if video_id and journal is not None:
+        journal.record(song.query, video_id, "searched")
+
+
+def _search_song(song, journal, memo, resolve):
+    """Return a song's video ID: from the journal, the memo or ``resolve(song)``."""
+    video_id = _journaled_video(journal, song)
+    if video_id is None:
+        if memo is None:
+            video_id = resolve(song)
         else:
-            logger.warning(f"        - No video found for '{song}'. Skipping.")
+            video_id = memo.resolve(
+                song.query, lambda _: resolve(song), lambda _: _needs_search(song)
+            )
+        _journal_search(journal, song, video_id)
+    return video_id
 
 
-def main():
-    logger.info("Starting YouTube Playlist Uploader.")
+async def _search_song_async(song, journal, memo, resolve):
+    """Coroutine form of _search_song; ``resolve(song)`` returns an awaitable."""
+    video_id = _journaled_video(journal, song)
+    if video_id is None:
+        if memo is None:
+            video_id = await resolve(song)
+        else:
+            video_id = await memo.resolve_async(
+                song.query,
+                lambda _: resolve(song),
+                lambda _: async_client.run_blocking(_needs_search, song),
+            )
+        _journal_search(journal, song, video_id)
+    return video_id
 
-    youtube = authenticate_youtube()
-    existing_playlists = get_existing_playlists(youtube)
-    logger.info(f"Retrieved {len(existing_playlists)} existing playlists from YouTube.")
 
+def search_songs(youtube, songs, journal=None, memo=None):
+    """Search for every song on a bounded worker pool.
+
+    Yields ``(song, video_id)`` pairs lazily and in the original CSV order,
+    so the caller can start inserting while later searches are in flight.
+    Songs whose video was already found in an interrupted run are not
+    searched again, and with a QueryMemo duplicates of a song resolved
+    earlier in the run (in any playlist) reuse its result.
+    """
+
+    def search(song):
+        return _search_song(song, journal, memo, lambda track: resolve_track(youtube, track))
+
+    workers = max(1, int(config.get("concurrency", {}).get("search_workers", 1)))
+    if workers == 1:
+        for song in songs:
+            yield song, search(song)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = [executor.submit(search, song) for song in songs]
+    try:
+        for song, future in zip(songs, futures):
+            yield song, future.result()
+    finally:
+        # Searches that have not started are dropped (shutdown's cancel_futures needs 3.9).
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+# Per-song lines, logged lazily at the level shown; see ``logging.song_lines``.
+SONG_LINES = {
+    "added": (logging.INFO, "        - Added video ID %s for '%s'."),
+    "exists": (logging.INFO, "        - Video ID %s for '%s' is already in the playlist."),
+    "not_found": (logging.WARNING, "        - No video found for '%s'. Skipping."),
+    "failed": (logging.WARNING, "        - Could not add video ID %s for '%s'."),
+}
+
+
+def _record_song(journal, outcomes, song, video_id, status):
+    """Journal a song's outcome, count it and log its per-song line."""
+    if journal is not None:
+        journal.record(song.query, video_id, status)
+    outcomes[status] += 1
+    level, message = SONG_LINES[status]
+    if song_logger.isEnabledFor(level):
+        args = (song.query,) if video_id is None else (video_id, song.query)
+        extra = {"query": song.query, "video_id": video_id, "status": status}
+        song_logger.log(level, message, *args, extra=extra)
+
+
+def _needs_insert(journal, outcomes, song, video_id, existing_videos):
+    """Return True if a song's video must be inserted; otherwise record why not."""
+    if not video_id:
+        _record_song(journal, outcomes, song, None, "not_found")
+        return False
+    if video_id in existing_videos:
+        _record_song(journal, outcomes, song, video_id, "exists")
+        return False
+    return True
+
+
+def _record_insert(journal, outcomes, song, video_id, added, existing_videos):
+    """Record the outcome of inserting a song's video into the playlist."""
+    if added is False:
+        _record_song(journal, outcomes, song, video_id, "failed")
+        return
+    existing_videos.add(video_id)
+    _record_song(journal, outcomes, song, video_id, "added")
+
+
+def _log_song_summary(outcomes):
+    logger.info(
+        "   * %d added, %d already in the playlist, %d not found, %d failed.",
+        outcomes["added"],
+        outcomes["exists"],
+        outcomes["not_found"],
+        outcomes["failed"],
+    )
+
+
+def add_songs_to_playlist(
+    youtube, songs, playlist_id, existing_videos, journal=None, memo=None
+):
+    songs = [as_track(song) for song in songs]
+    logger.info("   * Adding %d songs to playlist:", len(songs))
+    batching, batch_size, max_retries = get_batch_settings()
+    if batching:
+        outcomes = add_songs_to_playlist_batched(
+            youtube,
+            songs,
+            playlist_id,
+            existing_videos,
+            batch_size,
+            max_retries,
+            journal,
+            memo,
+        )
+        _log_song_summary(outcomes)
+        return
+    outcomes = Counter()
+    for song, video_id in search_songs(youtube, songs, journal, memo):
+        if not _needs_insert(journal, outcomes, song, video_id, existing_videos):
+            continue
+        with phase_timer("insert"):
+            added = pooled_call(
+                youtube,
+                "playlistItems.insert",
+                lambda service: add_video_to_playlist(service, video_id, playlist_id),
+            )
+        _record_insert(journal, outcomes, song, video_id, added, existing_videos)
+    _log_song_summary(outcomes)
+
+
+def add_songs_to_playlist_batched(
+    youtube,
+    songs,
+    playlist_id,
+    existing_videos,
+    batch_size,
+    max_retries,
+    journal=None,
+    memo=None,
+):
+    """Search and insert songs ``batch_size`` at a time through batch requests.
+
+    Songs sharing a canonical query are searched once per chunk, and with a
+    QueryMemo once per run.
+
+    Returns:
+        collections.Counter: Number of songs per outcome.
+    """
+    outcomes = Counter()
+    for start in range(0, len(songs), batch_size):
+        chunk = songs[start : start + batch_size]
+        video_ids = {}
+        index = get_match_index()
+        for song in chunk:
+            video_id = _journaled_video(journal, song)
+            if not video_id and memo is not None:
+                memoized = memo.get(song.query, lambda _: _needs_search(song))
+                if memoized is not MISS:
+                    video_ids[song] = memoized
+                    continue
+            if not video_id and index is not None:
+                video_id = index.lookup(song)
+            if video_id:
+                video_ids[song] = video_id
+        to_search = [song for song in chunk if song not in video_ids]
+        queries = {}
+        duplicates = set()
+        for song in to_search:
+            query = queries.setdefault(canonical_query(song.query), song.query)
+            # search_videos sends an exact repeat once anyway, and a cached one not at all.
+            if memo is not None and song.query != query and song.query not in duplicates:
+                duplicates.add(song.query)
+                if _needs_search(song):
+                    memo.saved += 1
+        with phase_timer("search"):
+            found = {}
+            for part in pooled_batches(
+                youtube,
+                "search.list",
+                list(queries.values()),
+                lambda service, part: search_videos(service, part, batch_size, max_retries),
+            ):
+                found.update(part)
+        for song in to_search:
+            video_id = found.get(queries[canonical_query(song.query)])
+            if memo is not None:
+                memo.set(song.query, video_id)
+            video_ids[song] = video_id
+            _index_video(index, song, video_id)
+            _journal_search(journal, song, video_id)
+        to_add = []
+        inserting = []
+        for song in chunk:
+            video_id = video_ids.get(song)
+            if not video_id:
+                _record_song(journal, outcomes, song, None, "not_found")
+            elif video_id in existing_videos or video_id in to_add:
+                _record_song(journal, outcomes, song, video_id, "exists")
+            else:
+                to_add.append(video_id)
+                inserting.append(song)
+        if to_add:
+            with phase_timer("insert"):
+                added = set()
+                for part in pooled_batches(
+                    youtube,
+                    "playlistItems.insert",
+                    to_add,
+                    lambda service, part: add_videos_to_playlist(
+                        service, part, playlist_id, batch_size, max_retries
+                    ),
+                ):
+                    added.update(part)
+            for song, video_id in zip(inserting, to_add):
+                _record_insert(
+                    journal, outcomes, song, video_id, video_id in added, existing_videos
+                )
+    return outcomes
+
+
+def log_quota_estimate(playlists, existing_playlists):
+    """Log the estimated quota cost of the run against today's remaining budget."""
+    search_cache = get_search_cache()
+    index = get_match_index()
+    tracks = [as_track(song) for songs in playlists.values() for song in songs]
+    # Songs answered by the search cache or the match index need no search.
+    cached_queries = set()
+    if search_cache is not None:
+        category_id = config.get("video_category_id", "10")
+        cached_queries.update(
+            canonical_query(track.query)
+            for track in tracks
+            if search_cache.peek(track.query, category_id) is not MISS
+        )
+    if index is not None:
+        cached_queries.update(
+            canonical_query(track.query) for track in tracks if index.lookup(track)
+        )
+        index.hits = 0
+    # Duplicates across playlists are searched once, so count canonical queries.
+    estimate = estimate_run_cost(
+        {
+            name: [canonical_query(as_track(song).query) for song in songs]
+            for name, songs in playlists.items()
+        },
+        existing_playlists,
+        cached_queries,
+    )
+    pool = get_credential_pool()
+    remaining = pool.remaining() if pool is not None else get_quota_ledger().remaining()
+    breakdown = ", ".join(
+        f"{method}: {units}" for method, units in estimate.items() if method != "total"
+    )
+    logger.info(f"Estimated quota cost: {estimate['total']} units ({breakdown}).")
+    if remaining is not None:
+        logger.info(f"Remaining quota budget today: {remaining} units.")
+        if estimate["total"] > remaining:
+            logger.warning(
+                "The estimated cost exceeds the remaining budget. The run will stop "
+                "before the budget runs out; run again after the quota resets."
+            )
+    return estimate
+
+
+def phase_timer(phase):
+    """Time a pipeline phase in the ``pipeline_phase_seconds`` histogram."""
+    return get_metrics().timer("pipeline_phase_seconds", phase=phase)
+
+
+def log_metrics():
+    """Write the configured metrics files and log the time spent in each phase."""
+    export_metrics()
+    phases = get_metrics().summary()["histograms"].get("pipeline_phase_seconds", [])
+    if phases:
+        breakdown = ", ".join(
+            f"{series['labels']['phase']}: {series['sum']:.2f}s" for series in phases
+        )
+        logger.info(f"Time per phase: {breakdown}.")
+
+
+def log_failure_report():
+    """Log the items that failed permanently and write them to ``retry.report_path``."""
+    report = get_failure_report()
+    trips = get_circuit_breaker().trips
+    if trips:
+        logger.info(f"The circuit breaker paused API calls {trips} times.")
+    if not len(report):
+        return
+    report_path = (config.get("retry", {}) or {}).get(
+        "report_path", os.path.join(".cache", "failures.json")
+    )
+    report.write(report_path)
+    breakdown = ", ".join(f"{method}: {count}" for method, count in report.summary().items())
+    logger.warning(
+        f"{len(report)} items failed permanently ({breakdown}); see '{report_path}'."
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Upload playlists from a CSV file to YouTube."
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--resume",
+        dest="resume",
+        action="store_true",
+        default=True,
+        help="Skip songs completed by an interrupted run (default).",
+    )
+    mode.add_argument(
+        "--fresh",
+        dest="resume",
+        action="store_false",
+        help="Discard the run journal and process every song again.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Partition the playlists across N worker processes (sync engine only).",
+    )
+    plan = parser.add_mutually_exclusive_group()
+    plan.add_argument(
+        "--plan",
+        metavar="PATH",
+        help="Diff the CSV against the account, write the changes to PATH and exit.",
+    )
+    plan.add_argument(
+        "--apply",
+        metavar="PATH",
+        help="Make the changes of a plan written by --plan.",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="With --plan: remove videos that are not in the CSV (and duplicates).",
+    )
+    parser.add_argument(
+        "--reorder",
+        action="store_true",
+        help="With --plan: move videos so each playlist follows the CSV order.",
+    )
+    parser.add_argument(
+        "--reject-video",
+        action="append",
+        default=[],
+        metavar="VIDEO_ID",
+        help="Never use this video again; its songs get the next best cached candidate. "
+        "Can be repeated.",
+    )
+    index = parser.add_mutually_exclusive_group()
+    index.add_argument(
+        "--import-index",
+        metavar="CSV",
+        help="Import isrc/spotify_id/video_id mappings into the match index and exit.",
+    )
+    index.add_argument(
+        "--export-index",
+        metavar="CSV",
+        help="Export the match index as isrc/spotify_id/video_id rows and exit.",
+    )
+    args = parser.parse_args(argv)
+    if (args.prune or args.reorder) and not args.plan:
+        parser.error("--prune and --reorder only apply to --plan.")
+    return args
+
+
+def reject_videos(video_ids, journal):
+    """Stop matching songs to ``video_ids`` and reopen the songs matched to them.
+
+    The rejection is kept in the search cache, the videos are dropped from
+    the match index, and the journal records let the songs be resolved
+    again in this run, from their cached candidates when ranking is on.
+    """
+    cache = get_search_cache()
+    index = get_match_index()
+    if cache is None:
+        logger.warning("The search cache is disabled, so rejections only last for this run.")
+    elif not get_ranking_settings()[0]:
+        logger.warning("Enable ranking in config.yaml so rejected videos are replaced.")
+    for video_id in video_ids:
+        if cache is not None:
+            cache.reject(video_id)
+        if index is not None:
+            index.forget(video_id)
+        reopened = journal.reject_video(video_id)
+        logger.info(f"Rejected video ID {video_id}; {reopened} songs will be matched again.")
+    journal.flush()
+    fingerprints = get_row_fingerprints()
+    if fingerprints is not None and len(fingerprints):
+        # The fingerprints do not say which rows used the video, so check them all again.
+        fingerprints.reset()
+        logger.info("Cleared the row fingerprints so every row is matched again.")
+
+
+def skip_unchanged_rows(playlists):
+    """Drop the rows a previous complete run already uploaded unchanged.
+
+    Returns:
+        dict: Playlist name -> new and changed songs, without empty playlists.
+    """
+    fingerprints = get_row_fingerprints()
+    if fingerprints is None:
+        return playlists
+    with phase_timer("fingerprints"):
+        pending, summary = fingerprints.delta(playlists)
+        removed = fingerprints.removed()
+    for name, counts in summary.items():
+        if counts["added"] or counts["changed"] or removed.get(name):
+            logger.debug(
+                f" - '{name}': {counts['added']} new, {counts['changed']} changed, "
+                f"{removed.get(name, 0)} removed rows."
+            )
+    totals = {
+        label: sum(counts[label] for counts in summary.values())
+        for label in ("added", "changed", "unchanged")
+    }
+    logger.info(
+        f"Skipping {totals['unchanged']} rows unchanged since the last complete run; "
+        f"{totals['added']} new, {totals['changed']} changed and "
+        f"{sum(removed.values())} removed rows."
+    )
+    return {name: songs for name, songs in pending.items() if songs}
+
+
+def stream_changed_rows(chunks):
+    """Like skip_unchanged_rows(), for chunks streamed from the CSV."""
+    fingerprints = get_row_fingerprints()
+    if fingerprints is None:
+        yield from chunks
+        return
+    skipped = 0
+    for playlist_name, songs in chunks:
+        pending, summary = fingerprints.delta({playlist_name: songs})
+        skipped += summary[playlist_name]["unchanged"]
+        if pending[playlist_name]:
+            yield playlist_name, pending[playlist_name]
+    logger.info(f"Skipped {skipped} rows unchanged since the last complete run.")
+
+
+def scheduled_chunks(playlists, existing_playlists, journal, objective, slice_size):
+    """Order the CSV's songs with the quota-aware scheduler (see scheduler.py).
+
+    Songs the journal has finished are left out; songs answered by the
+    search cache or the match index count as needing no search.
+    """
+    search_cache = get_search_cache()
+    index = get_match_index()
+    category_id = config.get("video_category_id", "10")
+    resolved = {}
+
+    def is_resolved(track):
+        if track not in resolved:
+            resolved[track] = (
+                search_cache is not None
+                and search_cache.peek(track.query, category_id) is not MISS
+            ) or (index is not None and index.lookup(track) is not None)
+        return resolved[track]
+
+    pending = {}
+    for name, songs in playlists.items():
+        tracks = [as_track(song) for song in songs]
+        if journal is not None:
+            playlist_journal = journal.for_playlist(name)
+            tracks = [track for track in tracks if not playlist_journal.is_done(track.query)]
+        pending[name] = tracks
+    pool = get_credential_pool()
+    budget = pool.remaining() if pool is not None else get_quota_ledger().remaining()
+    chunks = schedule_playlists(
+        pending, existing_playlists, is_resolved, objective, budget, slice_size
+    )
+    if index is not None:
+        index.hits = 0
+    logger.info(
+        f"Scheduled {sum(len(songs) for _, songs in chunks)} pending songs in "
+        f"{len(chunks)} chunks to add the most {objective} within the quota."
+    )
+    return chunks
+
+
+def load_playlist_chunks(existing_playlists, journal=None, schedule=True, skip_unchanged=True):
+    """Read the playlist CSV configured in config.yaml and return its ``(name, songs)`` chunks.
+
+    The whole file is parsed (and the run's quota cost estimated) unless
+    ``csv.streaming`` is enabled, in which case chunks are read lazily.
+    With ``skip_unchanged``, rows the row fingerprints show were uploaded
+    by a previous complete run are left out. With ``scheduler.enabled``
+    (and ``schedule``) the chunks are ordered by the quota-aware scheduler
+    instead of by playlist name.
+    """
     playlist_file = config.get("playlist_file", os.path.join("data", "playlist.csv"))
-    playlists = parse_playlist_csv(playlist_file)
+    if (config.get("csv", {}) or {}).get("streaming", False):
+        logger.info("Streaming the CSV; the quota estimate is not available.")
+        if schedule and get_scheduler_settings()[0]:
+            logger.info("The scheduler needs the whole CSV; streamed chunks keep file order.")
+        chunks = stream_playlist_csv(playlist_file)
+        return stream_changed_rows(chunks) if skip_unchanged else chunks
+    with phase_timer("csv_parse"):
+        playlists = parse_playlist_csv(playlist_file)
     logger.info(f"Found {len(playlists)} unique playlists in the CSV.")
+    total, unique = count_unique_queries(
+        as_track(song).query for songs in playlists.values() for song in songs
+    )
+    logger.info(
+        f"Found {unique} unique recordings in {total} rows; deduplication "
+        f"can save up to {total - unique} searches."
+    )
+    if skip_unchanged:
+        playlists = skip_unchanged_rows(playlists)
+    log_quota_estimate(playlists, existing_playlists)
+    enabled, objective, slice_size = get_scheduler_settings()
+    if schedule and enabled:
+        return scheduled_chunks(playlists, existing_playlists, journal, objective, slice_size)
+    return playlists.items()
+
+
+def run_sync(youtube, journal, memo):
+    """Process every playlist with the googleapiclient service, one playlist at a time."""
+    with phase_timer("listing"):
+        existing_playlists = get_existing_playlists(youtube)
+    logger.info(f"Retrieved {len(existing_playlists)} existing playlists from YouTube.")
+    video_sets = {}
+    for playlist_name, songs in load_playlist_chunks(existing_playlists, journal):
+        process_playlists(
+            youtube,
+            playlist_name,
+            songs,
+            existing_playlists,
+            journal,
+            video_sets,
+            memo,
+        )
+
+
+@contextlib.asynccontextmanager
+async def pooled_clients(client, max_in_flight):
+    """Give every member of the credential pool its own client for the run.
+
+    The primary member shares ``client``. Does nothing without a pool.
+    """
+    pool = get_credential_pool()
+    async with contextlib.AsyncExitStack() as stack:
+        for member in pool.members if pool is not None else ():
+            if member is pool.primary:
+                member.client = client
+            else:
+                member.client = await stack.enter_async_context(
+                    async_client.AsyncYouTubeClient(
+                        member.credentials, max_in_flight=max_in_flight
+                    )
+                )
+        try:
+            yield
+        finally:
+            for member in pool.members if pool is not None else ():
+                member.client = None
 
+
+def build_plan(youtube, memo, prune=False, reorder=False):
+    """Resolve every CSV song and diff the playlists against the account.
+
+    Searches run as in a normal upload (match index, search cache, memo),
+    but nothing is changed: the result lists the playlists to create and
+    the items to add, and with ``prune``/``reorder`` the items to remove
+    and the moves that put each playlist in CSV order.
+
+    Returns:
+        dict: The plan, to be written with save_plan() and applied later.
+    """
+    with phase_timer("listing"):
+        existing_playlists = get_existing_playlists(youtube)
+    logger.info(f"Retrieved {len(existing_playlists)} existing playlists from YouTube.")
+    playlists = {}
+    for playlist_name, songs in load_playlist_chunks(
+        existing_playlists, schedule=False, skip_unchanged=False
+    ):
+        playlists.setdefault(playlist_name, []).extend(as_track(song) for song in songs)
+
+    entries = []
     for playlist_name, songs in playlists.items():
-        process_playlists(youtube, playlist_name, songs, existing_playlists)
+        logger.info(f"\nPlanning Playlist: '{playlist_name}'")
+        resolved = [
+            (song.query, video_id)
+            for song, video_id in search_songs(youtube, songs, None, memo)
+        ]
+        playlist_id = existing_playlists.get(playlist_name.lower())
+        items = []
+        if playlist_id:
+            with phase_timer("listing"):
+                if prune or reorder:
+                    items = get_playlist_items(youtube, playlist_id)
+                else:
+                    items = [
+                        (None, video_id)
+                        for video_id in get_existing_videos(youtube, playlist_id)
+                    ]
+            if items is None:
+                logger.error(f"   * Could not list playlist '{playlist_name}'. Leaving it out.")
+                continue
+        entries.append(plan_playlist(playlist_name, playlist_id, resolved, items, prune, reorder))
+    return new_plan(entries)
+
+
+def run_parallel(youtube, credentials, journal, memo, workers):
+    """Parse the CSV here and process its playlists on ``workers`` processes."""
+    with phase_timer("listing"):
+        existing_playlists = get_existing_playlists(youtube)
+    logger.info(f"Retrieved {len(existing_playlists)} existing playlists from YouTube.")
+    chunks = list(load_playlist_chunks(existing_playlists, journal))
+    run_workers(credentials, chunks, existing_playlists, journal, memo, workers, process_playlists)
+
+
+async def run_async(credentials, journal, memo):
+    """Process playlists concurrently on the asyncio engine.
+
+    Up to ``concurrency.max_playlists`` playlists are processed at once and
+    at most ``concurrency.max_in_flight`` requests are outstanding. Chunks
+    of the same playlist are processed one after another.
+    """
+    max_in_flight, max_playlists = async_client.get_async_settings()
+    async with async_client.AsyncYouTubeClient(
+        credentials, max_in_flight=max_in_flight
+    ) as client, pooled_clients(client, max_in_flight):
+        with phase_timer("listing"):
+            existing_playlists = await async_client.get_existing_playlists(client)
+        logger.info(
+            f"Retrieved {len(existing_playlists)} existing playlists from YouTube."
+        )
+        video_sets = {}
+        locks = {}
+        pending = set()
+
+        async def process(lock, playlist_name, songs):
+            async with lock:
+                await process_playlists_async(
+                    client,
+                    playlist_name,
+                    songs,
+                    existing_playlists,
+                    journal,
+                    video_sets,
+                    memo,
+                )
+
+        try:
+            for playlist_name, songs in load_playlist_chunks(existing_playlists, journal):
+                lock = locks.setdefault(playlist_name.lower(), asyncio.Lock())
+                pending.add(asyncio.ensure_future(process(lock, playlist_name, songs)))
+                if len(pending) >= max_playlists:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        task.result()
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def main(argv=None):
+    get_metrics().mark_started()
+    args = parse_args(argv)
+    init_config()
+    setup_logging()
+    if args.import_index or args.export_index:
+        index = get_match_index()
+        if index is None:
+            logger.error("The match index is disabled in config.yaml.")
+            sys.exit(1)
+        if args.import_index:
+            index.import_csv(args.import_index)
+        else:
+            index.export_csv(args.export_index)
+        return
+
+    logger.info("Starting YouTube Playlist Uploader.")
+    # Load the client library and discovery document while the journal is read.
+    prewarm()
+
+    journal = get_run_journal()
+    recover_worker_journals(journal)
+    fingerprints = get_row_fingerprints()
+    if args.resume:
+        journal.replay()
+    else:
+        logger.info("Starting fresh: discarding the previous run journal.")
+        journal.reset()
+        if fingerprints is not None:
+            fingerprints.reset()
+    if args.reject_video:
+        reject_videos(args.reject_video, journal)
+
+    ledger = get_quota_ledger()
+    memo = QueryMemo()
+    engine = (config.get("concurrency", {}) or {}).get("engine", "sync")
+    metrics_port = (config.get("metrics", {}) or {}).get("port")
+    if metrics_port:
+        get_metrics().serve(int(metrics_port))
+    if engine == "async" and not async_client.is_available():
+        logger.warning("The async engine needs httpx (pip install httpx); using sync.")
+        engine = "sync"
+    if args.workers > 1 and engine == "async":
+        logger.warning("Worker processes use the sync engine.")
+        engine = "sync"
+    if (args.plan or args.apply) and engine == "async":
+        logger.info("Plans are made and applied with the sync engine.")
+        engine = "sync"
+    pool = get_credential_pool()
+    refresher = None
+    try:
+        with phase_timer("auth"):
+            token_path = default_token_path()
+            # An expired token is refreshed in the background, not before the first call.
+            credentials = SharedCredentials(
+                get_credentials(token_path=token_path, refresh=False),
+                on_refresh=lambda creds: save_token(creds, token_path),
+            )
+            refresher = TokenRefresher(
+                credentials, margin=config.get("token_refresh_margin", 300)
+            ).start()
+            if pool is not None:
+                pool.authenticate(credentials)
+            # Services are built on first use; the async engine only needs one
+            # to refresh the playlist mirror at the end.
+            youtube = pool.primary.youtube if pool is not None else ServiceFactory(credentials)
+        if args.plan:
+            plan = build_plan(youtube, memo, args.prune, args.reorder)
+            save_plan(plan, args.plan)
+            log_plan(plan)
+            logger.info(
+                f"Wrote the plan to '{args.plan}'; run with --apply {args.plan} to make it."
+            )
+            return
+        if args.apply:
+            apply_plan(youtube, load_plan(args.apply))
+            return
+        if engine == "async":
+            # Journal batches go to a writer thread, so an fsync never stalls the event loop.
+            with journal.background_writes():
+                asyncio.run(run_async(credentials, journal, memo))
+        elif args.workers > 1:
+            run_parallel(youtube, credentials, journal, memo, args.workers)
+        else:
+            run_sync(youtube, journal, memo)
+        mirror = get_playlist_mirror()
+        if mirror is not None:
+            mirror.refresh_changed(youtube)
+    except QuotaExhausted as e:
+        logger.warning(f"Stopping: daily quota budget exhausted ({e}).")
+        spent = (
+            sum(member.ledger.spent() for member in pool.members)
+            if pool is not None
+            else ledger.spent()
+        )
+        logger.info(
+            f"Spent {spent} units today. Run again after the quota resets "
+            f"at {next_reset():%Y-%m-%d %H:%M %Z} to continue."
+        )
+        return
+    finally:
+        if refresher is not None:
+            refresher.stop()
+        if pool is not None:
+            pool.stop()
+        journal.flush()
+        mirror = get_playlist_mirror()
+        if mirror is not None:
+            mirror.save()
+        # Ledgers are saved on a timer during the run; write out the rest.
+        for ledger_to_save in (
+            [member.ledger for member in pool.members] if pool is not None else [ledger]
+        ):
+            ledger_to_save.flush()
+        log_failure_report()
+        log_metrics()
+
+    if fingerprints is not None:
+        # Rows that were added (or already there) are skipped by the next run.
+        fingerprints.commit(
+            lambda playlist, query: (journal.get(playlist, query) or {}).get("status")
+            in ("added", "exists")
+        )
+    # Every song was handled, so the next run starts from a clean journal.
+    journal.reset()
+
+    search_cache = get_search_cache()
+    if search_cache is not None:
+        stats = search_cache.stats()
+        logger.info(
+            f"Search cache: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['entries']} entries."
+        )
+    logger.info(f"Deduplication saved {memo.saved} searches.")
+    index = get_match_index()
+    if index is not None:
+        logger.info(f"Match index: {index.hits} hits, {len(index)} identifiers.")
+    logger.info(f"Quota spent today: {ledger.spent()} units {ledger.spent_by_method()}.")
 
     print("\nAll playlists have been processed and uploaded.")
 
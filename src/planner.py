@@ -0,0 +1,367 @@
+import bisect
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from config import config
+from logger import logger
+from playlist_management.batch_executor import get_batch_settings
+from playlist_management.playlist_adder import (
+    add_video_to_playlist,
+    add_videos_to_playlist,
+    get_existing_videos,
+    get_playlist_items,
+    move_playlist_item,
+    remove_playlist_item,
+    remove_playlist_items,
+)
+from playlist_management.playlist_creator import get_existing_playlists
+from playlist_management.playlist_mirror import get_playlist_mirror
+from playlist_management.pooled import get_or_create_playlist, pooled_batches, pooled_call
+from utils.quota import QUOTA_COSTS
+
+PLAN_VERSION = 1
+
+
+def stable_items(current, desired):
+    """Return the indices into ``current`` of a longest subsequence already in ``desired`` order.
+
+    Only the first occurrence of each desired video takes part; duplicates
+    and videos outside ``desired`` never count as in order. With distinct
+    elements the longest common subsequence is a longest increasing
+    subsequence of desired ranks, found in O(n log n).
+    """
+    rank = {video_id: index for index, video_id in enumerate(desired)}
+    seen = set()
+    candidates = []  # (index into current, desired rank)
+    for index, video_id in enumerate(current):
+        if video_id in rank and video_id not in seen:
+            seen.add(video_id)
+            candidates.append((index, rank[video_id]))
+
+    tails = []  # tails[k]: smallest final rank of an increasing run of length k + 1
+    tail_at = []  # candidate position ending that run
+    previous = [None] * len(candidates)
+    for position, (_, value) in enumerate(candidates):
+        k = bisect.bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_at.append(position)
+        else:
+            tails[k] = value
+            tail_at[k] = position
+        previous[position] = tail_at[k - 1] if k else None
+
+    stable = set()
+    position = tail_at[-1] if tail_at else None
+    while position is not None:
+        stable.add(candidates[position][0])
+        position = previous[position]
+    return stable
+
+
+def plan_moves(current, desired):
+    """Return the fewest position updates that put ``current`` in ``desired`` order.
+
+    Items on a longest common subsequence stay put; every other desired
+    item is moved, in desired order, to just after its desired predecessor.
+    Items not in ``desired`` keep their relative place.
+
+    Args:
+        current (list): Video IDs in playlist order.
+        desired (list): Distinct video IDs in the order wanted.
+
+    Returns:
+        list: ``(index into current, video_id, position)`` in the order the
+        ``playlistItems.update`` calls must be made.
+    """
+    stable = stable_items(current, desired)
+    first = {}
+    for index, video_id in enumerate(current):
+        first.setdefault(video_id, index)
+    sequence = list(range(len(current)))
+    moves = []
+    predecessor = None
+    for video_id in desired:
+        index = first.get(video_id)
+        if index is None:
+            continue
+        if index not in stable:
+            sequence.remove(index)
+            position = sequence.index(predecessor) + 1 if predecessor is not None else 0
+            sequence.insert(position, index)
+            moves.append((index, video_id, position))
+        predecessor = index
+    return moves
+
+
+def plan_playlist(name, playlist_id, resolved, items, prune=False, reorder=False):
+    """Diff one playlist's desired songs against its current items.
+
+    Args:
+        name (str): Playlist title.
+        playlist_id (str): ID of the existing playlist, or None to create it.
+        resolved (list): ``(query, video_id or None)`` in CSV order.
+        items (list): ``(item_id, video_id)`` in playlist order. Item IDs
+            may be None when neither ``prune`` nor ``reorder`` is wanted.
+        prune (bool): Remove items whose video is not in the CSV, and
+            duplicates of those that are.
+        reorder (bool): Move items so the playlist follows the CSV order.
+
+    Returns:
+        dict: The playlist's entry in the plan.
+    """
+    videos = []
+    not_found = []
+    for query, video_id in resolved:
+        if not video_id:
+            not_found.append(query)
+        elif video_id not in videos:
+            videos.append(video_id)
+    wanted = set(videos)
+
+    remove = []
+    kept = []
+    seen = set()
+    for item_id, video_id in items:
+        if prune and (video_id not in wanted or video_id in seen):
+            remove.append({"item_id": item_id, "video_id": video_id})
+        else:
+            kept.append(video_id)
+        seen.add(video_id)
+    present = set(kept)
+    add = [video_id for video_id in videos if video_id not in present]
+
+    moves = []
+    if reorder:
+        # Inserts are appended, so order the playlist as it will be after them.
+        moves = [
+            {"video_id": video_id, "position": position}
+            for _, video_id, position in plan_moves(kept + add, videos)
+        ]
+    return {
+        "name": name,
+        "playlist_id": playlist_id,
+        "create": playlist_id is None,
+        "videos": videos,
+        "add": add,
+        "remove": remove,
+        "moves": moves,
+        "reorder": reorder,
+        "not_found": not_found,
+    }
+
+
+def plan_cost(plan):
+    """Return the quota units applying ``plan`` takes, by method and in total."""
+    counts = {
+        "playlists.insert": sum(entry["create"] for entry in plan["playlists"]),
+        "playlistItems.delete": sum(len(entry["remove"]) for entry in plan["playlists"]),
+        "playlistItems.insert": sum(len(entry["add"]) for entry in plan["playlists"]),
+        "playlistItems.update": sum(len(entry["moves"]) for entry in plan["playlists"]),
+    }
+    cost = {method: QUOTA_COSTS[method] * count for method, count in counts.items() if count}
+    cost["total"] = sum(cost.values())
+    return cost
+
+
+def new_plan(entries):
+    plan = {
+        "version": PLAN_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "playlists": entries,
+    }
+    plan["cost"] = plan_cost(plan)
+    return plan
+
+
+def save_plan(plan, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(plan, file, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def load_plan(path):
+    """Read a plan written by save_plan().
+
+    Raises:
+        ValueError: If the file is not a plan this version can apply.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        plan = json.load(file)
+    if plan.get("version") != PLAN_VERSION:
+        raise ValueError(f"'{path}' is not a version {PLAN_VERSION} playlist plan.")
+    return plan
+
+
+def log_plan(plan):
+    """Log what applying the plan will change, playlist by playlist."""
+    for entry in plan["playlists"]:
+        changes = [
+            f"{len(entry[key])} to {verb}"
+            for key, verb in (("add", "add"), ("remove", "remove"), ("moves", "move"))
+            if entry[key]
+        ]
+        if entry["create"]:
+            changes.insert(0, "create")
+        if entry["not_found"]:
+            changes.append(f"{len(entry['not_found'])} not found")
+        logger.info(f" - '{entry['name']}': {', '.join(changes) or 'up to date'}.")
+    cost = plan["cost"]
+    breakdown = ", ".join(
+        f"{method}: {units}" for method, units in cost.items() if method != "total"
+    )
+    logger.info(f"Applying the plan costs {cost['total']} quota units ({breakdown or 'nothing'}).")
+
+
+def apply_playlist(youtube, entry, playlist_id):
+    """Apply one playlist's removals, inserts and moves.
+
+    Removals and inserts go through batch requests when batching is
+    enabled. Inserts skip videos already in the playlist, so a partly
+    applied plan can be applied again. Moves are recomputed from the
+    playlist as listed after the inserts, since batched inserts may land
+    in any order.
+
+    Returns:
+        dict: Counts of ``removed``, ``added``, ``moved`` and ``failed`` changes.
+    """
+    batching, batch_size, max_retries = get_batch_settings()
+    counts = {"removed": 0, "added": 0, "moved": 0, "failed": 0}
+    mirror = get_playlist_mirror()
+
+    item_ids = [item["item_id"] for item in entry["remove"]]
+    if item_ids:
+        if batching:
+            removed = set()
+            for part in pooled_batches(
+                youtube,
+                "playlistItems.delete",
+                item_ids,
+                lambda service, part: remove_playlist_items(service, part, batch_size, max_retries),
+            ):
+                removed.update(part)
+        else:
+            removed = {
+                item_id
+                for item_id in item_ids
+                if pooled_call(
+                    youtube,
+                    "playlistItems.delete",
+                    lambda service: remove_playlist_item(service, item_id),
+                )
+            }
+        counts["removed"] = len(removed)
+        counts["failed"] += len(item_ids) - len(removed)
+        if mirror is not None:
+            mirror.forget_videos(
+                playlist_id,
+                {
+                    item["video_id"]
+                    for item in entry["remove"]
+                    if item["item_id"] in removed and item["video_id"] not in entry["videos"]
+                },
+                len(removed),
+            )
+
+    existing_videos = set(get_existing_videos(youtube, playlist_id))
+    to_add = [video_id for video_id in entry["add"] if video_id not in existing_videos]
+    if to_add:
+        if batching:
+            added = set()
+            for part in pooled_batches(
+                youtube,
+                "playlistItems.insert",
+                to_add,
+                lambda service, part: add_videos_to_playlist(
+                    service, part, playlist_id, batch_size, max_retries
+                ),
+            ):
+                added.update(part)
+        else:
+            added = {
+                video_id
+                for video_id in to_add
+                if pooled_call(
+                    youtube,
+                    "playlistItems.insert",
+                    lambda service: add_video_to_playlist(service, video_id, playlist_id),
+                )
+            }
+        counts["added"] = len(added)
+        counts["failed"] += len(to_add) - len(added)
+
+    if entry["reorder"]:
+        items = get_playlist_items(youtube, playlist_id)
+        if items is None:
+            counts["failed"] += len(entry["moves"])
+            return counts
+        moves = plan_moves([video_id for _, video_id in items], entry["videos"])
+        if len(moves) != len(entry["moves"]):
+            logger.info(
+                f"   * '{entry['name']}' needs {len(moves)} moves instead of the "
+                f"{len(entry['moves'])} planned."
+            )
+        for index, video_id, position in moves:
+            item_id = items[index][0]
+            moved = pooled_call(
+                youtube,
+                "playlistItems.update",
+                lambda service: move_playlist_item(
+                    service, item_id, playlist_id, video_id, position
+                ),
+            )
+            counts["moved" if moved else "failed"] += 1
+    return counts
+
+
+def apply_plan(youtube, plan):
+    """Execute a saved plan against the account.
+
+    Missing playlists are created first (skipping any that now exist);
+    then up to ``concurrency.max_playlists`` playlists are changed at once.
+    ``youtube`` must be safe to use from several threads (a ServiceFactory).
+
+    Returns:
+        dict: Totals of ``created``, ``removed``, ``added``, ``moved`` and
+        ``failed`` changes.
+    """
+    existing_playlists = get_existing_playlists(youtube)
+    totals = {"created": 0, "removed": 0, "added": 0, "moved": 0, "failed": 0}
+    targets = []
+    for entry in plan["playlists"]:
+        if not (entry["create"] or entry["add"] or entry["remove"] or entry["moves"]):
+            continue
+        known = entry["name"].lower() in existing_playlists
+        playlist_id = get_or_create_playlist(youtube, entry["name"], existing_playlists)
+        if not playlist_id:
+            totals["failed"] += 1
+            continue
+        if entry["create"] and not known:
+            totals["created"] += 1
+        targets.append((entry, playlist_id))
+
+    workers = max(1, int((config.get("concurrency", {}) or {}).get("max_playlists", 4)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(apply_playlist, youtube, entry, playlist_id)
+            for entry, playlist_id in targets
+        ]
+        for future in futures:
+            for key, count in future.result().items():
+                totals[key] += count
+
+    mirror = get_playlist_mirror()
+    if mirror is not None:
+        mirror.refresh_changed(youtube)
+    logger.info(
+        "Applied the plan: "
+        + ", ".join(f"{count} {key}" for key, count in totals.items())
+        + "."
+    )
+    return totals
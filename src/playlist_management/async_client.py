@@ -0,0 +1,437 @@
+import asyncio
+import functools
+import importlib.util
+import time
+
+from googleapiclient.errors import HttpError
+from config import config
+from logger import logger
+from playlist_management.playlist_mirror import (
+    PlaylistMirror,
+    get_playlist_mirror,
+    is_not_modified,
+)
+from playlist_management.request_executor import (
+    NetworkError,
+    classify_error,
+    record_call,
+    retry_after,
+)
+from utils.lazy_import import LazyImport
+from utils.quota import QuotaExhausted, get_quota_ledger
+from utils.ranking import (
+    Candidate,
+    best_candidates,
+    candidates_from_search,
+    durations_from_videos,
+    get_ranking_settings,
+    with_durations,
+)
+from utils.rate_limiter import get_rate_limiter
+from utils.retry import (
+    PERMANENT,
+    QUOTA,
+    RETRYABLE,
+    get_circuit_breaker,
+    get_retry_policy,
+    record_failure,
+)
+from utils.search_cache import MISS, get_search_cache
+
+# httpx is an optional dependency, only needed for the async engine.
+httpx = LazyImport("httpx")
+httplib2 = LazyImport("httplib2")
+Request = LazyImport("google.auth.transport.requests", "Request")
+
+API_ROOT = "https://www.googleapis.com/youtube/v3/"
+
+
+async def run_blocking(func, *args):
+    """Run ``func(*args)`` on the default thread pool, so it does not block the event loop.
+
+    Like asyncio.to_thread, which needs Python 3.9.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args))
+
+
+def is_available():
+    """Return True if the optional ``httpx`` dependency is installed."""
+    return importlib.util.find_spec("httpx") is not None
+
+
+def get_async_settings():
+    """Return ``(max_in_flight, max_playlists)`` from the ``concurrency`` config section."""
+    concurrency = config.get("concurrency", {}) or {}
+    return (
+        max(1, int(concurrency.get("max_in_flight", 100))),
+        max(1, int(concurrency.get("max_playlists", 4))),
+    )
+
+
+class AsyncYouTubeClient:
+    """asyncio YouTube Data API client over a pooled keep-alive HTTP/1.1 connection pool.
+
+    Requests authenticate with the OAuth credentials from ``get_credentials``
+    (refreshed once when they expire or the API answers 401), are charged to
+    the quota ledger and paced by the shared rate limiter like
+    ``execute_request``, and at most ``max_in_flight`` run at once. Failed
+    calls raise googleapiclient's ``HttpError`` so callers handle errors the
+    same way as with the sync engine.
+    """
+
+    def __init__(self, credentials, max_in_flight=100, timeout=30.0, transport=None):
+        self.credentials = credentials
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._refresh_lock = asyncio.Lock()
+        self._client = httpx.AsyncClient(
+            base_url=API_ROOT,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_in_flight, max_keepalive_connections=max_in_flight
+            ),
+            transport=transport,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def _needs_refresh(self, stale_token):
+        creds = self.credentials
+        return not creds.valid or (stale_token is not None and creds.token == stale_token)
+
+    async def _ensure_token(self, stale_token=None):
+        """Refresh the credentials if they are invalid or still carry ``stale_token``.
+
+        The lock is only taken when a refresh looks necessary, so requests
+        with a valid token do not queue behind each other.
+        """
+        if not self._needs_refresh(stale_token):
+            return
+        async with self._refresh_lock:
+            if not self._needs_refresh(stale_token):
+                return
+            await run_blocking(self.credentials.refresh, Request())
+            logger.info("Refreshed expired credentials.")
+
+    async def _pace(self):
+        """Wait for the shared rate limiter, sleeping exactly until a token is due."""
+        limiter = get_rate_limiter()
+        wait = limiter.take_or_wait()
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = limiter.take_or_wait()
+
+    async def _send(self, http_method, path, params, body, headers):
+        """Send a request once, refreshing the token and resending once on 401."""
+        async with self._semaphore:
+            stale_token = None
+            for _ in range(2):
+                await self._ensure_token(stale_token)
+                token = self.credentials.token
+                response = await self._client.request(
+                    http_method,
+                    path,
+                    params=params,
+                    json=body,
+                    headers={**(headers or {}), "Authorization": f"Bearer {token}"},
+                )
+                if response.status_code != 401:
+                    break
+                stale_token = token
+        return response
+
+    async def request(self, http_method, path, method, params=None, body=None, headers=None):
+        """Send one API request and return the decoded JSON response.
+
+        Failures are classified and retried like ``execute_request``: with
+        full-jitter backoff for retryable errors and network failures, and
+        waiting while the shared circuit breaker is open.
+
+        Args:
+            http_method (str): "GET" or "POST".
+            path (str): Resource path relative to the API root, e.g. "search".
+            method (str): API method name used for quota accounting, e.g. "search.list".
+            params (dict, optional): Query string parameters.
+            body (dict, optional): JSON request body.
+            headers (dict, optional): Extra request headers.
+
+        Returns:
+            dict: The API response.
+
+        Raises:
+            HttpError: If the API answers with a non-2xx status that is not
+                retryable, or retries run out (as a NetworkError for a
+                network failure).
+            QuotaExhausted: If the call would exceed the daily budget, or the
+                API reports that the quota is exhausted.
+        """
+        ledger = get_quota_ledger()
+        policy = get_retry_policy()
+        breaker = get_circuit_breaker()
+        attempt = 1
+        while True:
+            remaining = breaker.remaining()
+            while remaining > 0:
+                await asyncio.sleep(remaining)
+                remaining = breaker.remaining()
+            ledger.charge(method)
+            await self._pace()
+            start = time.perf_counter()
+            try:
+                response = await self._send(http_method, path, params, body, headers)
+            except httpx.TransportError as e:
+                error, kind = e, RETRYABLE
+            else:
+                if response.status_code < 300:
+                    record_call(method, time.perf_counter() - start)
+                    breaker.record_success()
+                    return response.json() if response.content else {}
+                error = HttpError(
+                    httplib2.Response(
+                        {"status": response.status_code, **response.headers}
+                    ),
+                    response.content,
+                    uri=str(response.url),
+                )
+                kind = classify_error(error)
+            record_call(method, time.perf_counter() - start, kind)
+            if kind == QUOTA:
+                ledger.mark_exhausted()
+                logger.error(
+                    f"YouTube API reported the daily quota as exceeded during {method}."
+                )
+                raise QuotaExhausted(f"API quota exceeded during {method}.") from error
+            if kind == PERMANENT:
+                raise error
+            breaker.record_failure()
+            if attempt >= policy.max_attempts:
+                if isinstance(error, HttpError):
+                    raise error
+                raise NetworkError(error, uri=path) from error
+            delay = policy.delay(attempt, retry_after(error))
+            logger.warning(
+                f"{method} failed ({error}); retry {attempt} of "
+                f"{policy.max_attempts - 1} in {delay:.1f}s."
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+async def create_playlist(client, title, description=""):
+    """Create a new YouTube playlist."""
+    try:
+        response = await client.request(
+            "POST",
+            "playlists",
+            "playlists.insert",
+            params={"part": "snippet,status"},
+            body={
+                "snippet": {
+                    "title": title,
+                    "description": description,
+                    "tags": ["Python", "YouTube", "API"],
+                    "defaultLanguage": "en",
+                },
+                "status": {"privacyStatus": config.get("privacy_status", "private")},
+            },
+        )
+        logger.info(
+            f"Created playlist: {response['snippet']['title']} (ID: {response['id']})"
+        )
+        mirror = get_playlist_mirror()
+        if mirror is not None:
+            mirror.record_playlist(response["id"])
+        return response["id"]
+    except HttpError as e:
+        logger.error(f"An HTTP error occurred while creating playlist '{title}': {e}")
+        record_failure("playlists.insert", title, e)
+        return None
+
+
+async def get_existing_playlists(client):
+    """Retrieve a dictionary of existing playlists with lowercase names as keys and IDs as values.
+
+    Pages are revalidated against the playlist mirror's ETags when it is enabled.
+    """
+    mirror = get_playlist_mirror()
+    pages = []
+    try:
+        page_token = None
+        while True:
+            params = {"part": "snippet,contentDetails", "mine": "true", "maxResults": 50}
+            if page_token:
+                params["pageToken"] = page_token
+            cached = mirror.cached_page(len(pages)) if mirror is not None else None
+            headers = None
+            if cached is not None and cached.get("etag"):
+                headers = {"If-None-Match": cached["etag"]}
+            try:
+                response = await client.request(
+                    "GET", "playlists", "playlists.list", params=params, headers=headers
+                )
+                page = PlaylistMirror.page_from_response(response)
+            except HttpError as e:
+                if not is_not_modified(e):
+                    raise
+                page = cached
+            pages.append(page)
+            page_token = page.get("next_page_token")
+            if not page_token:
+                break
+    except HttpError as e:
+        logger.error(f"An HTTP error occurred while retrieving existing playlists: {e}")
+        record_failure("playlists.list", "mine", e)
+        return {}
+    if mirror is not None:
+        return mirror.replace_pages(pages)
+    playlists = {
+        playlist["title"].lower(): playlist["id"]
+        for page in pages
+        for playlist in page["playlists"]
+    }
+    logger.debug(f"Retrieved {len(playlists)} existing playlists.")
+    return playlists
+
+
+async def add_video_to_playlist(client, video_id, playlist_id):
+    """Add a video to the specified playlist. Returns True on success."""
+    try:
+        await client.request(
+            "POST",
+            "playlistItems",
+            "playlistItems.insert",
+            params={"part": "snippet"},
+            body={
+                "snippet": {
+                    "playlistId": playlist_id,
+                    "resourceId": {"kind": "youtube#video", "videoId": video_id},
+                }
+            },
+        )
+        logger.debug("Added video ID %s to playlist ID %s.", video_id, playlist_id)
+        mirror = get_playlist_mirror()
+        if mirror is not None:
+            mirror.record_video(playlist_id, video_id)
+        return True
+    except HttpError as e:
+        logger.error(f"An HTTP error occurred while adding video ID {video_id}: {e}")
+        record_failure("playlistItems.insert", f"{playlist_id}/{video_id}", e)
+        return False
+
+
+async def get_existing_videos(client, playlist_id):
+    """Retrieve the set of video IDs already in the playlist.
+
+    Served from the local playlist mirror when it is enabled and the
+    playlist has not changed since it was mirrored.
+    """
+    mirror = get_playlist_mirror()
+    if mirror is not None and mirror.is_fresh(playlist_id):
+        logger.debug(f"Playlist ID {playlist_id} unchanged; using mirrored items.")
+        return mirror.items[playlist_id]["video_ids"]
+    video_ids = set()
+    item_count = 0
+    try:
+        params = {"part": "snippet", "playlistId": playlist_id, "maxResults": 50}
+        while True:
+            response = await client.request(
+                "GET", "playlistItems", "playlistItems.list", params=params
+            )
+            for item in response.get("items", []):
+                video_ids.add(item["snippet"]["resourceId"]["videoId"])
+                item_count += 1
+            if not response.get("nextPageToken"):
+                break
+            params = {**params, "pageToken": response["nextPageToken"]}
+    except HttpError as e:
+        logger.error(f"An HTTP error occurred while retrieving existing videos: {e}")
+        record_failure("playlistItems.list", playlist_id, e)
+        return video_ids
+    logger.debug(
+        f"Retrieved {len(video_ids)} existing videos in playlist ID {playlist_id}."
+    )
+    if mirror is not None:
+        return mirror.store_video_ids(playlist_id, video_ids, item_count)
+    return video_ids
+
+
+async def search_video(client, query):
+    """Search for a video on YouTube and return the best result's video ID.
+
+    Results (including "no results") are served from the persistent search
+    cache when it is enabled, so repeated queries cost no search quota.
+    With ``ranking.enabled`` several candidates are fetched, cached and
+    re-ranked locally, as in playlist_adder.search_video.
+    """
+    category_id = config.get("video_category_id", "10")
+    cache = get_search_cache()
+    # The cache is SQLite; its reads and writes run off the event loop.
+    if cache is not None:
+        cached = await run_blocking(cache.get, query, category_id)
+        if cached is not MISS:
+            logger.debug("Search cache hit for '%s': %s.", query, cached)
+            return cached
+    ranking, max_results, with_duration, weights = get_ranking_settings()
+    candidates = MISS
+    if ranking and cache is not None:
+        candidates = await run_blocking(cache.get_candidates, query, category_id)
+    if candidates is not MISS:
+        candidates = [Candidate(*fields) for fields in candidates]
+    else:
+        try:
+            response = await client.request(
+                "GET",
+                "search",
+                "search.list",
+                params={
+                    "part": "snippet",
+                    "maxResults": max_results if ranking else 1,
+                    "q": query,
+                    "type": "video",
+                    "videoCategoryId": category_id,
+                },
+            )
+        except HttpError as e:
+            logger.error(f"An HTTP error occurred while searching for '{query}': {e}")
+            record_failure("search.list", query, e)
+            return None
+        candidates = candidates_from_search(response)
+        if ranking and with_duration and candidates:
+            try:
+                videos = await client.request(
+                    "GET",
+                    "videos",
+                    "videos.list",
+                    params={
+                        "part": "contentDetails",
+                        "id": ",".join(candidate.video_id for candidate in candidates),
+                        "maxResults": 50,
+                    },
+                )
+                candidates = with_durations(candidates, durations_from_videos(videos))
+            except HttpError as e:
+                logger.warning(f"Could not fetch video durations: {e}")
+        if ranking and cache is not None:
+            await run_blocking(cache.set_candidates, query, category_id, candidates)
+    if ranking:
+        rejected = cache.rejected() if cache is not None else ()
+        (video_id,) = best_candidates([query], [candidates], rejected, weights)
+    else:
+        video_id = candidates[0].video_id if candidates else None
+    if video_id is None:
+        logger.debug("No results found for '%s'.", query)
+        # Candidates that were all rejected are not a "no results" answer.
+        if ranking and candidates:
+            return None
+    else:
+        logger.debug("Found video ID %s for query '%s'.", video_id, query)
+    if cache is not None:
+        await run_blocking(cache.set, query, category_id, video_id)
+    return video_id
@@ -0,0 +1,106 @@
+import time
+
+from googleapiclient.errors import HttpError
+from config import config
+from logger import logger
+from playlist_management.request_executor import classify_error, record_call, retry_after
+from utils.quota import get_quota_ledger
+from utils.rate_limiter import get_rate_limiter
+from utils.retry import QUOTA, RETRYABLE, get_circuit_breaker, get_retry_policy
+
+
+def get_batch_settings():
+    """Return (enabled, batch_size, max_retries) from the ``batching`` config section."""
+    batch_config = config.get("batching", {}) or {}
+    return (
+        bool(batch_config.get("enabled", False)),
+        max(1, min(int(batch_config.get("batch_size", 50)), 1000)),
+        int(batch_config.get("max_retries", 2)),
+    )
+
+
+def execute_batch(youtube, requests, method, batch_size=50, max_retries=2):
+    """Execute API requests in groups of ``batch_size`` via the batch endpoint.
+
+    Args:
+        youtube: The YouTube service object.
+        requests (dict): Maps a caller-chosen key to an unexecuted request.
+        method (str): API method name of the requests, for quota accounting.
+        batch_size (int): Maximum number of sub-requests per batch call.
+        max_retries (int): How many times failed, retryable sub-requests are
+            re-sent in a later batch, after a full-jitter backoff.
+
+    Returns:
+        tuple: ``(responses, errors)`` dicts keyed like ``requests``. Every key
+        ends up in exactly one of them.
+
+    Raises:
+        QuotaExhausted: If the daily budget runs out before a sub-request is
+            queued. Sub-requests rejected by the API for quota reasons are
+            returned in ``errors`` and mark the ledger as exhausted.
+    """
+    ledger = get_quota_ledger()
+    policy = get_retry_policy()
+    breaker = get_circuit_breaker()
+    responses = {}
+    errors = {}
+    pending = dict(requests)
+    attempt = 0
+    while pending:
+        keys = list(pending)
+        failed = {}
+        for start in range(0, len(keys), batch_size):
+            chunk = keys[start : start + batch_size]
+            ids = {str(index): key for index, key in enumerate(chunk)}
+
+            def callback(request_id, response, exception, ids=ids):
+                key = ids[request_id]
+                if exception is not None:
+                    failed[key] = exception
+                else:
+                    responses[key] = response
+                    breaker.record_success()
+
+            breaker.wait()
+            batch = youtube.new_batch_http_request(callback=callback)
+            for request_id, key in ids.items():
+                ledger.charge(method)
+                get_rate_limiter().acquire()
+                batch.add(pending[key], request_id=request_id)
+            batch_start = time.perf_counter()
+            try:
+                batch.execute()
+            except HttpError as e:
+                # The whole batch call failed; treat every sub-request as failed.
+                for key in chunk:
+                    if key not in responses:
+                        failed.setdefault(key, e)
+            # Sub-requests share one round trip, so each gets an equal share of it.
+            elapsed = (time.perf_counter() - batch_start) / len(chunk)
+            for key in chunk:
+                if key in failed:
+                    record_call(method, elapsed, classify_error(failed[key]))
+                else:
+                    record_call(method, elapsed)
+            logger.debug(f"Executed batch of {len(chunk)} requests.")
+
+        kinds = {key: classify_error(e) for key, e in failed.items()}
+        if QUOTA in kinds.values():
+            ledger.mark_exhausted()
+        retry = {key: e for key, e in failed.items() if kinds[key] == RETRYABLE}
+        for _ in retry:
+            breaker.record_failure()
+        errors.update({key: e for key, e in failed.items() if key not in retry})
+        if not retry:
+            break
+        if attempt >= max_retries:
+            errors.update(retry)
+            break
+        attempt += 1
+        delay = policy.delay(
+            attempt, max((retry_after(e) or 0 for e in retry.values()), default=0)
+        )
+        logger.info(f"Retrying {len(retry)} failed batch sub-requests in {delay:.1f}s.")
+        policy.sleep(delay)
+        pending = {key: pending[key] for key in retry}
+    return responses, errors
@@ -1,10 +1,23 @@
 from googleapiclient.errors import HttpError
 from config import config
 from logger import logger
+from playlist_management.request_executor import execute_request
+from playlist_management.batch_executor import execute_batch
+from playlist_management.playlist_mirror import get_playlist_mirror
+from utils.ranking import (
+    Candidate,
+    best_candidates,
+    candidates_from_search,
+    durations_from_videos,
+    get_ranking_settings,
+    with_durations,
+)
+from utils.retry import record_failure
+from utils.search_cache import MISS, get_search_cache
 
 
 def add_video_to_playlist(youtube, video_id, playlist_id):
-    """Add a video to the specified playlist."""
+    """Add a video to the specified playlist. Returns True on success."""
     try:
         request = youtube.playlistItems().insert(
             part="snippet",
@@ -15,50 +28,313 @@ def add_video_to_playlist(youtube, video_id, playlist_id):
                 }
             },
         )
-        response = request.execute()
-        logger.info(f"Added video ID {video_id} to playlist ID {playlist_id}.")
+        response = execute_request(request, "playlistItems.insert")
+        logger.debug("Added video ID %s to playlist ID %s.", video_id, playlist_id)
+        mirror = get_playlist_mirror()
+        if mirror is not None:
+            mirror.record_video(playlist_id, video_id)
+        return True
     except HttpError as e:
         logger.error(f"An HTTP error occurred while adding video ID {video_id}: {e}")
+        record_failure("playlistItems.insert", f"{playlist_id}/{video_id}", e)
+        return False
 
 
 def get_existing_videos(youtube, playlist_id):
-    """Retrieve a list of video IDs already in the playlist."""
-    video_ids = []
+    """Retrieve the set of video IDs already in the playlist.
+
+    Served from the local playlist mirror when it is enabled and the
+    playlist has not changed since it was mirrored.
+    """
+    video_ids = set()
     try:
+        mirror = get_playlist_mirror()
+        if mirror is not None:
+            return mirror.get_video_ids(youtube, playlist_id)
         request = youtube.playlistItems().list(
             part="snippet", playlistId=playlist_id, maxResults=50  # Max per request
         )
         while request:
-            response = request.execute()
+            response = execute_request(request, "playlistItems.list")
             for item in response.get("items", []):
-                video_ids.append(item["snippet"]["resourceId"]["videoId"])
+                video_ids.add(item["snippet"]["resourceId"]["videoId"])
             request = youtube.playlistItems().list_next(request, response)
         logger.debug(
             f"Retrieved {len(video_ids)} existing videos in playlist ID {playlist_id}."
         )
     except HttpError as e:
         logger.error(f"An HTTP error occurred while retrieving existing videos: {e}")
+        record_failure("playlistItems.list", playlist_id, e)
     return video_ids
 
 
-def search_video(youtube, query):
-    """Search for a video on YouTube and return the first result's video ID."""
+def get_playlist_items(youtube, playlist_id):
+    """Return the playlist's items as ``(item_id, video_id)`` pairs in playlist order.
+
+    Always lists the playlist: the mirror keeps video IDs only. Returns None
+    if the playlist could not be listed.
+    """
+    items = []
+    try:
+        request = youtube.playlistItems().list(
+            part="snippet", playlistId=playlist_id, maxResults=50
+        )
+        while request:
+            response = execute_request(request, "playlistItems.list")
+            for item in response.get("items", []):
+                items.append((item["id"], item["snippet"]["resourceId"]["videoId"]))
+            request = youtube.playlistItems().list_next(request, response)
+    except HttpError as e:
+        logger.error(f"An HTTP error occurred while listing playlist ID {playlist_id}: {e}")
+        record_failure("playlistItems.list", playlist_id, e)
+        return None
+    return items
+
+
+def remove_playlist_item(youtube, item_id):
+    """Remove an item from its playlist. Returns True on success."""
+    try:
+        request = youtube.playlistItems().delete(id=item_id)
+        execute_request(request, "playlistItems.delete")
+        logger.debug("Removed playlist item %s.", item_id)
+        return True
+    except HttpError as e:
+        logger.error(f"An HTTP error occurred while removing playlist item {item_id}: {e}")
+        record_failure("playlistItems.delete", item_id, e)
+        return False
+
+
+def remove_playlist_items(youtube, item_ids, batch_size=50, max_retries=2):
+    """Remove several playlist items using batched requests.
+
+    Returns the list of item IDs that were removed successfully.
+    """
+    requests = {item_id: youtube.playlistItems().delete(id=item_id) for item_id in item_ids}
+    responses, errors = execute_batch(
+        youtube, requests, "playlistItems.delete", batch_size, max_retries
+    )
+    for item_id, error in errors.items():
+        logger.error(f"An HTTP error occurred while removing playlist item {item_id}: {error}")
+        record_failure("playlistItems.delete", item_id, error)
+    removed = [item_id for item_id in item_ids if item_id in responses]
+    logger.info(f"Removed {len(removed)} playlist items in batches.")
+    return removed
+
+
+def move_playlist_item(youtube, item_id, playlist_id, video_id, position):
+    """Move a playlist item to ``position`` (0-based). Returns True on success."""
     try:
-        request = youtube.search().list(
+        request = youtube.playlistItems().update(
             part="snippet",
-            maxResults=1,
-            q=query,
-            type="video",
-            videoCategoryId=config.get("video_category_id", "10"),  # Use config
+            body={
+                "id": item_id,
+                "snippet": {
+                    "playlistId": playlist_id,
+                    "resourceId": {"kind": "youtube#video", "videoId": video_id},
+                    "position": position,
+                },
+            },
         )
-        response = request.execute()
-        items = response.get("items", [])
-        if not items:
-            logger.warning(f"No results found for '{query}'.")
+        execute_request(request, "playlistItems.update")
+        logger.debug("Moved video ID %s to position %d.", video_id, position)
+        return True
+    except HttpError as e:
+        logger.error(f"An HTTP error occurred while moving video ID {video_id}: {e}")
+        record_failure("playlistItems.update", f"{playlist_id}/{video_id}", e)
+        return False
+
+
+def fetch_durations(youtube, video_ids, http=None):
+    """Return {video ID: seconds} for the videos, 50 per ``videos.list`` call (1 unit each).
+
+    Durations only refine the ranking, so errors are logged and skipped.
+    """
+    durations = {}
+    video_ids = list(dict.fromkeys(video_ids))
+    for start in range(0, len(video_ids), 50):
+        chunk = video_ids[start : start + 50]
+        try:
+            request = youtube.videos().list(
+                part="contentDetails", id=",".join(chunk), maxResults=50
+            )
+            durations.update(
+                durations_from_videos(execute_request(request, "videos.list", http=http))
+            )
+        except HttpError as e:
+            logger.warning(f"Could not fetch video durations: {e}")
+    return durations
+
+
+def _cached_candidates(cache, query, category_id):
+    if cache is None:
+        return MISS
+    cached = cache.get_candidates(query, category_id)
+    return cached if cached is MISS else [Candidate(*fields) for fields in cached]
+
+
+def _search_request(youtube, query, category_id, max_results=1):
+    return youtube.search().list(
+        part="snippet",
+        maxResults=max_results,
+        q=query,
+        type="video",
+        videoCategoryId=category_id,
+    )
+
+
+def search_video(youtube, query, http=None):
+    """Search for a video on YouTube and return the best result's video ID.
+
+    Results (including "no results") are served from the persistent search
+    cache when it is enabled, so repeated queries cost no search quota.
+    With ``ranking.enabled`` the search asks for several candidates, keeps
+    all of them in the cache and picks one with the local re-ranker;
+    otherwise the first hit is taken.
+    """
+    category_id = config.get("video_category_id", "10")
+    cache = get_search_cache()
+    if cache is not None:
+        cached = cache.get(query, category_id)
+        if cached is not MISS:
+            logger.debug("Search cache hit for '%s': %s.", query, cached)
+            return cached
+    ranking, max_results, with_duration, weights = get_ranking_settings()
+    try:
+        if ranking:
+            candidates = _cached_candidates(cache, query, category_id)
+            if candidates is MISS:
+                request = _search_request(youtube, query, category_id, max_results)
+                response = execute_request(request, "search.list", http=http)
+                candidates = candidates_from_search(response)
+                if with_duration and candidates:
+                    candidates = with_durations(
+                        candidates,
+                        fetch_durations(youtube, [c.video_id for c in candidates], http),
+                    )
+                if cache is not None:
+                    cache.set_candidates(query, category_id, candidates)
+            else:
+                logger.debug("Re-ranking %d cached candidates for '%s'.", len(candidates), query)
+            rejected = cache.rejected() if cache is not None else ()
+            (video_id,) = best_candidates([query], [candidates], rejected, weights)
+        else:
+            request = _search_request(youtube, query, category_id)
+            response = execute_request(request, "search.list", http=http)
+            items = response.get("items", [])
+            video_id = items[0]["id"]["videoId"] if items else None
+        if video_id is None:
+            logger.debug("No results found for '%s'.", query)
+            # Candidates that were all rejected are not a "no results" answer.
+            if cache is not None and not (ranking and candidates):
+                cache.set(query, category_id, None)
             return None
-        video_id = items[0]["id"]["videoId"]
-        logger.debug(f"Found video ID {video_id} for query '{query}'.")
+        logger.debug("Found video ID %s for query '%s'.", video_id, query)
+        if cache is not None:
+            cache.set(query, category_id, video_id)
         return video_id
     except HttpError as e:
         logger.error(f"An HTTP error occurred while searching for '{query}': {e}")
+        record_failure("search.list", query, e)
         return None
+
+
+def search_videos(youtube, queries, batch_size=50, max_retries=2):
+    """Search for several queries using batched requests.
+
+    Cached queries are answered locally; the rest are sent through the batch
+    endpoint. With ranking enabled, the candidates of every query (cached
+    or fresh) are re-ranked together in one vectorized pass, and durations
+    are fetched 50 videos per call. Returns a dict mapping each query to its
+    video ID (or None).
+    """
+    category_id = config.get("video_category_id", "10")
+    cache = get_search_cache()
+    ranking, max_results, with_duration, weights = get_ranking_settings()
+    results = {}
+    requests = {}
+    candidates = {}
+    for query in queries:
+        if query in results or query in requests or query in candidates:
+            continue
+        if cache is not None:
+            cached = cache.get(query, category_id)
+            if cached is not MISS:
+                results[query] = cached
+                continue
+        if ranking:
+            cached = _cached_candidates(cache, query, category_id)
+            if cached is not MISS:
+                candidates[query] = cached
+                continue
+        requests[query] = _search_request(
+            youtube, query, category_id, max_results if ranking else 1
+        )
+
+    responses, errors = execute_batch(
+        youtube, requests, "search.list", batch_size, max_retries
+    )
+    if ranking:
+        fresh = {query: candidates_from_search(response) for query, response in responses.items()}
+        if with_duration and fresh:
+            durations = fetch_durations(
+                youtube, [c.video_id for found in fresh.values() for c in found]
+            )
+            fresh = {query: with_durations(found, durations) for query, found in fresh.items()}
+        if cache is not None:
+            for query, found in fresh.items():
+                cache.set_candidates(query, category_id, found)
+        candidates.update(fresh)
+        rejected = cache.rejected() if cache is not None else ()
+        chosen = best_candidates(list(candidates), list(candidates.values()), rejected, weights)
+        found_ids = dict(zip(candidates, chosen))
+    else:
+        found_ids = {}
+        for query, response in responses.items():
+            items = response.get("items", [])
+            found_ids[query] = items[0]["id"]["videoId"] if items else None
+    for query, video_id in found_ids.items():
+        results[query] = video_id
+        if video_id is None:
+            logger.debug("No results found for '%s'.", query)
+            # Candidates that were all rejected are not a "no results" answer.
+            if ranking and candidates[query]:
+                continue
+        if cache is not None:
+            cache.set(query, category_id, video_id)
+    for query, error in errors.items():
+        logger.error(f"An HTTP error occurred while searching for '{query}': {error}")
+        record_failure("search.list", query, error)
+        results[query] = None
+    return results
+
+
+def add_videos_to_playlist(youtube, video_ids, playlist_id, batch_size=50, max_retries=2):
+    """Add several videos to a playlist using batched requests.
+
+    Returns the list of video IDs that were added successfully.
+    """
+    requests = {
+        video_id: youtube.playlistItems().insert(
+            part="snippet",
+            body={
+                "snippet": {
+                    "playlistId": playlist_id,
+                    "resourceId": {"kind": "youtube#video", "videoId": video_id},
+                }
+            },
+        )
+        for video_id in video_ids
+    }
+    responses, errors = execute_batch(
+        youtube, requests, "playlistItems.insert", batch_size, max_retries
+    )
+    for video_id, error in errors.items():
+        logger.error(f"An HTTP error occurred while adding video ID {video_id}: {error}")
+        record_failure("playlistItems.insert", f"{playlist_id}/{video_id}", error)
+    added = [video_id for video_id in video_ids if video_id in responses]
+    mirror = get_playlist_mirror()
+    if mirror is not None:
+        for video_id in added:
+            mirror.record_video(playlist_id, video_id)
+    logger.info(f"Added {len(added)} videos to playlist ID {playlist_id} in batches.")
+    return added
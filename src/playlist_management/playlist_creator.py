@@ -1,6 +1,9 @@
 from googleapiclient.errors import HttpError
 from config import config
 from logger import logger
+from playlist_management.playlist_mirror import get_playlist_mirror
+from playlist_management.request_executor import execute_request
+from utils.retry import record_failure
 
 
 def create_playlist(youtube, title, description=""):
@@ -22,13 +25,17 @@ def create_playlist(youtube, title, description=""):
                 },
             },
         )
-        response = request.execute()
+        response = execute_request(request, "playlists.insert")
         logger.info(
             f"Created playlist: {response['snippet']['title']} (ID: {response['id']})"
         )
+        mirror = get_playlist_mirror()
+        if mirror is not None:
+            mirror.record_playlist(response["id"])
         return response["id"]
     except HttpError as e:
         logger.error(f"An HTTP error occurred while creating playlist '{title}': {e}")
+        record_failure("playlists.insert", title, e)
         return None
 
 
@@ -36,13 +43,16 @@ def get_existing_playlists(youtube):
     """Retrieve a dictionary of existing playlists with playlist names as keys and IDs as values."""
     playlists = {}
     try:
+        mirror = get_playlist_mirror()
+        if mirror is not None:
+            return mirror.sync_playlists(youtube)
         request = youtube.playlists().list(
             part="snippet",
             mine=True,
             maxResults=50,  # Adjust as needed; YouTube API allows up to 50 per request
         )
         while request:
-            response = request.execute()
+            response = execute_request(request, "playlists.list")
             for item in response.get("items", []):
                 name = item["snippet"]["title"]
                 pid = item["id"]
@@ -53,4 +63,5 @@ def get_existing_playlists(youtube):
         logger.debug(f"Retrieved {len(playlists)} existing playlists.")
     except HttpError as e:
         logger.error(f"An HTTP error occurred while retrieving existing playlists: {e}")
+        record_failure("playlists.list", "mine", e)
     return playlists
@@ -0,0 +1,303 @@
+import json
+import os
+import threading
+
+from googleapiclient.errors import HttpError
+from config import config
+from logger import logger
+from playlist_management.request_executor import execute_request
+from utils.job_model import VideoSet
+
+
+def is_not_modified(error):
+    return getattr(getattr(error, "resp", None), "status", None) == 304
+
+
+class PlaylistMirror:
+    """Persistent local copy of the account's playlists and their video IDs.
+
+    Playlist list pages are revalidated with ``If-None-Match`` against their
+    stored ETags. A playlist's items are only listed again when the playlist
+    resource's ETag has changed since they were mirrored, so unchanged
+    playlists cost no ``playlistItems.list`` calls at all. Video IDs are kept
+    as sets for O(1) membership checks.
+
+    Changes are kept in memory and only marked dirty; save() writes the
+    file once, at the end of the run.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.pages = []  # [{"etag", "next_page_token", "playlists": [...]}]
+        # playlist_id -> {"etag", "item_count", "video_ids": VideoSet}; item_count counts
+        # playlist items, so a video that is in a playlist twice is counted twice.
+        self.items = {}
+        self._changed = set()  # Playlists this run added videos to or removed them from
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable playlist mirror '{self.path}': {e}")
+            return
+        self.pages = data.get("pages", [])
+        self.items = {
+            playlist_id: {**entry, "video_ids": VideoSet(entry.get("video_ids", []))}
+            for playlist_id, entry in data.get("items", {}).items()
+        }
+
+    def save(self):
+        """Write the mirror to disk if anything changed since it was loaded or last saved."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            # Serialized under the lock, so the file is a consistent snapshot.
+            text = json.dumps(
+                {
+                    "pages": self.pages,
+                    "items": {
+                        playlist_id: {**entry, "video_ids": sorted(entry["video_ids"])}
+                        for playlist_id, entry in self.items.items()
+                    },
+                },
+                ensure_ascii=False,
+            )
+            self._dirty = False
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(tmp_path, self.path)
+
+    def _playlist_resource(self, playlist_id):
+        for page in self.pages:
+            for playlist in page["playlists"]:
+                if playlist["id"] == playlist_id:
+                    return playlist
+        return None
+
+    def sync_playlists(self, youtube):
+        """Revalidate the playlist list and return {lowercase title: playlist ID}."""
+        pages = []
+        request = youtube.playlists().list(
+            part="snippet,contentDetails", mine=True, maxResults=50
+        )
+        while request:
+            cached = self.cached_page(len(pages))
+            if cached is not None and cached.get("etag"):
+                request.headers["If-None-Match"] = cached["etag"]
+            try:
+                response = execute_request(request, "playlists.list")
+                page = self.page_from_response(response)
+            except HttpError as e:
+                if not is_not_modified(e):
+                    raise
+                page = cached
+                response = {"nextPageToken": cached.get("next_page_token")}
+            pages.append(page)
+            request = youtube.playlists().list_next(request, response)
+        return self.replace_pages(pages)
+
+    def cached_page(self, index):
+        """Return the mirrored playlist list page at ``index``, or None."""
+        return self.pages[index] if index < len(self.pages) else None
+
+    @staticmethod
+    def page_from_response(response):
+        """Convert a ``playlists.list`` response into a mirrored page."""
+        return {
+            "etag": response.get("etag"),
+            "next_page_token": response.get("nextPageToken"),
+            "playlists": [
+                {
+                    "id": item["id"],
+                    "title": item["snippet"]["title"],
+                    "etag": item.get("etag"),
+                    "item_count": item.get("contentDetails", {}).get("itemCount"),
+                }
+                for item in response.get("items", [])
+            ],
+        }
+
+    def replace_pages(self, pages):
+        """Store freshly revalidated pages and return {lowercase title: playlist ID}."""
+        with self._lock:
+            self.pages = pages
+            known = {playlist["id"] for page in pages for playlist in page["playlists"]}
+            for playlist_id in list(self.items):
+                if playlist_id not in known:
+                    del self.items[playlist_id]
+            self._dirty = True
+        playlists = {
+            playlist["title"].lower(): playlist["id"]
+            for page in pages
+            for playlist in page["playlists"]
+        }
+        logger.debug(f"Synced {len(playlists)} playlists with the local mirror.")
+        return playlists
+
+    def is_fresh(self, playlist_id):
+        """Return True if the mirrored items of a playlist are known to be current.
+
+        Any ETag change means the playlist changed. Our own inserts change it
+        too; refresh_changed() reads the new ETag back after them.
+        """
+        entry = self.items.get(playlist_id)
+        if entry is None:
+            return False
+        resource = self._playlist_resource(playlist_id)
+        if resource is None:
+            # Created during this run; everything in it was added by us.
+            return entry.get("etag") is None
+        return entry.get("etag") is not None and entry.get("etag") == resource.get("etag")
+
+    def get_video_ids(self, youtube, playlist_id):
+        """Return the set of video IDs in a playlist, listing it only if it changed."""
+        if self.is_fresh(playlist_id):
+            logger.debug(f"Playlist ID {playlist_id} unchanged; using mirrored items.")
+            return self.items[playlist_id]["video_ids"]
+
+        video_ids = set()
+        item_count = 0
+        request = youtube.playlistItems().list(
+            part="snippet", playlistId=playlist_id, maxResults=50
+        )
+        while request:
+            response = execute_request(request, "playlistItems.list")
+            for item in response.get("items", []):
+                video_ids.add(item["snippet"]["resourceId"]["videoId"])
+                item_count += 1
+            request = youtube.playlistItems().list_next(request, response)
+        return self.store_video_ids(playlist_id, video_ids, item_count)
+
+    def store_video_ids(self, playlist_id, video_ids, item_count):
+        """Store a freshly listed set of video IDs for a playlist and return it.
+
+        Args:
+            playlist_id (str): The playlist that was listed.
+            video_ids (set): The distinct video IDs in it.
+            item_count (int): How many items the listing returned, duplicates included.
+        """
+        resource = self._playlist_resource(playlist_id) or {}
+        with self._lock:
+            self.items[playlist_id] = {
+                "etag": resource.get("etag"),
+                "item_count": item_count,
+                "video_ids": VideoSet(video_ids),
+            }
+            video_ids = self.items[playlist_id]["video_ids"]
+            self._dirty = True
+        return video_ids
+
+    def update_items(self, entries):
+        """Take over the mirrored items of playlists processed by another process."""
+        with self._lock:
+            self.items.update(entries)
+            self._changed.update(entries)
+            self._dirty = True
+
+    def record_playlist(self, playlist_id):
+        """Record a playlist created during this run (it starts out empty)."""
+        with self._lock:
+            self.items[playlist_id] = {"etag": None, "item_count": 0, "video_ids": VideoSet()}
+            self._changed.add(playlist_id)
+            self._dirty = True
+
+    def record_video(self, playlist_id, video_id):
+        """Record a video added to a playlist during this run."""
+        with self._lock:
+            entry = self.items.get(playlist_id)
+            if entry is not None:
+                entry["video_ids"].add(video_id)
+                if entry.get("item_count") is not None:
+                    entry["item_count"] += 1
+                self._changed.add(playlist_id)
+                self._dirty = True
+
+    def forget_videos(self, playlist_id, video_ids, removed_items):
+        """Drop videos removed from a playlist during this run.
+
+        Args:
+            playlist_id (str): The playlist the items were removed from.
+            video_ids (set): Videos no longer in the playlist at all.
+            removed_items (int): How many playlist items were removed,
+                including extra copies of videos that are still in it.
+        """
+        with self._lock:
+            entry = self.items.get(playlist_id)
+            if entry is not None:
+                entry["video_ids"] -= video_ids
+                if entry.get("item_count") is not None:
+                    entry["item_count"] -= removed_items
+                self._changed.add(playlist_id)
+                self._dirty = True
+
+    def refresh_changed(self, youtube):
+        """Store the current ETag and item count of the playlists changed in this run.
+
+        Reading them back right after our own changes lets the next run
+        reuse the mirrored items; a change made by anyone afterwards still
+        shows up as another ETag. A playlist whose item count disagrees with
+        the mirror (or that cannot be read) is dropped and listed again.
+        """
+        with self._lock:
+            changed, self._changed = sorted(self._changed), set()
+        for start in range(0, len(changed), 50):
+            playlist_ids = changed[start : start + 50]
+            request = youtube.playlists().list(
+                part="contentDetails", id=",".join(playlist_ids), maxResults=50
+            )
+            try:
+                response = execute_request(request, "playlists.list")
+            except HttpError as e:
+                logger.warning(f"Could not refresh the mirrored playlists: {e}")
+                response = {}
+            resources = {item["id"]: item for item in response.get("items", [])}
+            with self._lock:
+                for playlist_id in playlist_ids:
+                    self._refresh_entry(playlist_id, resources.get(playlist_id))
+                self._dirty = True
+        self.save()
+
+    def _refresh_entry(self, playlist_id, resource):
+        entry = self.items.get(playlist_id)
+        if entry is None:
+            return
+        item_count = (resource or {}).get("contentDetails", {}).get("itemCount")
+        if item_count is None or item_count != entry.get("item_count"):
+            del self.items[playlist_id]
+            return
+        entry["etag"] = resource.get("etag")
+        entry["item_count"] = item_count
+        for page in self.pages:
+            for playlist in page["playlists"]:
+                if playlist["id"] == playlist_id:
+                    playlist["etag"], playlist["item_count"] = entry["etag"], item_count
+                    # The page changed with the playlist; fetch it in full next time.
+                    page["etag"] = None
+
+
+_playlist_mirror = None
+
+
+def get_playlist_mirror():
+    """Return the shared playlist mirror configured in config.yaml, or None if disabled."""
+    global _playlist_mirror
+    mirror_config = config.get("playlist_mirror", {}) or {}
+    if not mirror_config.get("enabled", False):
+        return None
+    if _playlist_mirror is None:
+        _playlist_mirror = PlaylistMirror(
+            mirror_config.get("path", os.path.join(".cache", "playlist_mirror.json"))
+        )
+    return _playlist_mirror
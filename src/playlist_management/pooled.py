@@ -0,0 +1,88 @@
+from authentication.credential_pool import get_credential_pool
+from logger import logger
+from playlist_management import async_client
+from playlist_management.playlist_creator import create_playlist
+from utils.quota import use_ledger
+
+
+def _playlist_description(playlist_name):
+    return f"Uploaded via Python script from CSV. Playlist: {playlist_name}"
+
+
+def _existing_playlist_id(playlist_name, existing_playlists):
+    """Return the ID of an existing playlist, or None if it has to be created."""
+    playlist_id = existing_playlists.get(playlist_name.lower())
+    if playlist_id:
+        logger.info(
+            f" - Playlist exists with ID: {playlist_id}. Adding songs to existing playlist."
+        )
+    else:
+        logger.info(" - Playlist does not exist. Creating new playlist.")
+    return playlist_id
+
+
+def _playlist_created(playlist_name, existing_playlists, playlist_id):
+    """Remember a newly created playlist; return its ID, or None if creating it failed."""
+    if not playlist_id:
+        logger.error(f"   * Failed to create playlist '{playlist_name}'. Skipping.")
+        return None
+    logger.info(f"   * Created playlist '{playlist_name}' with ID: {playlist_id}")
+    existing_playlists[playlist_name.lower()] = playlist_id
+    return playlist_id
+
+
+def get_or_create_playlist(youtube, playlist_name, existing_playlists):
+    playlist_id = _existing_playlist_id(playlist_name, existing_playlists)
+    if playlist_id:
+        return playlist_id
+    playlist_id = create_playlist(youtube, playlist_name, _playlist_description(playlist_name))
+    return _playlist_created(playlist_name, existing_playlists, playlist_id)
+
+
+async def get_or_create_playlist_async(client, playlist_name, existing_playlists):
+    """Coroutine form of get_or_create_playlist."""
+    playlist_id = _existing_playlist_id(playlist_name, existing_playlists)
+    if playlist_id:
+        return playlist_id
+    playlist_id = await async_client.create_playlist(
+        client, playlist_name, _playlist_description(playlist_name)
+    )
+    return _playlist_created(playlist_name, existing_playlists, playlist_id)
+
+
+def pooled_call(youtube, method, func):
+    """Return ``func(service)``, run on the credential pool when it is enabled.
+
+    Without a pool ``service`` is ``youtube``. With one it is the service
+    of the member with the most quota left for ``method``, and the call is
+    charged to (and fails over between) the members' ledgers.
+    """
+    pool = get_credential_pool()
+    if pool is None:
+        return func(youtube)
+    return pool.call(method, lambda member: func(member.youtube))
+
+
+async def pooled_call_async(client, method, func):
+    """Coroutine form of pooled_call; ``func(client)`` returns an awaitable."""
+    pool = get_credential_pool()
+    if pool is None:
+        return await func(client)
+    return await pool.call_async(method, lambda member: func(member.client or client))
+
+
+def pooled_batches(youtube, method, items, func):
+    """Return ``[func(service, part), ...]`` for batch requests over ``items``.
+
+    Without a credential pool this is ``[func(youtube, items)]``; with one
+    the items are shared out by the members' remaining quota and each part
+    is charged to its member's ledger.
+    """
+    pool = get_credential_pool()
+    if pool is None:
+        return [func(youtube, items)]
+    results = []
+    for member, part in pool.split(method, items):
+        with use_ledger(member.ledger):
+            results.append(func(member.youtube, part))
+    return results
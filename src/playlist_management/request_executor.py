@@ -0,0 +1,207 @@
+import email.utils
+import time
+
+from googleapiclient.errors import HttpError
+from logger import logger
+from utils.lazy_import import LazyImport
+from utils.metrics import get_metrics
+from utils.quota import QUOTA_COSTS, QuotaExhausted, get_quota_ledger
+from utils.rate_limiter import get_rate_limiter
+from utils.retry import (
+    PERMANENT,
+    QUOTA,
+    RETRYABLE,
+    get_circuit_breaker,
+    get_retry_policy,
+)
+
+httplib2 = LazyImport("httplib2")
+
+# Error reasons the API uses when the project's daily quota is used up.
+QUOTA_EXCEEDED_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+# Short-term throttling and backend hiccups that succeed when retried later.
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RETRYABLE_REASONS = {
+    "rateLimitExceeded",
+    "userRateLimitExceeded",
+    "backendError",
+    "internalError",
+    "SERVICE_UNAVAILABLE",
+}
+
+
+class NetworkError(HttpError):
+    """A network failure (connection, DNS, timeout) that outlasted the retries.
+
+    It is an HttpError with status 0, so the callers that log and record
+    failed calls handle it too instead of it ending the run.
+    """
+
+    def __init__(self, error, uri=None):
+        super().__init__(httplib2.Response({"status": 0}), str(error).encode("utf-8"), uri=uri)
+        self.error = error
+
+    def __repr__(self):
+        return f"<NetworkError {type(self.error).__name__}: {self.error}>"
+
+    __str__ = __repr__
+
+
+def is_network_error(error):
+    """Return True for transport failures that are worth retrying."""
+    return isinstance(error, (OSError, TimeoutError, httplib2.HttpLib2Error))
+
+
+def is_quota_exceeded(error):
+    """Return True if an HttpError reports that the daily quota is exhausted."""
+    if getattr(getattr(error, "resp", None), "status", None) != 403:
+        return False
+    try:
+        details = error.error_details or []
+    except AttributeError:
+        details = []
+    if any(
+        isinstance(detail, dict) and detail.get("reason") in QUOTA_EXCEEDED_REASONS
+        for detail in details
+    ):
+        return True
+    content = getattr(error, "content", b"") or b""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", errors="replace")
+    return any(reason in content for reason in QUOTA_EXCEEDED_REASONS)
+
+
+def _error_reasons(error):
+    try:
+        details = error.error_details or []
+    except AttributeError:
+        details = []
+    reasons = {detail.get("reason") for detail in details if isinstance(detail, dict)}
+    content = getattr(error, "content", b"") or b""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", errors="replace")
+    if isinstance(content, str):
+        reasons.update(reason for reason in RETRYABLE_REASONS if reason in content)
+    return reasons
+
+
+def classify_error(error):
+    """Classify a failed call as RETRYABLE, QUOTA or PERMANENT.
+
+    Rate limiting (429, ``rateLimitExceeded`` 403s), server errors and
+    network errors are retryable; an exhausted daily quota is reported
+    separately so the run can stop; everything else (bad requests, missing
+    resources, permissions) is permanent.
+    """
+    if not isinstance(error, HttpError):
+        return RETRYABLE if is_network_error(error) else PERMANENT
+    if is_quota_exceeded(error):
+        return QUOTA
+    try:
+        status = int(getattr(error.resp, "status", 0))
+    except (TypeError, ValueError):
+        status = 0
+    if status in RETRYABLE_STATUSES:
+        return RETRYABLE
+    if status in (403, 409) and _error_reasons(error) & RETRYABLE_REASONS:
+        return RETRYABLE
+    return PERMANENT
+
+
+def retry_after(error):
+    """Return the ``Retry-After`` of an HttpError in seconds, or None."""
+    resp = getattr(error, "resp", None)
+    try:
+        value = resp.get("retry-after") if resp is not None else None
+    except (AttributeError, TypeError):
+        return None
+    if not isinstance(value, (str, bytes, int, float)):
+        return None
+    if isinstance(value, bytes):
+        value = value.decode("ascii", errors="replace")
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def record_call(method, seconds, outcome="success"):
+    """Record an API call's latency, outcome and quota cost in the shared metrics.
+
+    Args:
+        method (str): API method name, e.g. "search.list".
+        seconds (float): Wall time of the call.
+        outcome (str): "success", or the RETRYABLE/QUOTA/PERMANENT error class.
+    """
+    metrics = get_metrics()
+    metrics.observe("youtube_api_request_seconds", seconds, method=method)
+    metrics.inc("youtube_api_requests_total", method=method, outcome=outcome)
+    metrics.inc("youtube_quota_units_total", QUOTA_COSTS.get(method, 0), method=method)
+    elapsed = metrics.mark_first_call()
+    if elapsed is not None:
+        logger.info(f"First API call completed {elapsed:.2f}s after start.")
+
+
+def execute_request(request, method, http=None):
+    """Execute a single API request under the quota ledger, rate limiter and retry policy.
+
+    Retryable failures are retried with full-jitter exponential backoff
+    (honouring ``Retry-After``) up to ``retry.max_attempts`` times, and every
+    call waits while the shared circuit breaker is open.
+
+    Args:
+        request: An unexecuted googleapiclient request.
+        method (str): API method name used for quota accounting, e.g. "search.list".
+        http: Optional transport to execute the request over.
+
+    Returns:
+        dict: The API response.
+
+    Raises:
+        HttpError: If the call fails permanently or runs out of retries; a
+            network failure that runs out of retries is raised as a
+            NetworkError.
+        QuotaExhausted: If the call would exceed the daily budget, or the API
+            reports that the quota is exhausted.
+    """
+    ledger = get_quota_ledger()
+    policy = get_retry_policy()
+    breaker = get_circuit_breaker()
+    attempt = 1
+    while True:
+        breaker.wait()
+        ledger.charge(method)
+        get_rate_limiter().acquire()
+        start = time.perf_counter()
+        try:
+            response = request.execute(http=http)
+        except (HttpError, OSError, httplib2.HttpLib2Error) as e:
+            kind = classify_error(e)
+            record_call(method, time.perf_counter() - start, kind)
+            if kind == QUOTA:
+                ledger.mark_exhausted()
+                logger.error(f"YouTube API reported the daily quota as exceeded during {method}.")
+                raise QuotaExhausted(f"API quota exceeded during {method}.") from e
+            if kind == PERMANENT:
+                raise
+            breaker.record_failure()
+            if attempt >= policy.max_attempts:
+                if isinstance(e, HttpError):
+                    raise
+                raise NetworkError(e, uri=getattr(request, "uri", None)) from e
+            delay = policy.delay(attempt, retry_after(e))
+            logger.warning(
+                f"{method} failed ({e}); retry {attempt} of {policy.max_attempts - 1} "
+                f"in {delay:.1f}s."
+            )
+            policy.sleep(delay)
+            attempt += 1
+            continue
+        record_call(method, time.perf_counter() - start)
+        breaker.record_success()
+        return response
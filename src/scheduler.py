@@ -0,0 +1,141 @@
+from collections import Counter
+
+from config import config
+from logger import logger
+from utils.query_normalizer import canonical_query
+from utils.quota import QUOTA_COSTS
+
+OBJECTIVES = ("songs", "playlists")
+
+SEARCH_COST = QUOTA_COSTS["search.list"]
+INSERT_COST = QUOTA_COSTS["playlistItems.insert"]
+CREATE_COST = QUOTA_COSTS["playlists.insert"]
+
+
+def get_scheduler_settings():
+    """Return (enabled, objective, slice_size) from the ``scheduler`` config section."""
+    scheduler_config = config.get("scheduler", {}) or {}
+    objective = scheduler_config.get("objective", "songs")
+    if objective not in OBJECTIVES:
+        logger.warning(f"Unknown scheduler objective '{objective}'; using 'songs'.")
+        objective = "songs"
+    return (
+        bool(scheduler_config.get("enabled", False)),
+        objective,
+        max(1, int(scheduler_config.get("slice_size", 25))),
+    )
+
+
+def playlist_cost(name, songs, existing_playlists, is_resolved, searched=()):
+    """Estimate the quota units needed to upload ``songs`` to a playlist in full.
+
+    Songs that need no search cost one insert; the others also cost a
+    search, once per canonical query not in ``searched``. A playlist that
+    does not exist yet costs its creation.
+    """
+    cost = 0 if name.lower() in existing_playlists else CREATE_COST
+    queries = set(searched)
+    for song in songs:
+        cost += INSERT_COST
+        if not is_resolved(song):
+            query = canonical_query(song.query)
+            if query not in queries:
+                queries.add(query)
+                cost += SEARCH_COST
+    return cost
+
+
+def _round_robin(playlists, slice_size):
+    """Yield ``(name, songs)`` slices taking turns between playlists, smallest first."""
+    queues = sorted(playlists.items(), key=lambda item: len(item[1]))
+    offset = 0
+    while queues:
+        remaining = []
+        for name, songs in queues:
+            yield name, songs[offset : offset + slice_size]
+            if len(songs) > offset + slice_size:
+                remaining.append((name, songs))
+        queues = remaining
+        offset += slice_size
+
+
+def schedule_playlists(
+    playlists, existing_playlists, is_resolved, objective="songs", budget=None, slice_size=25
+):
+    """Order playlist work so a run cut short by the quota leaves the most done.
+
+    The work is split into ``(name, songs)`` chunks, in this order:
+
+    1. Songs that need no search (cached, indexed or already resolved) in
+       existing playlists: one insert each.
+    2. The same for playlists to create; a playlist with no such songs is
+       created with its first chunk below, so no empty playlists are left.
+    3. With ``objective="playlists"``, whole playlists, cheapest first, as
+       long as they fit in ``budget`` (all of them when it is None).
+       With ``objective="songs"``, songs whose search is shared by several
+       playlists, since one search serves them all.
+    4. Everything else in ``slice_size`` slices, round-robin between the
+       playlists.
+
+    Songs keep their CSV order within each step.
+
+    Args:
+        playlists (dict): Playlist name -> pending Tracks.
+        existing_playlists (dict): Lowercase playlist name -> playlist ID.
+        is_resolved (callable): Returns True for a Track that needs no search.
+        objective (str): "songs" (most songs added) or "playlists" (most
+            playlists completed).
+        budget (int): Quota units left, or None for no limit.
+        slice_size (int): Songs per playlist per round-robin turn.
+
+    Returns:
+        list: ``(name, songs)`` chunks in the order to process them.
+    """
+    chunks = []
+    pending = {}
+    for name, songs in playlists.items():
+        resolved = [song for song in songs if is_resolved(song)]
+        if resolved:
+            chunks.append((name, resolved))
+        pending[name] = [song for song in songs if not is_resolved(song)]
+    # Existing playlists first; a stable sort keeps the CSV order otherwise.
+    chunks.sort(key=lambda chunk: chunk[0].lower() not in existing_playlists)
+    spent = sum(
+        playlist_cost(name, songs, existing_playlists, is_resolved) for name, songs in chunks
+    )
+    started = {name.lower() for name, _ in chunks} | set(existing_playlists)
+    searched = set()
+
+    if objective == "playlists":
+        by_cost = sorted(
+            (playlist_cost(name, songs, started, is_resolved), name)
+            for name, songs in pending.items()
+            if songs
+        )
+        for _, name in by_cost:
+            songs = pending[name]
+            # Searches made for an earlier playlist in this step are free here.
+            cost = playlist_cost(name, songs, started, is_resolved, searched)
+            if budget is not None and spent + cost > budget:
+                continue
+            chunks.append((name, songs))
+            del pending[name]
+            spent += cost
+            searched.update(canonical_query(song.query) for song in songs)
+    else:
+        counts = Counter(
+            canonical_query(song.query) for songs in pending.values() for song in songs
+        )
+        for name, songs in list(pending.items()):
+            shared = [song for song in songs if counts[canonical_query(song.query)] > 1]
+            if shared:
+                chunks.append((name, shared))
+                pending[name] = [
+                    song for song in songs if counts[canonical_query(song.query)] == 1
+                ]
+
+    chunks.extend(
+        _round_robin({name: songs for name, songs in pending.items() if songs}, slice_size)
+    )
+    logger.debug(f"Scheduled {len(chunks)} chunks for the '{objective}' objective.")
+    return chunks
@@ -0,0 +1,133 @@
+import csv
+import queue
+import threading
+
+from logger import logger
+from utils.job_model import intern_text
+from utils.track import Track, clean_identifier
+
+_DONE = object()
+
+
+class MissingColumnsError(ValueError):
+    """Raised when the CSV header lacks required columns."""
+
+    def __init__(self, missing):
+        super().__init__(f"CSV file is missing the following required columns: {missing}")
+        self.missing = missing
+
+
+def iter_playlist_chunks(
+    file_path,
+    encoding,
+    track_col,
+    artist_col,
+    playlist_col,
+    chunk_size=500,
+    max_buffered_rows=10000,
+    isrc_col=None,
+    spotify_col=None,
+):
+    """Stream a playlist CSV and yield ``(playlist_name, tracks)`` chunks.
+
+    Rows are normalized the same way as ``parse_playlist_csv`` and buffered
+    per playlist. A playlist's buffer is yielded when it reaches
+    ``chunk_size`` songs or when the next row belongs to another playlist
+    (so files sorted by playlist stream one playlist at a time). If more than
+    ``max_buffered_rows`` rows are buffered in total, the largest buffer is
+    yielded early. The same playlist may therefore be yielded more than once.
+    Tracks carry the ISRC and Spotify ID from ``isrc_col``/``spotify_col``
+    when those columns exist.
+    """
+    buffers = {}
+    buffered = 0
+    previous = None
+    with open(file_path, "r", encoding=encoding, newline="") as file:
+        reader = csv.DictReader(file)
+        fieldnames = reader.fieldnames or []
+        missing = [col for col in (track_col, artist_col, playlist_col) if col not in fieldnames]
+        if missing:
+            raise MissingColumnsError(missing)
+        for row in reader:
+            if None in row:
+                # Too many fields on this line; skip it like pandas on_bad_lines="skip".
+                continue
+            playlist = (row.get(playlist_col) or "").strip()
+            track = (row.get(track_col) or "").strip()
+            artist = (row.get(artist_col) or "").strip()
+            if not (playlist and track and artist):
+                continue
+            playlist = intern_text(playlist.title())
+            if previous is not None and playlist != previous and previous in buffers:
+                songs = buffers.pop(previous)
+                buffered -= len(songs)
+                yield previous, songs
+            previous = playlist
+
+            songs = buffers.setdefault(playlist, [])
+            songs.append(
+                Track(
+                    intern_text(f"{track} {artist.title()}"),
+                    clean_identifier(row.get(isrc_col), upper=True) if isrc_col else None,
+                    clean_identifier(row.get(spotify_col)) if spotify_col else None,
+                )
+            )
+            buffered += 1
+            if len(songs) >= chunk_size:
+                buffered -= len(songs)
+                yield playlist, buffers.pop(playlist)
+            elif buffered > max_buffered_rows:
+                largest = max(buffers, key=lambda name: len(buffers[name]))
+                buffered -= len(buffers[largest])
+                yield largest, buffers.pop(largest)
+    for playlist, songs in buffers.items():
+        yield playlist, songs
+
+
+def prefetch(iterable, max_pending=4):
+    """Consume ``iterable`` on a background thread, keeping at most ``max_pending`` items queued.
+
+    The consumer can start on the first item while the producer is still
+    reading; exceptions raised by the producer are re-raised to the consumer.
+    """
+    items = queue.Queue(maxsize=max(1, max_pending))
+    stop = threading.Event()
+
+    def put(item):
+        """Queue ``item`` unless the consumer stops first; returns whether it was queued."""
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:  # Hand the error over to the consumer.
+            put(e)
+
+    thread = threading.Thread(target=produce, name="csv-reader", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # Free any queued items; the producer gives up within one put timeout.
+        while True:
+            try:
+                items.get_nowait()
+            except queue.Empty:
+                break
+        logger.debug("CSV reader thread stopped.")
@@ -1,27 +1,145 @@
-import chardet
+import codecs
+import json
+import os
 from config import config
 from logger import logger  # Import the logger
+from utils.lazy_import import LazyImport
+
+chardet = LazyImport("chardet")
+
+# Byte order marks, longest first so UTF-32 LE is not mistaken for UTF-16 LE.
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+CHUNK_SIZE = 1 << 20  # 1 MiB
+
+
+def _sniff_bom(head):
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    return None
+
+
+def _fingerprint(file_path):
+    """Return a (path, size, mtime) key for the file, or None if it cannot be stat'ed."""
+    try:
+        stat = os.stat(file_path)
+    except (OSError, TypeError, ValueError):
+        return None
+    return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+
+def _cache_path():
+    cache_config = config.get("encoding_cache", {}) or {}
+    if not cache_config.get("enabled", False):
+        return None
+    return cache_config.get("path", os.path.join(".cache", "encoding_cache.json"))
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _cached_encoding(fingerprint):
+    cache_path = _cache_path()
+    if cache_path is None or fingerprint is None:
+        return None
+    path, size, mtime_ns = fingerprint
+    entry = _load_cache(cache_path).get(path)
+    if entry and entry.get("size") == size and entry.get("mtime_ns") == mtime_ns:
+        return entry.get("encoding")
+    return None
+
+
+def _store_encoding(fingerprint, encoding):
+    cache_path = _cache_path()
+    if cache_path is None or fingerprint is None or encoding is None:
+        return
+    path, size, mtime_ns = fingerprint
+    cache = _load_cache(cache_path)
+    cache[path] = {"size": size, "mtime_ns": mtime_ns, "encoding": encoding}
+    try:
+        directory = os.path.dirname(cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(cache_path, "w", encoding="utf-8") as file:
+            json.dump(cache, file, indent=2)
+    except OSError as e:
+        logger.debug(f"Could not write encoding cache '{cache_path}': {e}")
 
 
 def detect_file_encoding(file_path=None, num_bytes=10000):
-    """Detect the encoding of a file using chardet.
+    """Detect the encoding of a file.
+
+    Detection is layered, cheapest first:
+
+    1. A byte order mark decides the encoding outright.
+    2. The whole file is validated as UTF-8 incrementally, so files that
+       only contain non-ASCII text far from the start are still recognised.
+    3. Only if the file is not valid UTF-8 (or is empty) is chardet run on
+       a sample.
+
+    Results are cached by (path, size, mtime) when ``encoding_cache`` is
+    enabled in config.yaml, so unchanged files skip detection entirely.
 
     Args:
         file_path (str, optional): Path to the file. Defaults to the playlist file from config.
-        num_bytes (int, optional): Number of bytes to read for detection. Defaults to 10000.
+        num_bytes (int, optional): Number of bytes given to chardet. Defaults to 10000.
 
     Returns:
         str: Detected encoding.
     """
     if file_path is None:
         file_path = config.get("playlist_file", "data/playlist.csv")
+    fingerprint = _fingerprint(file_path)
+    cached = _cached_encoding(fingerprint)
+    if cached is not None:
+        logger.debug(f"Using cached encoding {cached} for '{file_path}'.")
+        return cached
     try:
         with open(file_path, "rb") as f:
-            raw_data = f.read(num_bytes)
-        result = chardet.detect(raw_data)
-        encoding = result["encoding"]
-        confidence = result["confidence"]
-        logger.info(f"Detected encoding: {encoding} with confidence {confidence}")
+            head = f.read(CHUNK_SIZE)
+            encoding = _sniff_bom(head)
+            if encoding is not None:
+                logger.info(f"Detected encoding: {encoding} from byte order mark")
+                _store_encoding(fingerprint, encoding)
+                return encoding
+
+            sample = head[:num_bytes]
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            chunk = head
+            valid_utf8 = bool(head)
+            try:
+                while chunk:
+                    decoder.decode(chunk)
+                    chunk = f.read(CHUNK_SIZE)
+                decoder.decode(b"", final=True)
+            except UnicodeDecodeError as e:
+                valid_utf8 = False
+                # Make sure chardet sees the bytes that broke UTF-8 decoding.
+                if chunk is not head or e.start >= len(sample):
+                    start = max(0, e.start - num_bytes // 2)
+                    sample += e.object[start : e.start + num_bytes // 2]
+
+        if valid_utf8:
+            encoding = "utf-8"
+            logger.info("Detected encoding: utf-8 (validated whole file)")
+        else:
+            result = chardet.detect(sample)
+            encoding = result["encoding"]
+            confidence = result["confidence"]
+            logger.info(f"Detected encoding: {encoding} with confidence {confidence}")
+        _store_encoding(fingerprint, encoding)
         return encoding
     except Exception as e:
         logger.error(f"Error detecting file encoding for '{file_path}': {e}")
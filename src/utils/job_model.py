@@ -0,0 +1,113 @@
+import sys
+import threading
+from collections.abc import MutableSet
+
+# Song outcomes, stored as their index in this tuple.
+STATUSES = ("searched", "added", "exists", "not_found", "failed", "rejected")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+STATUS_BITS = 3
+
+
+def intern_text(value):
+    """Return the interned copy of a string, so repeated names share one object."""
+    return sys.intern(value) if type(value) is str else value
+
+
+class VideoHandles:
+    """Process-wide table giving every video ID a small integer handle.
+
+    Structures that hold many video IDs (the run journal, per-playlist
+    video sets) store handles instead of strings, so each ID string is
+    kept once however many playlists and records refer to it. Handle 0
+    stands for "no video".
+    """
+
+    __slots__ = ("_ids", "_handles", "_lock")
+
+    def __init__(self):
+        self._ids = [None]
+        self._handles = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids) - 1
+
+    def handle(self, video_id):
+        """Return the handle of ``video_id``, assigning one on first sight."""
+        if video_id is None:
+            return 0
+        handle = self._handles.get(video_id)
+        if handle is None:
+            with self._lock:
+                handle = self._handles.get(video_id)
+                if handle is None:
+                    handle = self._handles[video_id] = len(self._ids)
+                    self._ids.append(video_id)
+        return handle
+
+    def find(self, video_id):
+        """Return the handle of ``video_id`` if it has one, else None."""
+        return self._handles.get(video_id)
+
+    def video_id(self, handle):
+        return self._ids[handle]
+
+
+_video_handles = VideoHandles()
+
+
+def get_video_handles():
+    return _video_handles
+
+
+def pack_outcome(video_id, status):
+    """Pack a song's video and status into one int: ``handle << STATUS_BITS | status code``."""
+    return _video_handles.handle(video_id) << STATUS_BITS | STATUS_CODES[status]
+
+
+def unpack_outcome(packed):
+    """Return the ``(video_id, status)`` packed by pack_outcome()."""
+    return (
+        _video_handles.video_id(packed >> STATUS_BITS),
+        STATUSES[packed & ((1 << STATUS_BITS) - 1)],
+    )
+
+
+class VideoSet(MutableSet):
+    """Set of video IDs stored as handles; behaves like a set of ID strings.
+
+    Handles are only valid in the process that assigned them, so a pickled
+    VideoSet (e.g. in a worker's results) carries the ID strings.
+    """
+
+    __slots__ = ("_handles",)
+
+    def __init__(self, video_ids=()):
+        self._handles = {_video_handles.handle(video_id) for video_id in video_ids}
+
+    def __contains__(self, video_id):
+        handle = _video_handles.find(video_id)
+        return handle is not None and handle in self._handles
+
+    def __iter__(self):
+        return (_video_handles.video_id(handle) for handle in self._handles)
+
+    def __len__(self):
+        return len(self._handles)
+
+    def add(self, video_id):
+        self._handles.add(_video_handles.handle(video_id))
+
+    def discard(self, video_id):
+        handle = _video_handles.find(video_id)
+        if handle is not None:
+            self._handles.discard(handle)
+
+    def update(self, video_ids):
+        self._handles.update(_video_handles.handle(video_id) for video_id in video_ids)
+
+    def __reduce__(self):
+        return VideoSet, (list(self),)
+
+    def __repr__(self):
+        return f"VideoSet({sorted(self)!r})"
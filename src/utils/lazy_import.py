@@ -0,0 +1,44 @@
+import importlib
+import threading
+
+
+class LazyImport:
+    """Stand-in for a module (or an attribute of one) that is imported on first use.
+
+    Attribute access and calls are forwarded to the real object, so
+    ``pd = LazyImport("pandas")`` or
+    ``build = LazyImport("googleapiclient.discovery", "build")`` can be used as
+    drop-in replacements for the corresponding import statements while
+    keeping heavy dependencies off the startup path.
+    """
+
+    def __init__(self, module_name, attribute=None):
+        object.__setattr__(self, "_module_name", module_name)
+        object.__setattr__(self, "_attribute", attribute)
+        object.__setattr__(self, "_target", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self):
+        target = self._target
+        if target is None:
+            with self._lock:
+                if self._target is None:
+                    target = importlib.import_module(self._module_name)
+                    if self._attribute is not None:
+                        target = getattr(target, self._attribute)
+                    object.__setattr__(self, "_target", target)
+                target = self._target
+        return target
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        name = self._module_name
+        if self._attribute is not None:
+            name = f"{name}.{self._attribute}"
+        state = "loaded" if self._target is not None else "not loaded"
+        return f"<LazyImport {name} ({state})>"
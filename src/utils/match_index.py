@@ -0,0 +1,158 @@
+import csv
+import os
+import threading
+from contextlib import nullcontext
+
+from config import config
+from logger import logger
+from utils.sqlite_db import connect, skip_if_locked
+from utils.track import clean_identifier
+
+ISRC = "isrc"
+SPOTIFY_ID = "spotify_id"
+
+
+class MatchIndex:
+    """Persistent ISRC / Spotify ID -> YouTube video ID index.
+
+    Rows whose recording is already in the index can skip the 100-unit
+    search entirely. ISRCs are preferred over Spotify IDs when both exist.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS matches (
+                key_type TEXT NOT NULL,
+                key TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                PRIMARY KEY (key_type, key)
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _keys(isrc=None, spotify_id=None):
+        keys = []
+        isrc = clean_identifier(isrc, upper=True)
+        spotify_id = clean_identifier(spotify_id)
+        if isrc:
+            keys.append((ISRC, isrc))
+        if spotify_id:
+            keys.append((SPOTIFY_ID, spotify_id))
+        return keys
+
+    def lookup(self, track):
+        """Return the indexed video ID for a Track, or None."""
+        for key_type, key in self._keys(track.isrc, track.spotify_id):
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT video_id FROM matches WHERE key_type = ? AND key = ?",
+                    (key_type, key),
+                ).fetchone()
+            if row is not None:
+                self.hits += 1
+                return row[0]
+        return None
+
+    def record(self, track, video_id):
+        """Index every identifier of a Track under ``video_id``.
+
+        If other processes keep the index locked, the mapping is skipped.
+        """
+        self._upsert(self._keys(track.isrc, track.spotify_id), video_id)
+
+    def forget(self, video_id):
+        """Remove every mapping to ``video_id``; returns how many were removed."""
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM matches WHERE video_id = ?", (video_id,)
+            ).rowcount
+            self._conn.commit()
+        return removed
+
+    def _upsert(self, keys, video_id, commit=True):
+        if not keys or not video_id:
+            return 0
+        # Single mappings are skipped when locked; a bulk import fails instead.
+        skip = (
+            skip_if_locked(self._conn, f"indexing video ID {video_id}")
+            if commit
+            else nullcontext()
+        )
+        with self._lock, skip:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO matches (key_type, key, video_id) VALUES (?, ?, ?)",
+                [(key_type, key, video_id) for key_type, key in keys],
+            )
+            if commit:
+                self._conn.commit()
+        return len(keys)
+
+    def import_csv(self, file_path):
+        """Bulk-import mappings from a CSV with ``isrc``, ``spotify_id`` and ``video_id`` columns.
+
+        Returns:
+            int: Number of identifiers imported.
+        """
+        imported = 0
+        with open(file_path, "r", encoding="utf-8-sig", newline="") as file:
+            for row in csv.DictReader(file):
+                keys = self._keys(row.get(ISRC), row.get(SPOTIFY_ID))
+                imported += self._upsert(
+                    keys, clean_identifier(row.get("video_id")), commit=False
+                )
+        with self._lock:
+            self._conn.commit()
+        logger.info(f"Imported {imported} identifiers into the match index.")
+        return imported
+
+    def export_csv(self, file_path):
+        """Export all mappings in the format read by import_csv, one row per identifier.
+
+        Returns:
+            int: Number of rows written.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key_type, key, video_id FROM matches ORDER BY video_id, key_type"
+            ).fetchall()
+        written = 0
+        with open(file_path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=[ISRC, SPOTIFY_ID, "video_id"])
+            writer.writeheader()
+            for key_type, key, video_id in rows:
+                writer.writerow({key_type: key, "video_id": video_id})
+                written += 1
+        logger.info(f"Exported {written} match index rows to '{file_path}'.")
+        return written
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM matches").fetchone()
+        return count
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_match_index = None
+
+
+def get_match_index():
+    """Return the shared match index configured in config.yaml, or None if disabled."""
+    global _match_index
+    index_config = config.get("match_index", {}) or {}
+    if not index_config.get("enabled", False):
+        return None
+    if _match_index is None:
+        _match_index = MatchIndex(
+            index_config.get("path", os.path.join(".cache", "match_index.sqlite3"))
+        )
+    return _match_index
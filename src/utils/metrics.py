@@ -0,0 +1,291 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config import config
+from logger import logger
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus style."""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets) + (math.inf,)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Estimate the ``q`` quantile by interpolating within its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                upper = min(bound, self.max)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+            lower = bound
+        return self.max
+
+
+class MetricsRegistry:
+    """Thread-safe registry of labelled counters and latency histograms.
+
+    Metrics can be rendered in the Prometheus text exposition format (to a
+    file or over HTTP) and summarized as JSON with per-series quantiles.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, clock=time.perf_counter):
+        self.buckets = buckets
+        self._clock = clock
+        self._counters = {}  # name -> {label key: value}
+        self._histograms = {}  # name -> {label key: Histogram}
+        self._lock = threading.Lock()
+        self._started = None
+        self._first_call_seen = False
+
+    def mark_started(self):
+        """Start the clock for time_to_first_call_seconds."""
+        self._started = self._clock()
+
+    def mark_first_call(self):
+        """Observe time_to_first_call_seconds once, when the first API call completes.
+
+        Returns:
+            float: Seconds since mark_started() on the first call, else None.
+        """
+        with self._lock:
+            if self._started is None or self._first_call_seen:
+                return None
+            self._first_call_seen = True
+        elapsed = self._clock() - self._started
+        self.observe("time_to_first_call_seconds", elapsed)
+        return elapsed
+
+    def inc(self, name, value=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of the ``with`` block in histogram ``name``."""
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.observe(name, self._clock() - start, **labels)
+
+    def counter_value(self, name, **labels):
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def histogram(self, name, **labels):
+        with self._lock:
+            return self._histograms.get(name, {}).get(_label_key(labels))
+
+    def snapshot(self):
+        """Return the raw counters and histograms as plain, picklable data."""
+        with self._lock:
+            return {
+                "counters": {name: dict(series) for name, series in self._counters.items()},
+                "histograms": {
+                    name: {
+                        key: (list(h.counts), h.count, h.sum, h.max)
+                        for key, h in series.items()
+                    }
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def merge(self, snapshot):
+        """Add a snapshot() of another registry (e.g. a worker process's) to this one."""
+        with self._lock:
+            for name, series in snapshot["counters"].items():
+                counters = self._counters.setdefault(name, {})
+                for key, value in series.items():
+                    counters[key] = counters.get(key, 0) + value
+            for name, series in snapshot["histograms"].items():
+                histograms = self._histograms.setdefault(name, {})
+                for key, (counts, count, total, maximum) in series.items():
+                    histogram = histograms.get(key)
+                    if histogram is None:
+                        histogram = histograms[key] = Histogram(self.buckets)
+                    histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                    histogram.count += count
+                    histogram.sum += total
+                    histogram.max = max(histogram.max, maximum)
+
+    def to_prometheus(self):
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                        cumulative += bucket_count
+                        le = (("le", _format_value(bound)),)
+                        lines.append(f"{name}_bucket{_format_labels(key, le)} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum!r}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Return a JSON-serializable summary with count, sum and quantiles per series."""
+        with self._lock:
+            return {
+                "counters": {
+                    name: [
+                        {"labels": dict(key), "value": value}
+                        for key, value in sorted(series.items())
+                    ]
+                    for name, series in sorted(self._counters.items())
+                },
+                "histograms": {
+                    name: [
+                        {
+                            "labels": dict(key),
+                            "count": histogram.count,
+                            "sum": round(histogram.sum, 6),
+                            "mean": round(histogram.sum / histogram.count, 6),
+                            "p50": round(histogram.quantile(0.5), 6),
+                            "p95": round(histogram.quantile(0.95), 6),
+                            "p99": round(histogram.quantile(0.99), 6),
+                            "max": round(histogram.max, 6),
+                        }
+                        for key, histogram in sorted(series.items())
+                    ]
+                    for name, series in sorted(self._histograms.items())
+                },
+            }
+
+    def write_prometheus(self, path):
+        _write_atomic(path, self.to_prometheus())
+
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.summary(), indent=2))
+
+    def serve(self, port, host="127.0.0.1"):
+        """Expose ``/metrics`` over HTTP on a daemon thread; return the server."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                payload = registry.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+
+
+_metrics = None
+
+
+def get_metrics():
+    """Return the shared metrics registry."""
+    global _metrics
+    if _metrics is None:
+        _metrics = MetricsRegistry()
+    return _metrics
+
+
+def export_metrics():
+    """Write the Prometheus file and JSON summary configured in the ``metrics`` section."""
+    metrics_config = config.get("metrics", {}) or {}
+    if not metrics_config.get("enabled", True):
+        return
+    registry = get_metrics()
+    prometheus_path = metrics_config.get("prometheus_path")
+    json_path = metrics_config.get("json_path")
+    try:
+        if prometheus_path:
+            registry.write_prometheus(prometheus_path)
+        if json_path:
+            registry.write_json(json_path)
+    except OSError as e:
+        logger.warning(f"Could not write metrics: {e}")
+        return
+    logger.debug(f"Wrote metrics to '{prometheus_path}' and '{json_path}'.")
@@ -0,0 +1,139 @@
+import asyncio
+import re
+import threading
+import unicodedata
+
+from utils.search_cache import MISS
+
+# "(feat. X)", "[ft. X]", "(with X)" credits; the featured artist is part of
+# the same recording whether or not the CSV spells it out.
+_FEATURING = re.compile(r"[(\[]\s*(?:feat|ft|featuring|with)\b\.?[^)\]]*[)\]]")
+# "- Remastered 2011", "(2009 Remaster)", "[Remastered Version]" and friends.
+_REMASTER = re.compile(
+    r"\s-\s(?:\d{4}\s)?(?:digital(?:ly)?\s)?remaster(?:ed)?(?:\s\d{4})?(?:\sversion)?\b"
+    r"|[(\[]\s*(?:\d{4}\s)?(?:digital(?:ly)?\s)?remaster(?:ed)?(?:\s\d{4})?(?:\sversion)?\s*[)\]]",
+    re.IGNORECASE,
+)
+_APOSTROPHES = re.compile(r"['‘’`]")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def canonical_query(query):
+    """Return the canonical form of a "Track Artist" query used to spot duplicates.
+
+    Featuring credits and remaster suffixes are dropped, the text is
+    NFKC-normalized and case-folded, ``&`` becomes ``and`` and all other
+    punctuation is removed, so "Feels (feat. Katy Perry) Calvin Harris" and
+    "feels calvin harris" share a key. Versions that are different
+    recordings (live, acoustic, remixes) keep distinct keys.
+    """
+    text = unicodedata.normalize("NFKC", str(query))
+    text = _FEATURING.sub(" ", text)
+    text = _REMASTER.sub(" ", text)
+    text = _APOSTROPHES.sub("", text).casefold().replace("&", " and ")
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def count_unique_queries(queries):
+    """Return ``(total, unique)`` counts of queries after canonicalization."""
+    total = 0
+    keys = set()
+    for query in queries:
+        total += 1
+        keys.add(canonical_query(query))
+    return total, len(keys)
+
+
+class QueryMemo:
+    """Run-wide memo that resolves each canonical query once.
+
+    The first caller for a key runs the resolver; concurrent callers for the
+    same key wait for its result instead of searching again, and later
+    callers get the memoized video ID (or None for "not found"). ``saved``
+    counts the searches avoided this way. Callers that know a repeat would
+    have been answered without a search anyway (by a cache, say) pass
+    ``would_search(query)``; hits for which it returns False are not counted.
+    """
+
+    def __init__(self):
+        self.saved = 0
+        self._results = {}
+        self._pending = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def get(self, query, would_search=None):
+        """Return the memoized result for ``query`` (counting it as saved), or MISS."""
+        key = canonical_query(query)
+        with self._lock:
+            result = self._results.get(key, MISS)
+        if result is not MISS:
+            self._count_hit(query, would_search)
+        return result
+
+    def set(self, query, video_id):
+        with self._lock:
+            self._results[canonical_query(query)] = video_id
+
+    def resolve(self, query, resolver, would_search=None):
+        """Return the result for ``query``, calling ``resolver(query)`` only for new keys."""
+        key = canonical_query(query)
+        while True:
+            with self._lock:
+                result = self._results.get(key, MISS)
+                if result is MISS:
+                    event = self._pending.get(key)
+                    owner = event is None
+                    if owner:
+                        event = self._pending[key] = threading.Event()
+            if result is not MISS:
+                self._count_hit(query, would_search)
+                return result
+            if owner:
+                break
+            # Another thread is resolving this key; if it fails, try ourselves.
+            event.wait()
+
+        try:
+            video_id = resolver(query)
+            with self._lock:
+                self._results[key] = video_id
+            return video_id
+        finally:
+            with self._lock:
+                del self._pending[key]
+            event.set()
+
+    async def resolve_async(self, query, resolver, would_search=None):
+        """Coroutine form of resolve(); ``resolver`` and ``would_search`` return awaitables."""
+        key = canonical_query(query)
+        with self._lock:
+            result = self._results.get(key, MISS)
+            task = self._tasks.get(key)
+            owner = result is MISS and task is None
+            if owner:
+                task = self._tasks[key] = asyncio.ensure_future(resolver(query))
+                task.add_done_callback(lambda done: self._store_task(key, done))
+        if not owner and (would_search is None or await would_search(query)):
+            with self._lock:
+                self.saved += 1
+        if result is not MISS:
+            return result
+        return await asyncio.shield(task)
+
+    def _count_hit(self, query, would_search):
+        if would_search is None or would_search(query):
+            with self._lock:
+                self.saved += 1
+
+    def _store_task(self, key, task):
+        with self._lock:
+            del self._tasks[key]
+            if not task.cancelled() and task.exception() is None:
+                self._results[key] = task.result()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._results)
@@ -0,0 +1,260 @@
+import atexit
+import json
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, time as dt_time, timedelta, timezone
+
+from config import config
+from logger import logger
+
+try:
+    from zoneinfo import ZoneInfo
+
+    PACIFIC = ZoneInfo("America/Los_Angeles")
+except Exception:  # zoneinfo/tzdata unavailable; approximate with PST
+    PACIFIC = timezone(timedelta(hours=-8), "PST")
+
+# Quota cost in units of each YouTube Data API method we call.
+QUOTA_COSTS = {
+    "playlists.list": 1,
+    "playlists.insert": 50,
+    "playlistItems.list": 1,
+    "playlistItems.insert": 50,
+    "playlistItems.update": 50,
+    "playlistItems.delete": 50,
+    "search.list": 100,
+    "videos.list": 1,
+}
+
+DEFAULT_DAILY_LIMIT = 10000
+
+
+class QuotaExhausted(Exception):
+    """Raised before an API call that would exceed the daily quota budget."""
+
+
+def quota_day(now=None):
+    """Return the quota day (YYYY-MM-DD); the API quota resets at midnight Pacific time."""
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(PACIFIC).date().isoformat()
+
+
+def next_reset(now=None):
+    """Return the (timezone-aware) datetime of the next quota reset."""
+    now = (now or datetime.now(timezone.utc)).astimezone(PACIFIC)
+    tomorrow = now.date() + timedelta(days=1)
+    return datetime.combine(tomorrow, dt_time(0), tzinfo=PACIFIC)
+
+
+class QuotaLedger:
+    """Track quota units spent per API method and persist the daily total.
+
+    The ledger is stored as JSON keyed by quota day. ``charge()`` raises
+    QuotaExhausted instead of spending past ``daily_limit - reserve`` so a
+    run can stop cleanly and continue after the reset. ``path=None`` keeps
+    the ledger in memory only.
+
+    Totals and the budget check live in memory; charges are written out by
+    a timer at most every ``save_interval`` seconds (``0`` writes on every
+    charge), by ``flush()`` at the end of a phase and at exit.
+    """
+
+    def __init__(
+        self, path, daily_limit=DEFAULT_DAILY_LIMIT, reserve=0, clock=None, save_interval=5.0
+    ):
+        self.path = path
+        self.daily_limit = daily_limit
+        self.reserve = reserve
+        self.save_interval = save_interval
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._days = self._load()
+        if path:
+            atexit.register(self.flush)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                return json.load(file).get("days", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read quota ledger '{self.path}': {e}")
+            return {}
+
+    def _save(self, days):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self._save_lock:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump({"days": days}, file, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def _changed(self):
+        """Note unsaved charges and schedule a save. Called with the lock held."""
+        if not self.path or self._dirty:
+            return
+        self._dirty = True
+        if self.save_interval > 0:
+            timer = threading.Timer(self.save_interval, self.flush)
+            timer.daemon = True
+            timer.start()
+
+    def flush(self):
+        """Write the ledger if it has unsaved charges."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            # Only keep the last week of history.
+            days = {
+                day: {"total": entry["total"], "methods": dict(entry["methods"])}
+                for day, entry in sorted(self._days.items())[-7:]
+            }
+        self._save(days)
+
+    def _today(self):
+        return self._days.setdefault(
+            quota_day(self._clock()), {"total": 0, "methods": {}}
+        )
+
+    @property
+    def budget(self):
+        if self.daily_limit is None:
+            return None
+        return max(0, self.daily_limit - self.reserve)
+
+    def spent(self):
+        """Return the units spent so far today."""
+        with self._lock:
+            return self._today()["total"]
+
+    def spent_by_method(self):
+        """Return a copy of today's units spent per method."""
+        with self._lock:
+            return dict(self._today()["methods"])
+
+    def remaining(self):
+        """Return the units still available today (None if unlimited)."""
+        if self.budget is None:
+            return None
+        return max(0, self.budget - self.spent())
+
+    def can_afford(self, method, count=1):
+        remaining = self.remaining()
+        return remaining is None or QUOTA_COSTS.get(method, 0) * count <= remaining
+
+    def charge(self, method, count=1):
+        """Record ``count`` calls of ``method``; raise QuotaExhausted if over budget."""
+        units = QUOTA_COSTS.get(method, 0) * count
+        with self._lock:
+            today = self._today()
+            if self.budget is not None and today["total"] + units > self.budget:
+                raise QuotaExhausted(
+                    f"{method} needs {units} units but only "
+                    f"{max(0, self.budget - today['total'])} of the daily budget remain."
+                )
+            today["total"] += units
+            today["methods"][method] = today["methods"].get(method, 0) + units
+            self._changed()
+        if not self.save_interval:
+            self.flush()
+        return units
+
+    def record_spent(self, units_by_method):
+        """Add units spent elsewhere (e.g. by worker processes) to today's total."""
+        with self._lock:
+            today = self._today()
+            for method, units in units_by_method.items():
+                today["total"] += units
+                today["methods"][method] = today["methods"].get(method, 0) + units
+            self._changed()
+        self.flush()
+
+    def mark_exhausted(self):
+        """Record that the API reported the quota as exceeded for today."""
+        if self.budget is None:
+            return
+        with self._lock:
+            today = self._today()
+            today["total"] = max(today["total"], self.budget)
+            self._changed()
+        self.flush()
+
+
+def estimate_run_cost(playlists, existing_playlists, cached_queries=()):
+    """Estimate the quota units a run over the parsed CSV will need.
+
+    Args:
+        playlists (dict): Playlist name -> list of search queries.
+        existing_playlists (dict): Lowercase playlist name -> playlist ID.
+        cached_queries (Iterable[str]): Queries whose result is already cached.
+
+    Returns:
+        dict: Units per method plus a ``total`` key. Inserts are an upper
+        bound since songs already in a playlist are skipped.
+    """
+    cached = set(cached_queries)
+    unique_queries = {song for songs in playlists.values() for song in songs}
+    searches = len(unique_queries - cached)
+    creations = sum(
+        1 for name in playlists if name.lower() not in existing_playlists
+    )
+    inserts = sum(len(songs) for songs in playlists.values())
+    # At least one page of items is listed for every playlist that already exists.
+    list_pages = len(playlists) - creations
+
+    estimate = {
+        "search.list": searches * QUOTA_COSTS["search.list"],
+        "playlists.insert": creations * QUOTA_COSTS["playlists.insert"],
+        "playlistItems.insert": inserts * QUOTA_COSTS["playlistItems.insert"],
+        "playlistItems.list": list_pages * QUOTA_COSTS["playlistItems.list"],
+    }
+    estimate["total"] = sum(estimate.values())
+    return estimate
+
+
+_quota_ledger = None
+# Ledger of the pooled credential the current thread or task is calling with.
+_active_ledger = ContextVar("active_quota_ledger", default=None)
+
+
+@contextmanager
+def use_ledger(ledger):
+    """Charge the API calls made inside the ``with`` block to ``ledger``.
+
+    The binding is local to the calling thread or asyncio task, so workers
+    using different credentials of a pool can run side by side.
+    """
+    token = _active_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _active_ledger.reset(token)
+
+
+def get_quota_ledger():
+    """Return the quota ledger API calls are charged to.
+
+    Inside use_ledger() that is the bound ledger; otherwise the shared
+    ledger configured in config.yaml.
+    """
+    active = _active_ledger.get()
+    if active is not None:
+        return active
+    global _quota_ledger
+    if _quota_ledger is None:
+        quota_config = config.get("quota", {}) or {}
+        _quota_ledger = QuotaLedger(
+            quota_config.get("ledger_path", os.path.join(".cache", "quota_ledger.json")),
+            daily_limit=quota_config.get("daily_limit", DEFAULT_DAILY_LIMIT),
+            reserve=quota_config.get("reserve_units", 0),
+            save_interval=quota_config.get("save_interval", 5.0),
+        )
+    return _quota_ledger
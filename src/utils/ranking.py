@@ -0,0 +1,215 @@
+import math
+import re
+from collections import namedtuple
+
+from config import config
+from utils.lazy_import import LazyImport
+
+np = LazyImport("numpy")
+
+# Words that mark an unwanted version unless the query asks for it.
+PENALTY_WORDS = (
+    "cover",
+    "live",
+    "reaction",
+    "karaoke",
+    "instrumental",
+    "remix",
+    "nightcore",
+    "slowed",
+    "sped",
+    "tutorial",
+    "lesson",
+)
+
+DEFAULT_WEIGHTS = {
+    "title": 1.0,  # Token F1 between query and title
+    "channel": 0.3,  # Query tokens (usually the artist) found in the channel name
+    "official": 0.4,  # "- Topic" (auto-generated) or VEVO channel
+    "duration": 0.3,  # Plausible song length, or closeness to the expected one
+    "penalty": 0.8,  # Per unwanted-version word in the title
+    "position": 0.02,  # Per place down YouTube's own result order
+}
+
+# Durations (seconds) a song plausibly has when no expected duration is known.
+SONG_SECONDS = (90, 600)
+DURATION_TOLERANCE = 30.0
+
+_TOKEN = re.compile(r"\w+")
+_ISO_DURATION = re.compile(r"P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?$")
+
+
+class Candidate(
+    namedtuple("Candidate", ["video_id", "title", "channel", "duration"], defaults=("", None))
+):
+    """A search result kept for re-ranking; ``duration`` is in seconds, if known."""
+
+    __slots__ = ()
+
+
+def get_ranking_settings():
+    """Return (enabled, candidates per search, fetch_durations, weights) from ``ranking``."""
+    ranking_config = config.get("ranking", {}) or {}
+    return (
+        bool(ranking_config.get("enabled", False)),
+        max(1, min(int(ranking_config.get("candidates", 10)), 50)),
+        bool(ranking_config.get("fetch_durations", True)),
+        {**DEFAULT_WEIGHTS, **(ranking_config.get("weights", {}) or {})},
+    )
+
+
+def tokens(text):
+    return set(_TOKEN.findall(str(text).casefold()))
+
+
+def parse_duration(value):
+    """Convert an ISO 8601 duration such as ``PT3M55S`` to seconds, or None."""
+    match = _ISO_DURATION.match(value or "")
+    if not match or not any(match.groups()):
+        return None
+    days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def candidates_from_search(response):
+    """Return the Candidates of a ``search.list`` response, in result order."""
+    candidates = []
+    for item in response.get("items", []):
+        video_id = item.get("id", {}).get("videoId")
+        if video_id:
+            snippet = item.get("snippet", {})
+            candidates.append(
+                Candidate(video_id, snippet.get("title", ""), snippet.get("channelTitle", ""))
+            )
+    return candidates
+
+
+def durations_from_videos(response):
+    """Return {video ID: seconds} from a ``videos.list`` response with contentDetails."""
+    durations = {}
+    for item in response.get("items", []):
+        seconds = parse_duration(item.get("contentDetails", {}).get("duration"))
+        if seconds is not None:
+            durations[item["id"]] = seconds
+    return durations
+
+
+def with_durations(candidates, durations):
+    return [
+        candidate._replace(duration=durations.get(candidate.video_id, candidate.duration))
+        for candidate in candidates
+    ]
+
+
+def score_candidates(queries, candidate_lists, weights=None, expected_durations=None):
+    """Score the candidates of many queries at once.
+
+    All candidates are flattened into one token matrix over the queries'
+    vocabulary, so title and channel matching, the official-channel bonus,
+    unwanted-version penalties and the duration term are computed with a
+    handful of array operations however many queries are scored.
+
+    Args:
+        queries (list): Search queries.
+        candidate_lists (list): A list of Candidates per query.
+        weights (dict, optional): Overrides for DEFAULT_WEIGHTS.
+        expected_durations (list, optional): Seconds per query, or None.
+
+    Returns:
+        list: A float array of scores per query, aligned with its candidates.
+    """
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    counts = [len(candidates) for candidates in candidate_lists]
+    flat = [candidate for candidates in candidate_lists for candidate in candidates]
+    if not flat:
+        return [np.zeros(0) for _ in queries]
+    group = np.repeat(np.arange(len(queries)), counts)
+    position = np.concatenate([np.arange(count) for count in counts])
+
+    query_tokens = [tokens(query) for query in queries]
+    vocabulary = {}
+    for words in query_tokens:
+        for word in words:
+            vocabulary.setdefault(word, len(vocabulary))
+    for word in PENALTY_WORDS:
+        vocabulary.setdefault(word, len(vocabulary))
+
+    def matrix(token_sets):
+        rows, cols = [], []
+        for row, words in enumerate(token_sets):
+            for word in words:
+                col = vocabulary.get(word)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+        result = np.zeros((len(token_sets), len(vocabulary)), dtype=bool)
+        result[np.array(rows, dtype=int), np.array(cols, dtype=int)] = True
+        return result
+
+    title_tokens = [tokens(candidate.title) for candidate in flat]
+    in_query = matrix(query_tokens)[group]
+    in_title = matrix(title_tokens)
+    in_channel = matrix([tokens(candidate.channel) for candidate in flat])
+
+    query_size = np.maximum(in_query.sum(axis=1), 1)
+    title_size = np.maximum([len(words) for words in title_tokens], 1)
+    overlap = (in_query & in_title).sum(axis=1)
+    recall = overlap / query_size
+    precision = overlap / title_size
+    title = 2 * precision * recall / np.maximum(precision + recall, 1e-9)
+    channel = (in_query & in_channel).sum(axis=1) / query_size
+
+    channels = np.array([candidate.channel.casefold() for candidate in flat], dtype=str)
+    official = np.where(
+        np.char.endswith(channels, " - topic"),
+        1.0,
+        np.where(np.char.find(channels, "vevo") >= 0, 0.8, 0.0),
+    )
+
+    penalty_cols = [vocabulary[word] for word in PENALTY_WORDS]
+    penalty = (in_title[:, penalty_cols] & ~in_query[:, penalty_cols]).sum(axis=1)
+
+    seconds = np.array(
+        [math.nan if candidate.duration is None else candidate.duration for candidate in flat],
+        dtype=float,
+    )
+    expected = np.array(
+        [
+            math.nan if value is None else value
+            for value in (expected_durations or [None] * len(queries))
+        ],
+        dtype=float,
+    )[group]
+    low, high = SONG_SECONDS
+    plausible = np.where((seconds >= low) & (seconds <= high), 1.0, 0.0)
+    close = np.exp(-np.abs(seconds - expected) / DURATION_TOLERANCE)
+    duration = np.where(np.isnan(seconds), 0.5, np.where(np.isnan(expected), plausible, close))
+
+    scores = (
+        weights["title"] * title
+        + weights["channel"] * channel
+        + weights["official"] * official
+        + weights["duration"] * duration
+        - weights["penalty"] * penalty
+        - weights["position"] * position
+    )
+    return np.split(scores, np.cumsum(counts)[:-1])
+
+
+def best_candidates(
+    queries, candidate_lists, rejected=(), weights=None, expected_durations=None
+):
+    """Return the best video ID per query (None if it has no usable candidate).
+
+    Candidates whose video was rejected are never chosen.
+    """
+    rejected = set(rejected)
+    usable = [
+        [candidate for candidate in candidates if candidate.video_id not in rejected]
+        for candidates in candidate_lists
+    ]
+    scores = score_candidates(queries, usable, weights, expected_durations)
+    return [
+        candidates[int(np.argmax(score))].video_id if candidates else None
+        for candidates, score in zip(usable, scores)
+    ]
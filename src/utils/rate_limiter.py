@@ -0,0 +1,78 @@
+import threading
+import time
+
+from config import config
+
+
+class TokenBucket:
+    """Thread-safe token-bucket rate limiter.
+
+    Tokens refill continuously at ``rate`` per second up to ``burst``.
+    ``acquire()`` blocks until a token is available, so callers are held to
+    an average of ``rate`` requests per second with short bursts allowed.
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take ``tokens`` if available right now; return whether it succeeded."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def take_or_wait(self, tokens=1):
+        """Take ``tokens`` and return 0 if available, else return the seconds until they are.
+
+        Raises:
+            ValueError: If ``tokens`` exceeds ``burst``; the bucket never holds that many.
+        """
+        if tokens > self.burst:
+            raise ValueError(f"Cannot take {tokens} tokens from a bucket of {self.burst:g}.")
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """Block until ``tokens`` are available, then take them.
+
+        Raises:
+            ValueError: If ``tokens`` exceeds ``burst``.
+        """
+        wait = self.take_or_wait(tokens)
+        while wait > 0:
+            self._sleep(wait)
+            wait = self.take_or_wait(tokens)
+
+
+_rate_limiter = None
+
+
+def get_rate_limiter():
+    """Return the shared API rate limiter configured in config.yaml."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        rate_config = config.get("rate_limit", {}) or {}
+        _rate_limiter = TokenBucket(
+            rate=rate_config.get("qps", 1), burst=rate_config.get("burst", 1)
+        )
+    return _rate_limiter
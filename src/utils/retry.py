@@ -0,0 +1,203 @@
+import collections
+import json
+import os
+import random
+import threading
+import time
+
+from config import config
+from logger import logger
+
+# How execute_request treats a failed call.
+RETRYABLE = "retryable"
+QUOTA = "quota"
+PERMANENT = "permanent"
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    The n-th retry waits a random time between 0 and
+    ``min(max_delay, base_delay * 2 ** (n - 1))`` seconds, but never less than
+    a server-provided ``Retry-After``.
+    """
+
+    def __init__(self, max_attempts=5, base_delay=1.0, max_delay=60.0, rng=None, sleep=time.sleep):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+        self._rng = rng or random.Random()
+        self.sleep = sleep
+
+    def delay(self, attempt, retry_after=None):
+        """Return the seconds to wait before retry number ``attempt`` (1-based)."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = self._rng.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, min(float(retry_after), self.max_delay))
+        return delay
+
+
+class CircuitBreaker:
+    """Pause all API traffic while the recent error rate is too high.
+
+    The outcomes of the last ``window`` retryable-or-successful calls are
+    kept. Once at least ``min_calls`` are recorded and the share of failures
+    reaches ``failure_rate``, the breaker opens for ``cooldown`` seconds:
+    every caller waits in ``wait()`` instead of hammering a struggling API.
+    Afterwards the window is cleared and traffic resumes.
+    """
+
+    def __init__(
+        self,
+        window=20,
+        failure_rate=0.5,
+        min_calls=10,
+        cooldown=30.0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.failure_rate = float(failure_rate)
+        self.min_calls = max(1, int(min_calls))
+        self.cooldown = float(cooldown)
+        self.trips = 0
+        self._outcomes = collections.deque(maxlen=max(1, int(window)))
+        self._open_until = None
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        """Return the seconds until the breaker closes again (0 if it is closed)."""
+        with self._lock:
+            if self._open_until is None:
+                return 0.0
+            remaining = self._open_until - self._clock()
+            if remaining <= 0:
+                self._open_until = None
+                self._outcomes.clear()
+                logger.info("Circuit breaker closed; resuming API calls.")
+                return 0.0
+            return remaining
+
+    def wait(self):
+        """Block while the breaker is open."""
+        while True:
+            remaining = self.remaining()
+            if remaining <= 0:
+                return
+            self._sleep(remaining)
+
+    def record_success(self):
+        with self._lock:
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        with self._lock:
+            self._outcomes.append(False)
+            if self._open_until is not None or len(self._outcomes) < self.min_calls:
+                return
+            failures = self._outcomes.count(False)
+            if failures / len(self._outcomes) >= self.failure_rate:
+                self._open_until = self._clock() + self.cooldown
+                self.trips += 1
+                logger.warning(
+                    f"Circuit breaker opened: {failures} of the last "
+                    f"{len(self._outcomes)} API calls failed. Pausing for "
+                    f"{self.cooldown:.0f} seconds."
+                )
+
+
+class FailureReport:
+    """Thread-safe list of items that failed permanently during a run."""
+
+    def __init__(self):
+        self.failures = []
+        self._lock = threading.Lock()
+
+    def add(self, method, item, error):
+        """Record that ``item`` (a query, video ID, playlist title...) failed in ``method``."""
+        status = getattr(getattr(error, "resp", None), "status", None)
+        with self._lock:
+            self.failures.append(
+                {
+                    "method": method,
+                    "item": str(item),
+                    # Network failures carry status 0: there was no response.
+                    "status": status if isinstance(status, int) and status else None,
+                    "error": str(error),
+                }
+            )
+
+    def extend(self, failures):
+        """Add failures recorded by another report (e.g. in a worker process)."""
+        with self._lock:
+            self.failures.extend(failures)
+
+    def __len__(self):
+        with self._lock:
+            return len(self.failures)
+
+    def summary(self):
+        """Return the number of failures per API method."""
+        with self._lock:
+            return dict(collections.Counter(f["method"] for f in self.failures))
+
+    def write(self, path):
+        """Write the failures to ``path`` as JSON."""
+        with self._lock:
+            failures = list(self.failures)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(failures, file, ensure_ascii=False, indent=2)
+
+
+_retry_policy = None
+_circuit_breaker = None
+_failure_report = None
+
+
+def _retry_config():
+    return config.get("retry", {}) or {}
+
+
+def get_retry_policy():
+    """Return the shared retry policy configured in config.yaml."""
+    global _retry_policy
+    if _retry_policy is None:
+        retry_config = _retry_config()
+        _retry_policy = RetryPolicy(
+            max_attempts=retry_config.get("max_attempts", 5),
+            base_delay=retry_config.get("base_delay", 1.0),
+            max_delay=retry_config.get("max_delay", 60.0),
+        )
+    return _retry_policy
+
+
+def get_circuit_breaker():
+    """Return the shared circuit breaker configured in config.yaml."""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        retry_config = _retry_config()
+        _circuit_breaker = CircuitBreaker(
+            window=retry_config.get("breaker_window", 20),
+            failure_rate=retry_config.get("breaker_failure_rate", 0.5),
+            min_calls=retry_config.get("breaker_min_calls", 10),
+            cooldown=retry_config.get("breaker_cooldown", 30.0),
+        )
+    return _circuit_breaker
+
+
+def get_failure_report():
+    """Return the shared report of permanently failed items."""
+    global _failure_report
+    if _failure_report is None:
+        _failure_report = FailureReport()
+    return _failure_report
+
+
+def record_failure(method, item, error):
+    """Add a permanently failed item to the shared failure report."""
+    get_failure_report().add(method, item, error)
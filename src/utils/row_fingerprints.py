@@ -0,0 +1,236 @@
+import itertools
+import operator
+import os
+import threading
+
+from config import config
+from logger import logger
+from utils.lazy_import import LazyImport
+from utils.track import Track, as_track
+
+np = LazyImport("numpy")
+pd = LazyImport("pandas")
+
+# Stored with the fingerprints; a store written with another hash is ignored.
+HASHER = "pandas.hash_array/2"
+
+
+def hash_strings(values):
+    """Return a uint64 fingerprint per string (or None), hashed in one vectorized call."""
+    # Rows are nearly all distinct, so factorizing them first would only add work.
+    return pd.util.hash_array(np.asarray(values, dtype=object), categorize=False)
+
+
+def combine_hashes(*columns):
+    """Combine per-column uint64 hashes into one hash per row (order matters)."""
+    combined = np.full(len(columns[0]), 0x345678, dtype=np.uint64)
+    multiplier = np.uint64(1000003)
+    for column in columns:
+        combined = (combined ^ column) * multiplier
+        multiplier += np.uint64(82520)
+    return combined + np.uint64(97531)
+
+
+def isin(values, stored):
+    """``np.isin(values, stored)`` for uint64 hashes, through a pandas hash table."""
+    if not len(stored):
+        return np.zeros(len(values), dtype=bool)
+    return pd.Index(values).isin(stored)
+
+
+class RowFingerprints:
+    """Fingerprints of the CSV rows that a previous complete run uploaded.
+
+    Each row has a key hash (playlist and search query) and a row hash (the
+    key plus its ISRC and Spotify ID). A row whose row hash is stored is
+    unchanged and needs no work; a row whose key is stored under another
+    row hash has changed; any other row is new. Stored keys missing from
+    the CSV are removed rows.
+
+    delta() classifies a whole parsed CSV (or a streamed chunk) by hashing
+    each column once (no per-row strings are built) and looking the hashes
+    up in a hash table, and remembers what it saw;
+    commit() then stores the unchanged rows plus the new and changed rows
+    that were uploaded, so songs not found are tried again next time.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._names = []  # Interned playlist names, indexed by the playlist arrays
+        self._name_index = {}
+        self._keys = np.zeros(0, dtype=np.uint64)
+        self._rows = np.zeros(0, dtype=np.uint64)
+        self._playlists = np.zeros(0, dtype=np.int32)
+        self._seen_keys = []
+        self._kept = []  # (keys, rows, playlists) arrays of unchanged rows
+        self._new = []  # (playlist, query, key, row) of new and changed rows
+        self._load()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _intern(self, name):
+        index = self._name_index.get(name)
+        if index is None:
+            index = self._name_index[name] = len(self._names)
+            self._names.append(name)
+        return index
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data["hasher"]) != HASHER:
+                    logger.info(f"Ignoring row fingerprints '{self.path}' from another version.")
+                    return
+                names = data["names"].tolist()
+                keys, rows, playlists = data["keys"], data["rows"], data["playlists"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable row fingerprints '{self.path}': {e}")
+            return
+        for name in names:
+            self._intern(name)
+        self._keys, self._rows, self._playlists = keys, rows, playlists
+        logger.debug(f"Loaded {len(keys)} row fingerprints from '{self.path}'.")
+
+    def delta(self, playlists):
+        """Split parsed playlists into the rows that need work and a per-playlist summary.
+
+        Args:
+            playlists (dict): Playlist name -> songs (Tracks or queries).
+
+        Returns:
+            tuple: ``(pending, summary)`` where ``pending`` maps every
+            playlist name to its new and changed Tracks, in CSV order, and
+            ``summary`` maps it to counts of ``added``, ``changed`` and
+            ``unchanged`` rows.
+        """
+        pending = {name: [] for name in playlists}
+        summary = {name: {"added": 0, "changed": 0, "unchanged": 0} for name in playlists}
+        tracks = list(itertools.chain.from_iterable(playlists.values()))
+        if not tracks:
+            return pending, summary
+        if set(map(type, tracks)) != {Track}:
+            tracks = [as_track(song) for song in tracks]
+        counts = [len(songs) for songs in playlists.values()]
+
+        # Hash each column once; playlist names are hashed once per playlist.
+        query, isrc, spotify_id = (
+            hash_strings(np.fromiter(map(operator.itemgetter(field), tracks), object, len(tracks)))
+            for field in range(len(Track._fields))
+        )
+        positions = np.repeat(np.arange(len(playlists)), counts)
+        keys = combine_hashes(hash_strings(list(playlists))[positions], query)
+        rows = combine_hashes(keys, isrc, spotify_id)
+        with self._lock:
+            playlist_indices = np.array(
+                [self._intern(name) for name in playlists], dtype=np.int32
+            )
+            indices = playlist_indices[positions]
+            unchanged = isin(rows, self._rows)
+            # Only rows whose row hash is unknown can be changed ones.
+            changed = ~unchanged
+            changed[changed] = isin(keys[changed], self._keys)
+            self._seen_keys.append(keys)
+            self._kept.append((keys[unchanged], rows[unchanged], indices[unchanged]))
+            for position in np.flatnonzero(~unchanged):
+                name = self._names[indices[position]]
+                pending[name].append(tracks[position])
+                self._new.append((name, tracks[position].query, keys[position], rows[position]))
+
+        size = len(self._names)
+        for label, mask in (
+            ("unchanged", unchanged),
+            ("changed", changed),
+            ("added", ~unchanged & ~changed),
+        ):
+            per_playlist = np.bincount(indices[mask], minlength=size)
+            for name in playlists:
+                summary[name][label] = int(per_playlist[self._name_index[name]])
+        return pending, summary
+
+    def removed(self):
+        """Return {playlist name: rows} stored by the last complete run but not seen since."""
+        with self._lock:
+            seen = np.concatenate(self._seen_keys) if self._seen_keys else self._keys[:0]
+            missing = self._playlists[~isin(self._keys, seen)]
+        counts = np.bincount(missing, minlength=len(self._names))
+        return {self._names[index]: int(count) for index, count in enumerate(counts) if count}
+
+    def commit(self, is_uploaded):
+        """Store the fingerprints of this run's CSV and save them.
+
+        Unchanged rows are kept; new and changed rows are stored only if
+        ``is_uploaded(playlist, query)`` is True. Rows that were not seen in
+        this run are dropped.
+        """
+        with self._lock:
+            parts = list(self._kept)
+            uploaded = [entry for entry in self._new if is_uploaded(entry[0], entry[1])]
+            if uploaded:
+                parts.append(
+                    (
+                        np.array([entry[2] for entry in uploaded], dtype=np.uint64),
+                        np.array([entry[3] for entry in uploaded], dtype=np.uint64),
+                        np.array(
+                            [self._intern(entry[0]) for entry in uploaded], dtype=np.int32
+                        ),
+                    )
+                )
+            if parts:
+                self._keys, self._rows, self._playlists = (
+                    np.concatenate([part[column] for part in parts]) for column in range(3)
+                )
+            else:
+                self._keys = self._keys[:0]
+                self._rows = self._rows[:0]
+                self._playlists = self._playlists[:0]
+            self._seen_keys, self._kept, self._new = [], [], []
+        self.save()
+        logger.debug(f"Stored {len(self._keys)} row fingerprints.")
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock, open(tmp_path, "wb") as file:
+            np.savez(
+                file,
+                hasher=np.array(HASHER),
+                names=np.array(self._names, dtype=str),
+                keys=self._keys,
+                rows=self._rows,
+                playlists=self._playlists,
+            )
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        """Forget every fingerprint, on disk and in memory."""
+        with self._lock:
+            self._keys = self._keys[:0]
+            self._rows = self._rows[:0]
+            self._playlists = self._playlists[:0]
+            self._seen_keys, self._kept, self._new = [], [], []
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+
+_row_fingerprints = None
+
+
+def get_row_fingerprints():
+    """Return the shared row fingerprint store configured in config.yaml, or None if disabled."""
+    global _row_fingerprints
+    fingerprint_config = config.get("row_fingerprints", {}) or {}
+    if not fingerprint_config.get("enabled", False):
+        return None
+    if _row_fingerprints is None:
+        _row_fingerprints = RowFingerprints(
+            fingerprint_config.get("path", os.path.join(".cache", "row_fingerprints.npz"))
+        )
+    return _row_fingerprints
@@ -0,0 +1,276 @@
+import json
+import os
+import threading
+from collections import Counter
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from config import config
+from logger import logger
+from utils.job_model import (
+    STATUS_BITS,
+    STATUS_CODES,
+    get_video_handles,
+    intern_text,
+    pack_outcome,
+    unpack_outcome,
+)
+
+# Outcomes after which a (playlist, query) row needs no more work.
+DONE_STATUSES = {"added", "exists", "not_found"}
+_DONE_CODES = frozenset(STATUS_CODES[status] for status in DONE_STATUSES)
+_STATUS_MASK = (1 << STATUS_BITS) - 1
+
+
+def _as_record(playlist, query, packed):
+    video_id, status = unpack_outcome(packed)
+    return {"playlist": playlist, "query": query, "video_id": video_id, "status": status}
+
+
+class JournalState(Mapping):
+    """Read-only view of a journal's latest records, keyed by ``(playlist, query)``."""
+
+    def __init__(self, state):
+        self._state = state
+
+    def __getitem__(self, key):
+        playlist, query = key
+        return _as_record(playlist, query, self._state[playlist][query])
+
+    def __iter__(self):
+        for playlist, outcomes in self._state.items():
+            for query in outcomes:
+                yield playlist, query
+
+    def __len__(self):
+        return sum(len(outcomes) for outcomes in self._state.values())
+
+
+class RunJournal:
+    """Append-only JSON-lines journal of per-song outcomes.
+
+    Each record is ``{"playlist", "query", "video_id", "status"}`` where status
+    is one of ``searched`` (video found, insert pending), ``added``, ``exists``,
+    ``not_found``, ``failed`` or ``rejected`` (the user rejected the video).
+    Records are buffered and written with an fsync every ``sync_every``
+    records (and on ``flush()``), so a crash loses at most one batch of
+    outcomes. Inside ``background_writes()`` full batches are written by a
+    writer thread instead of the thread that recorded them.
+
+    In memory the latest outcome of each song is one packed int (video
+    handle and status code, see utils/job_model.py) under interned
+    playlist and query strings, so replaying a journal of a few hundred
+    thousand songs stays small.
+    """
+
+    def __init__(self, path, sync_every=50):
+        self.path = path
+        self.sync_every = max(1, sync_every)
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._state = {}  # playlist -> {query: packed outcome}
+        self._writer = None  # Single-thread executor inside background_writes()
+        self._last_write = None
+
+    def replay(self):
+        """Load the journal from disk and return the latest record per (playlist, query)."""
+        state = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as file:
+                for line_number, line in enumerate(file, start=1):
+                    try:
+                        record = json.loads(line)
+                        outcome = pack_outcome(record["video_id"], record["status"])
+                        playlist = intern_text(record["playlist"])
+                        outcomes = state.get(playlist)
+                        if outcomes is None:
+                            outcomes = state[playlist] = {}
+                        outcomes[intern_text(record["query"])] = outcome
+                    except (ValueError, KeyError):
+                        # A torn final line from a crash; everything before it is intact.
+                        logger.warning(
+                            f"Ignoring unreadable journal line {line_number} in '{self.path}'."
+                        )
+        self._state = state
+        replayed = JournalState(state)
+        logger.debug(f"Replayed {len(replayed)} journal records from '{self.path}'.")
+        return replayed
+
+    def _outcome(self, playlist, query):
+        outcomes = self._state.get(playlist)
+        return outcomes.get(query) if outcomes is not None else None
+
+    def get(self, playlist, query):
+        packed = self._outcome(playlist, query)
+        return _as_record(playlist, query, packed) if packed is not None else None
+
+    def is_done(self, playlist, query):
+        packed = self._outcome(playlist, query)
+        return packed is not None and (packed & _STATUS_MASK) in _DONE_CODES
+
+    def record(self, playlist, query, video_id, status):
+        record = {
+            "playlist": playlist,
+            "query": query,
+            "video_id": video_id,
+            "status": status,
+        }
+        outcome = pack_outcome(video_id, status)
+        with self._lock:
+            outcomes = self._state.get(playlist)
+            if outcomes is None:
+                outcomes = self._state[intern_text(playlist)] = {}
+            outcomes[query] = outcome
+            self._buffer.append(json.dumps(record, ensure_ascii=False))
+            if len(self._buffer) >= self.sync_every:
+                self._write_buffer()
+
+    def reject_video(self, video_id):
+        """Reopen the songs that were matched to ``video_id`` so they are searched again.
+
+        Returns:
+            int: The number of songs reopened.
+        """
+        handle = get_video_handles().find(video_id)
+        if not handle:
+            return 0
+        with self._lock:
+            keys = [
+                (playlist, query)
+                for playlist, outcomes in self._state.items()
+                for query, packed in outcomes.items()
+                if packed >> STATUS_BITS == handle
+            ]
+        for playlist, query in keys:
+            self.record(playlist, query, None, "rejected")
+        return len(keys)
+
+    def flush(self):
+        """Write buffered records and fsync them to disk (waiting for the writer thread)."""
+        with self._lock:
+            self._write_buffer()
+            last_write = self._last_write
+        if last_write is not None:
+            last_write.result()
+
+    @contextmanager
+    def background_writes(self):
+        """Hand full batches to a writer thread while the ``with`` block runs.
+
+        Used by the async engine, so an fsync never stalls the event loop.
+        Batches are still written in order; flush() waits for them.
+        """
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal-writer")
+        try:
+            yield self
+        finally:
+            with self._lock:
+                writer, self._writer = self._writer, None
+            writer.shutdown(wait=True)
+
+    def _write_buffer(self):
+        """Write out the buffered records; called with the lock held."""
+        if not self._buffer:
+            return
+        if self._writer is None:
+            self._write(self._buffer)
+            self._buffer = []
+            return
+        lines, self._buffer = self._buffer, []
+        self._last_write = self._writer.submit(self._write, lines)
+        self._last_write.add_done_callback(self._log_write_error)
+
+    def _log_write_error(self, future):
+        if future.exception() is not None:
+            logger.error(f"Could not write to the run journal: {future.exception()}")
+
+    def _write(self, lines):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def reset(self):
+        """Discard all recorded outcomes, on disk and in memory."""
+        with self._lock:
+            self._buffer = []
+            self._state = {}
+            last_write = self._last_write
+        if last_write is not None:
+            # Let a pending write finish, so it does not recreate the file.
+            last_write.exception()
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def for_playlist(self, playlist):
+        return PlaylistJournal(self, playlist)
+
+    def fork(self, path):
+        """Return a journal that starts from this one's state but writes to ``path``.
+
+        Worker processes journal to their own file, merged back with merge().
+        """
+        journal = RunJournal(path, sync_every=self.sync_every)
+        journal._state = {playlist: dict(outcomes) for playlist, outcomes in self._state.items()}
+        return journal
+
+    def merge(self, path):
+        """Append the records journaled at ``path`` to this journal and delete that file.
+
+        Returns:
+            collections.Counter: Number of songs per final status in the merged file.
+        """
+        latest = {}
+        if not os.path.exists(path):
+            return Counter()
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                    self.record(
+                        record["playlist"], record["query"], record["video_id"], record["status"]
+                    )
+                except (ValueError, KeyError):
+                    continue
+                latest[(record["playlist"], record["query"])] = record["status"]
+        self.flush()
+        os.remove(path)
+        return Counter(latest.values())
+
+
+class PlaylistJournal:
+    """View of a RunJournal bound to a single playlist name."""
+
+    def __init__(self, journal, playlist):
+        self.journal = journal
+        self.playlist = playlist
+
+    def is_done(self, query):
+        return self.journal.is_done(self.playlist, query)
+
+    def resolved_video(self, query):
+        """Return the video ID found by an earlier search whose insert is still pending."""
+        record = self.journal.get(self.playlist, query)
+        if record is not None and record["status"] == "searched":
+            return record["video_id"]
+        return None
+
+    def record(self, query, video_id, status):
+        self.journal.record(self.playlist, query, video_id, status)
+
+    def flush(self):
+        self.journal.flush()
+
+
+def get_run_journal():
+    """Return a RunJournal configured from the ``journal`` section of config.yaml."""
+    journal_config = config.get("journal", {}) or {}
+    return RunJournal(
+        journal_config.get("path", os.path.join(".cache", "run_journal.jsonl")),
+        sync_every=journal_config.get("sync_every", 50),
+    )
@@ -0,0 +1,285 @@
+import atexit
+import json
+import os
+import re
+import threading
+import time
+
+from config import config
+from logger import logger
+from utils.sqlite_db import connect, skip_if_locked
+
+# Sentinel returned by SearchCache.get() when nothing usable is cached.
+MISS = object()
+
+# Expired and excess candidate lists are purged at open and after this many writes.
+CANDIDATE_PURGE_EVERY = 1000
+
+
+def normalize_query(query):
+    """Normalize a search query so trivial spacing/case differences share a cache entry."""
+    return re.sub(r"\s+", " ", str(query)).strip().casefold()
+
+
+class SearchCache:
+    """Persistent SQLite cache of search results with TTL and LRU eviction.
+
+    Entries are keyed by the normalized query plus the video category ID.
+    A ``None`` video ID is stored as a negative result and expires after
+    ``negative_ttl`` seconds instead of ``ttl``. Cache hits only note their
+    access time in memory; the times are written in one statement with the
+    next set(), or by flush() at exit, so a fully cached run does not
+    commit a transaction per song.
+
+    With ranking enabled, every candidate a search returned is kept as
+    well (for ``ttl`` seconds, at most ``max_entries`` queries), together
+    with the videos the user rejected, so a rejected choice is replaced
+    from the candidates without searching.
+    """
+
+    def __init__(self, path, ttl=30 * 86400, negative_ttl=86400, max_entries=100000):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._accessed = {}  # (query, category_id) -> access time not yet written
+        self._conn = connect(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS search_results (
+                query TEXT NOT NULL,
+                category_id TEXT NOT NULL,
+                video_id TEXT,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (query, category_id)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_search_results_last_access "
+            "ON search_results (last_access)"
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS search_candidates (
+                query TEXT NOT NULL,
+                category_id TEXT NOT NULL,
+                candidates TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (query, category_id)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_search_candidates_created_at "
+            "ON search_candidates (created_at)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rejected_videos (video_id TEXT PRIMARY KEY)"
+        )
+        self._conn.commit()
+        self._candidate_writes = 0
+        with skip_if_locked(self._conn, "purging expired search candidates"):
+            self._purge_candidates(time.time())
+            self._conn.commit()
+        # Read on every ranked search, so it is loaded once and kept in memory.
+        self._rejected = frozenset(
+            video_id
+            for (video_id,) in self._conn.execute("SELECT video_id FROM rejected_videos")
+        )
+        # Kept up to date by set() and eviction, so eviction does not count the table.
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM search_results").fetchone()
+        atexit.register(self.flush)
+
+    def get(self, query, category_id):
+        """Return the cached video ID (or None for a negative entry), or MISS.
+
+        An expired entry is left in place; the next set() replaces it.
+        """
+        key = (normalize_query(query), str(category_id))
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT video_id, created_at FROM search_results "
+                "WHERE query = ? AND category_id = ?",
+                key,
+            ).fetchone()
+            if row is not None:
+                video_id, created_at = row
+                ttl = self.ttl if video_id is not None else self.negative_ttl
+                if now - created_at <= ttl:
+                    self._accessed[key] = now
+                    self.hits += 1
+                    return video_id
+            self.misses += 1
+            return MISS
+
+    def peek(self, query, category_id):
+        """Like get() but without touching counters or LRU order."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT video_id, created_at FROM search_results "
+                "WHERE query = ? AND category_id = ?",
+                (normalize_query(query), str(category_id)),
+            ).fetchone()
+        if row is None:
+            return MISS
+        video_id, created_at = row
+        ttl = self.ttl if video_id is not None else self.negative_ttl
+        return video_id if time.time() - created_at <= ttl else MISS
+
+    def set(self, query, category_id, video_id):
+        """Store a search result; ``video_id=None`` records a negative result."""
+        key = (normalize_query(query), str(category_id))
+        now = time.time()
+        with self._lock, skip_if_locked(self._conn, f"caching the result for '{query}'"):
+            exists = self._conn.execute(
+                "SELECT 1 FROM search_results WHERE query = ? AND category_id = ?", key
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_results "
+                "(query, category_id, video_id, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (*key, video_id, now, now),
+            )
+            self._accessed.pop(key, None)
+            if exists is None:
+                self._count += 1
+            self._write_access_times()
+            self._evict()
+            self._conn.commit()
+
+    def get_candidates(self, query, category_id):
+        """Return the cached candidates of a query as lists of fields, or MISS."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT candidates, created_at FROM search_candidates "
+                "WHERE query = ? AND category_id = ?",
+                (normalize_query(query), str(category_id)),
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return MISS
+        return json.loads(row[0])
+
+    def set_candidates(self, query, category_id, candidates):
+        """Store every candidate a search returned (tuples of JSON-serializable fields)."""
+        now = time.time()
+        with self._lock, skip_if_locked(self._conn, f"caching the candidates for '{query}'"):
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_candidates "
+                "(query, category_id, candidates, created_at) VALUES (?, ?, ?, ?)",
+                (
+                    normalize_query(query),
+                    str(category_id),
+                    json.dumps([list(candidate) for candidate in candidates]),
+                    now,
+                ),
+            )
+            self._candidate_writes += 1
+            if self._candidate_writes % CANDIDATE_PURGE_EVERY == 0:
+                self._purge_candidates(now)
+            self._conn.commit()
+
+    def reject(self, video_id):
+        """Never choose ``video_id`` again; cached results that chose it are dropped.
+
+        Returns:
+            int: The number of cached search results dropped.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO rejected_videos (video_id) VALUES (?)", (video_id,)
+            )
+            dropped = self._conn.execute(
+                "DELETE FROM search_results WHERE video_id = ?", (video_id,)
+            ).rowcount
+            self._count -= dropped
+            self._conn.commit()
+            self._rejected = self._rejected | {video_id}
+        return dropped
+
+    def rejected(self):
+        """Return the (frozen) set of rejected video IDs."""
+        return self._rejected
+
+    def _purge_candidates(self, now):
+        """Drop expired candidate lists and the oldest beyond ``max_entries``."""
+        self._conn.execute(
+            "DELETE FROM search_candidates WHERE created_at < ?", (now - self.ttl,)
+        )
+        if self.max_entries:
+            self._conn.execute(
+                "DELETE FROM search_candidates WHERE rowid IN ("
+                "SELECT rowid FROM search_candidates ORDER BY created_at DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def _write_access_times(self):
+        """Write the access times noted by cache hits; called with the lock held."""
+        if self._accessed:
+            self._conn.executemany(
+                "UPDATE search_results SET last_access = ? WHERE query = ? AND category_id = ?",
+                [(at, *key) for key, at in self._accessed.items()],
+            )
+            self._accessed = {}
+
+    def _evict(self):
+        """Drop the least recently used entries beyond ``max_entries``."""
+        if not self.max_entries:
+            return
+        excess = self._count - self.max_entries
+        if excess > 0:
+            self._count -= self._conn.execute(
+                "DELETE FROM search_results WHERE rowid IN ("
+                "SELECT rowid FROM search_results ORDER BY last_access ASC LIMIT ?)",
+                (excess,),
+            ).rowcount
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM search_results"
+            ).fetchone()
+        return count
+
+    def stats(self):
+        """Return hit/miss counters for reporting."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
+
+    def flush(self):
+        """Write the access times of cache hits since the last set()."""
+        with self._lock, skip_if_locked(self._conn, "saving search cache access times"):
+            if self._accessed:
+                self._write_access_times()
+                self._conn.commit()
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+        with self._lock:
+            self._conn.close()
+
+
+_search_cache = None
+
+
+def get_search_cache():
+    """Return the shared search cache configured in config.yaml, or None if disabled."""
+    global _search_cache
+    cache_config = config.get("search_cache", {}) or {}
+    if not cache_config.get("enabled", False):
+        return None
+    if _search_cache is None:
+        _search_cache = SearchCache(
+            cache_config.get("path", os.path.join(".cache", "search_cache.sqlite3")),
+            ttl=cache_config.get("ttl_seconds", 30 * 86400),
+            negative_ttl=cache_config.get("negative_ttl_seconds", 86400),
+            max_entries=cache_config.get("max_entries", 100000),
+        )
+        logger.debug(f"Opened search cache at '{_search_cache.path}'.")
+    return _search_cache
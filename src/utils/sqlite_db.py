@@ -0,0 +1,47 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+from logger import logger
+
+# Seconds a connection waits for another process's write lock before giving up.
+BUSY_TIMEOUT = 30.0
+
+
+def connect(path):
+    """Open a SQLite database that several worker processes may use at once.
+
+    In WAL mode readers never wait for a writer, and writers wait up to
+    ``BUSY_TIMEOUT`` seconds for each other instead of failing at once.
+    """
+    directory = os.path.dirname(path)
+    if directory and path != ":memory:":
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+    if path != ":memory:":
+        conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def is_locked(error):
+    """Return True if a SQLite error means another connection held the lock too long."""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and (
+        "locked" in message or "busy" in message
+    )
+
+
+@contextmanager
+def skip_if_locked(conn, action):
+    """Roll back and log instead of failing when the database stays locked.
+
+    For writes that only save work for later, such as caching a search
+    result: losing one is better than stopping the run.
+    """
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if not is_locked(e):
+            raise
+        conn.rollback()
+        logger.warning(f"Skipped {action}: the database is locked ({e}).")
@@ -0,0 +1,26 @@
+import math
+from collections import namedtuple
+
+
+def clean_identifier(value, upper=False):
+    """Return a stripped identifier string, or None for blanks and NaN."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    value = str(value).strip()
+    if not value or value.lower() == "nan":
+        return None
+    return value.replace("-", "").upper() if upper else value
+
+
+class Track(namedtuple("Track", ["query", "isrc", "spotify_id"], defaults=(None, None))):
+    """A CSV row to upload: its search query plus optional recording identifiers."""
+
+    __slots__ = ()
+
+    def __str__(self):
+        return self.query
+
+
+def as_track(song):
+    """Return ``song`` as a Track; plain query strings get no identifiers."""
+    return song if isinstance(song, Track) else Track(str(song))
@@ -0,0 +1,238 @@
+import copy
+import glob
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from logging.handlers import QueueHandler, QueueListener
+
+from authentication.service_factory import ServiceFactory
+from config import config
+from logger import configure_song_lines, log_handlers, logger
+from playlist_management import playlist_mirror
+from playlist_management.playlist_mirror import get_playlist_mirror
+from utils import metrics, quota, retry
+from utils.query_normalizer import QueryMemo
+from utils.quota import QuotaExhausted, QuotaLedger, get_quota_ledger
+from utils.run_journal import get_run_journal
+
+
+def worker_journal_path(journal_path, index):
+    return f"{journal_path}.worker-{index}"
+
+
+def partition_playlists(chunks, workers):
+    """Split ``(name, songs)`` chunks into at most ``workers`` balanced partitions.
+
+    All chunks of a playlist go to the same partition, so no two processes
+    create or insert into the same playlist. Playlists are assigned largest
+    first to the partition with the fewest songs so far.
+
+    Returns:
+        list: Non-empty lists of ``(name, songs)`` chunks.
+    """
+    groups = {}
+    for name, songs in chunks:
+        groups.setdefault(name.lower(), []).append((name, songs))
+    partitions = [[] for _ in range(max(1, workers))]
+    loads = [0] * len(partitions)
+    for group in sorted(
+        groups.values(), key=lambda group: sum(len(songs) for _, songs in group), reverse=True
+    ):
+        target = loads.index(min(loads))
+        partitions[target].extend(group)
+        loads[target] += sum(len(songs) for _, songs in group)
+    return [partition for partition in partitions if partition]
+
+
+def _worker_config(workers):
+    """Return the configuration for worker processes.
+
+    The rate limit is divided between the workers so the run as a whole
+    keeps to ``rate_limit.qps``. The credential pool is not shared across
+    processes, so workers use the main credentials only.
+    """
+    worker_config = copy.deepcopy(dict(config))
+    rate_limit = worker_config.get("rate_limit") or {}
+    if rate_limit:
+        worker_config["rate_limit"] = {
+            **rate_limit,
+            "qps": rate_limit.get("qps", 1) / workers,
+            "burst": max(1, int(rate_limit.get("burst", 5)) // workers),
+        }
+    if (worker_config.get("credential_pool") or {}).get("enabled"):
+        logger.warning("The credential pool is not used in worker processes.")
+        worker_config["credential_pool"] = {"enabled": False}
+    return worker_config
+
+
+def _forward_logs(log_queue, index):
+    """Send this process's log records to the coordinator, tagged with the worker number."""
+
+    def tag(record):
+        record.msg = f"[worker {index}] {record.getMessage()}"
+        record.args = None
+        return True
+
+    handler = QueueHandler(log_queue)
+    handler.addFilter(tag)
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    level = (config.get("logging", {}) or {}).get("level", "INFO").upper()
+    root.setLevel(getattr(logging, level, logging.INFO))
+    configure_song_lines()
+
+
+def run_worker(
+    index, worker_config, log_queue, credentials, playlists, existing_playlists, budget, process
+):
+    """Process one partition of playlists in a worker process.
+
+    Builds its own service object, charges an in-memory ledger holding its
+    share of the quota budget and journals to its own file. ``process`` is
+    called like main.process_playlists for every playlist chunk. Everything
+    the coordinator needs to merge is returned.
+
+    Returns:
+        dict: ``quota`` (units per method), ``failures``, ``metrics``
+        snapshot, ``mirror_items``, ``memo_saved``, ``breaker_trips`` and
+        whether the worker stopped on ``quota_exhausted``.
+    """
+    config.use(worker_config)
+    _forward_logs(log_queue, index)
+    # Start from fresh process-wide state in case the process ran a task before.
+    quota._quota_ledger = QuotaLedger(None, daily_limit=budget)
+    retry._circuit_breaker = None
+    retry._failure_report = retry.FailureReport()
+    metrics._metrics = metrics.MetricsRegistry()
+    playlist_mirror._playlist_mirror = None
+
+    journal = get_run_journal()
+    journal.replay()
+    journal = journal.fork(worker_journal_path(journal.path, index))
+    mirror = get_playlist_mirror()
+    if mirror is not None:
+        # Read the shared mirror but leave writing it to the coordinator.
+        mirror.path = None
+    memo = QueryMemo()
+    video_sets = {}
+    quota_exhausted = False
+    youtube = ServiceFactory(credentials)
+    try:
+        for done, (playlist_name, songs) in enumerate(playlists, start=1):
+            process(youtube, playlist_name, songs, existing_playlists, journal, video_sets, memo)
+            logger.info(f"Progress: {done}/{len(playlists)} playlist chunks done.")
+    except QuotaExhausted as e:
+        logger.warning(f"Stopping: quota share exhausted ({e}).")
+        quota_exhausted = True
+    finally:
+        journal.flush()
+    return {
+        "quota": quota.get_quota_ledger().spent_by_method(),
+        "failures": list(retry.get_failure_report().failures),
+        "metrics": metrics.get_metrics().snapshot(),
+        "mirror_items": {
+            playlist_id: mirror.items[playlist_id]
+            for playlist_id in video_sets
+            if mirror is not None and playlist_id in mirror.items
+        },
+        "memo_saved": memo.saved,
+        "breaker_trips": retry.get_circuit_breaker().trips,
+        "quota_exhausted": quota_exhausted,
+    }
+
+
+def recover_worker_journals(journal):
+    """Merge journals left behind by workers of an interrupted run into ``journal``."""
+    for path in sorted(glob.glob(worker_journal_path(glob.escape(journal.path), "*"))):
+        journal.merge(path)
+        logger.info(f"Recovered worker journal '{path}'.")
+
+
+def run_workers(credentials, chunks, existing_playlists, journal, memo, workers, process):
+    """Process playlist chunks on ``workers`` processes and merge their results.
+
+    Each worker gets a partition of the playlists and a share of the
+    remaining quota proportional to its number of songs, and calls
+    ``process`` (a picklable module-level function, such as
+    main.process_playlists) for each of its chunks. Worker logs are
+    forwarded to this process's handlers as they happen. Afterwards the
+    worker journals, quota spent, failures, metrics and mirrored playlist
+    items are merged here and summarized in one log line.
+
+    Raises:
+        QuotaExhausted: If any worker ran out of its quota share.
+    """
+    partitions = partition_playlists(chunks, workers)
+    if not partitions:
+        return
+    loads = [sum(len(songs) for _, songs in partition) for partition in partitions]
+    ledger = get_quota_ledger()
+    remaining = ledger.remaining()
+    budgets = [
+        None if remaining is None else remaining * load // max(1, sum(loads)) for load in loads
+    ]
+    logger.info(
+        f"Processing {len(chunks)} playlist chunks on {len(partitions)} worker processes."
+    )
+
+    context = multiprocessing.get_context("spawn")
+    manager = context.Manager()
+    log_queue = manager.Queue()
+    listener = QueueListener(log_queue, *log_handlers(), respect_handler_level=True)
+    listener.start()
+    worker_config = _worker_config(len(partitions))
+    results = {}
+    try:
+        with ProcessPoolExecutor(max_workers=len(partitions), mp_context=context) as executor:
+            futures = {
+                executor.submit(
+                    run_worker,
+                    index,
+                    worker_config,
+                    log_queue,
+                    credentials,
+                    partition,
+                    existing_playlists,
+                    budget,
+                    process,
+                ): index
+                for index, (partition, budget) in enumerate(zip(partitions, budgets), start=1)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    logger.error(f"Worker {index} failed: {e}")
+    finally:
+        listener.stop()
+        manager.shutdown()
+        statuses = {}
+        for index in range(1, len(partitions) + 1):
+            merged = journal.merge(worker_journal_path(journal.path, index))
+            for status, count in merged.items():
+                statuses[status] = statuses.get(status, 0) + count
+        _merge_results(results.values(), memo)
+        summary = ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items()))
+        logger.info(
+            f"{len(results)} of {len(partitions)} workers finished. Songs by outcome: "
+            f"{summary or 'none'}."
+        )
+    if any(result["quota_exhausted"] for result in results.values()):
+        raise QuotaExhausted("A worker used up its share of the daily quota.")
+
+
+def _merge_results(results, memo):
+    ledger = get_quota_ledger()
+    report = retry.get_failure_report()
+    registry = metrics.get_metrics()
+    mirror = get_playlist_mirror()
+    for result in results:
+        ledger.record_spent(result["quota"])
+        report.extend(result["failures"])
+        registry.merge(result["metrics"])
+        if mirror is not None and result["mirror_items"]:
+            mirror.update_items(result["mirror_items"])
+        if memo is not None:
+            memo.saved += result["memo_saved"]
+        retry.get_circuit_breaker().trips += result["breaker_trips"]
@@ -4,6 +4,36 @@ from unittest.mock import MagicMock, patch
 from src.utils.encoding_detector import detect_file_encoding
 
 
+@pytest.fixture(autouse=True)
+def isolated_state(monkeypatch):
+    """
+    Disables the on-disk caches (search cache, playlist mirror, match index,
+    row fingerprints, encoding cache and discovery cache) and the credential
+    pool, uses an in-memory quota ledger, makes retries instant and gives
+    each test a fresh metrics registry.
+    """
+    from authentication import credential_pool
+    from config import config
+    from utils import metrics, quota, retry
+
+    monkeypatch.setitem(config, "search_cache", {"enabled": False})
+    monkeypatch.setitem(config, "playlist_mirror", {"enabled": False})
+    monkeypatch.setitem(config, "match_index", {"enabled": False})
+    monkeypatch.setitem(config, "row_fingerprints", {"enabled": False})
+    monkeypatch.setitem(config, "encoding_cache", {"enabled": False})
+    monkeypatch.setitem(config, "metrics", {"enabled": False})
+    monkeypatch.setitem(config, "credential_pool", {"enabled": False})
+    monkeypatch.setitem(config, "discovery", {"enabled": False})
+    monkeypatch.setattr(credential_pool, "_credential_pool", None)
+    monkeypatch.setattr(metrics, "_metrics", metrics.MetricsRegistry())
+    monkeypatch.setattr(quota, "_quota_ledger", quota.QuotaLedger(None))
+    monkeypatch.setattr(
+        retry, "_retry_policy", retry.RetryPolicy(base_delay=0, sleep=lambda seconds: None)
+    )
+    monkeypatch.setattr(retry, "_circuit_breaker", retry.CircuitBreaker(min_calls=1000))
+    monkeypatch.setattr(retry, "_failure_report", retry.FailureReport())
+
+
 @pytest.fixture(scope="session")
 def test_csv_path():
     """
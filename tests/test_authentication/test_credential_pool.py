@@ -0,0 +1,155 @@
+import asyncio
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Add the src directory to sys.path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from authentication.credential_pool import CredentialPool, PooledCredential
+from utils.quota import QuotaExhausted, QuotaLedger, get_quota_ledger
+
+
+def member(name, daily_limit, allow_writes=False):
+    credential = PooledCredential(
+        name, f"{name}.json", f"{name}.pickle", QuotaLedger(None, daily_limit=daily_limit),
+        allow_writes=allow_writes,
+    )
+    credential._youtube = MagicMock(name=name)
+    return credential
+
+
+def test_acquire_picks_member_with_most_quota_left():
+    main, extra = member("main", 1000, allow_writes=True), member("extra", 500)
+    pool = CredentialPool([main, extra])
+
+    assert pool.acquire("search.list") is main
+    main.ledger.charge("search.list", 6)
+    assert pool.acquire("search.list") is extra
+    assert pool.remaining() == 900
+
+
+def test_writes_only_use_writable_members():
+    main, extra = member("main", 100, allow_writes=True), member("extra", 10000)
+    pool = CredentialPool([main, extra])
+
+    assert pool.acquire("playlistItems.insert") is main
+    main.ledger.charge("playlistItems.insert", 2)
+    with pytest.raises(QuotaExhausted):
+        pool.acquire("playlistItems.insert")
+    assert pool.acquire("search.list") is extra
+    assert pool.primary is main
+
+
+def test_call_charges_the_chosen_member_and_fails_over():
+    main, extra = member("main", 10000, allow_writes=True), member("extra", 5000)
+    pool = CredentialPool([main, extra])
+    used = []
+
+    def search(credential):
+        used.append(credential.name)
+        ledger = get_quota_ledger()
+        assert ledger is credential.ledger
+        if credential is main:
+            # The API reports the project's quota as exceeded.
+            ledger.mark_exhausted()
+            raise QuotaExhausted("quotaExceeded")
+        ledger.charge("search.list")
+        return "VID1"
+
+    assert pool.call("search.list", search) == "VID1"
+    assert used == ["main", "extra"]
+    assert main.exhausted and not extra.exhausted
+    assert extra.ledger.spent() == 100
+    # Outside of call() the shared ledger is charged again.
+    assert get_quota_ledger() is not extra.ledger
+
+
+def test_call_raises_once_every_member_is_exhausted():
+    pool = CredentialPool([member("main", 100, allow_writes=True), member("extra", 100)])
+
+    def search(credential):
+        get_quota_ledger().charge("search.list")
+        get_quota_ledger().charge("search.list")
+
+    with pytest.raises(QuotaExhausted):
+        pool.call("search.list", search)
+    assert all(credential.exhausted for credential in pool.members)
+
+
+def test_call_async_binds_ledger_per_task():
+    main, extra = member("main", 300, allow_writes=True), member("extra", 300)
+    pool = CredentialPool([main, extra])
+
+    async def search(credential):
+        ledger = get_quota_ledger()
+        ledger.charge("search.list")
+        await asyncio.sleep(0)
+        assert get_quota_ledger() is ledger
+        return credential.name
+
+    async def run():
+        return await asyncio.gather(
+            *(pool.call_async("search.list", search) for _ in range(6))
+        )
+
+    names = asyncio.run(run())
+    assert sorted(names) == ["extra"] * 3 + ["main"] * 3
+    assert main.ledger.spent() == extra.ledger.spent() == 300
+
+
+def test_split_shares_items_by_remaining_quota():
+    main, extra = member("main", 250, allow_writes=True), member("extra", 500)
+    pool = CredentialPool([main, extra])
+    parts = []
+    for credential, part in pool.split("search.list", range(7)):
+        credential.ledger.charge("search.list", len(part))
+        parts.append((credential.name, part))
+
+    assert parts == [("extra", [0, 1, 2, 3, 4]), ("main", [5, 6])]
+    with pytest.raises(QuotaExhausted):
+        list(pool.split("search.list", ["one more"]))
+
+
+def test_resolve_track_searches_with_pooled_service():
+    import main as main_module
+    from utils.track import Track
+
+    main, extra = member("main", 100, allow_writes=True), member("extra", 1000)
+    pool = CredentialPool([main, extra])
+
+    with patch("playlist_management.pooled.get_credential_pool", return_value=pool), patch(
+        "main.search_video", return_value="VID1"
+    ) as mock_search:
+        assert main_module.resolve_track(main.youtube, Track("Creep Radiohead")) == "VID1"
+
+    mock_search.assert_called_once_with(extra.youtube, "Creep Radiohead")
+
+
+def test_authenticate_saves_refreshed_tokens_of_secondary_members():
+    main, extra = member("main", 1000, allow_writes=True), member("extra", 500)
+    pool = CredentialPool([main, extra])
+    primary_credentials = MagicMock()
+    extra_credentials = MagicMock(expiry=None, valid=True, token="old")
+
+    def refresh(request):
+        extra_credentials.token = "new"
+
+    extra_credentials.refresh.side_effect = refresh
+    with patch(
+        "authentication.credential_pool.get_credentials", return_value=extra_credentials
+    ) as get_credentials, patch("authentication.credential_pool.save_token") as save_token:
+        pool.authenticate(primary_credentials)
+        assert main.credentials is primary_credentials
+        assert main.refresher is None
+        assert extra.refresher is not None
+        extra.credentials.refresh(MagicMock())
+        pool.stop()
+
+    get_credentials.assert_called_once_with("extra.json", "extra.pickle", refresh=False)
+    save_token.assert_called_once_with(extra_credentials, token_path="extra.pickle")
+    assert extra.refresher is None
@@ -0,0 +1,127 @@
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+# Add the src directory to sys.path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from authentication import service_factory
+from authentication.service_factory import ServiceFactory, SharedCredentials
+
+
+class FakeCredentials:
+    """Credentials whose refresh is slow, so concurrent refreshes overlap."""
+
+    def __init__(self):
+        self.token = "expired"
+        self.valid = False
+        self.refreshes = 0
+
+    def refresh(self, request):
+        self.refreshes += 1
+        time.sleep(0.05)
+        self.token = f"token-{self.refreshes}"
+        self.valid = True
+
+    def apply(self, headers):
+        headers["authorization"] = f"Bearer {self.token}"
+
+
+def run_in_threads(func, count=4):
+    results = [None] * count
+
+    def run(index):
+        results[index] = func()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_refreshes_hit_the_token_endpoint_once():
+    credentials = FakeCredentials()
+    shared = SharedCredentials(credentials)
+
+    def request():
+        headers = {}
+        shared.before_request(None, "GET", "https://example.invalid", headers)
+        return headers["authorization"]
+
+    assert run_in_threads(request) == ["Bearer token-1"] * 4
+    assert credentials.refreshes == 1
+    assert shared.token == "token-1"
+
+
+def test_each_thread_gets_its_own_service_from_one_parsed_document(monkeypatch):
+    monkeypatch.setattr(service_factory, "_documents", {})
+    factory = ServiceFactory(FakeCredentials())
+
+    with patch.object(
+        service_factory.json, "loads", wraps=service_factory.json.loads
+    ) as mock_loads:
+        services = run_in_threads(factory.service)
+        services.append(factory.service())
+        services.append(factory.service())
+
+    assert mock_loads.call_count == 1
+    assert len({id(service) for service in services}) == 5
+    assert services[-1] is services[-2]
+    https = {id(service._http) for service in services}
+    assert len(https) == 5
+    assert all(service._http.credentials is factory.credentials for service in services)
+
+
+def test_factory_forwards_to_the_calling_threads_service():
+    factory = ServiceFactory(FakeCredentials(), client_options={"api_endpoint": "http://x"})
+
+    request = factory.search().list(part="snippet", q="Creep Radiohead")
+
+    assert request.uri.startswith("http://x/youtube/v3/search?")
+    assert request.http is factory.service()._http
+
+
+def test_discovery_document_is_cached_on_disk_per_library_version(monkeypatch, tmp_path):
+    from config import config
+
+    monkeypatch.setitem(config, "discovery", {"enabled": True, "cache_dir": str(tmp_path)})
+    monkeypatch.setattr(service_factory, "_documents", {})
+    document = service_factory.discovery_document()
+    cache_file = tmp_path / "youtube.v3.json"
+    assert cache_file.exists()
+
+    # A new process reads the primed document instead of the library's copy.
+    monkeypatch.setattr(service_factory, "_documents", {})
+    with patch.object(service_factory.discovery_cache, "get_static_doc") as mock_static:
+        assert service_factory.discovery_document() == document
+    mock_static.assert_not_called()
+
+    # After a library upgrade the cache is rebuilt.
+    monkeypatch.setattr(service_factory, "_documents", {})
+    monkeypatch.setattr(service_factory, "_library_version", lambda: "0.0-other")
+    with patch.object(
+        service_factory.discovery_cache,
+        "get_static_doc",
+        wraps=service_factory.discovery_cache.get_static_doc,
+    ) as mock_static:
+        service_factory.discovery_document()
+    mock_static.assert_called_once()
+
+
+def test_shared_credentials_report_refreshes_and_pickle_without_lock():
+    import pickle
+
+    refreshed = []
+    shared = SharedCredentials(FakeCredentials(), on_refresh=refreshed.append)
+    shared.refresh(None)
+    assert refreshed == [shared._credentials]
+
+    copy = pickle.loads(pickle.dumps(shared))
+    assert copy.token == "token-1"
+    assert copy._on_refresh is None
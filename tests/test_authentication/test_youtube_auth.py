@@ -6,7 +6,14 @@ from unittest.mock import patch, MagicMock
 # Adjust the path to import src modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
 
-from src.authentication.youtube_auth import authenticate_youtube
+from datetime import datetime, timedelta
+
+from src.authentication.youtube_auth import (
+    TokenRefresher,
+    authenticate_youtube,
+    load_token,
+    save_token,
+)
 
 
 @pytest.fixture
@@ -26,14 +33,16 @@ def mock_installed_app_flow():
 
 def test_authenticate_youtube_existing_token(mock_build, mock_installed_app_flow):
     """
-    Test authenticate_youtube when token.pickle exists and is valid.
+    Test authenticate_youtube when token.json exists and is valid.
     """
     with patch("src.authentication.youtube_auth.os.path.exists") as mock_exists, patch(
-        "src.authentication.youtube_auth.pickle"
-    ) as mock_pickle, patch("src.authentication.youtube_auth.Request") as mock_request:
+        "src.authentication.youtube_auth.Credentials"
+    ) as mock_credentials, patch("src.authentication.youtube_auth.Request") as mock_request:
 
         mock_exists.return_value = True
-        mock_pickle.load.return_value = MagicMock(valid=True, refresh_token=True)
+        mock_credentials.from_authorized_user_file.return_value = MagicMock(
+            valid=True, refresh_token=True
+        )
 
         youtube_service = MagicMock()
         mock_build.return_value = youtube_service
@@ -42,21 +51,23 @@ def test_authenticate_youtube_existing_token(mock_build, mock_installed_app_flow
 
         assert service == youtube_service
         mock_build.assert_called_once_with(
-            "youtube", "v3", credentials=mock_pickle.load.return_value
+            "youtube", "v3", credentials=mock_credentials.from_authorized_user_file.return_value
         )
 
 
 def test_authenticate_youtube_invalid_token(mock_build, mock_installed_app_flow):
     """
-    Test authenticate_youtube when token.pickle exists but is invalid or expired.
+    Test authenticate_youtube when token.json exists but is invalid or expired.
     """
     with patch("src.authentication.youtube_auth.os.path.exists") as mock_exists, patch(
-        "src.authentication.youtube_auth.pickle"
-    ) as mock_pickle, patch("src.authentication.youtube_auth.Request") as mock_request:
+        "src.authentication.youtube_auth.Credentials"
+    ) as mock_credentials, patch(
+        "src.authentication.youtube_auth.save_token"
+    ) as mock_save, patch("src.authentication.youtube_auth.Request") as mock_request:
 
         mock_exists.return_value = True
         mock_creds = MagicMock(valid=False, expired=True, refresh_token=True)
-        mock_pickle.load.return_value = mock_creds
+        mock_credentials.from_authorized_user_file.return_value = mock_creds
 
         youtube_service = MagicMock()
         mock_build.return_value = youtube_service
@@ -65,16 +76,17 @@ def test_authenticate_youtube_invalid_token(mock_build, mock_installed_app_flow)
 
         assert service == youtube_service
         mock_creds.refresh.assert_called_once()
+        mock_save.assert_called_once_with(mock_creds, "token.json")
         mock_build.assert_called_once_with("youtube", "v3", credentials=mock_creds)
 
 
 def test_authenticate_youtube_no_token(mock_build, mock_installed_app_flow):
     """
-    Test authenticate_youtube when token.pickle does not exist.
+    Test authenticate_youtube when no token file exists.
     """
     with patch("src.authentication.youtube_auth.os.path.exists") as mock_exists, patch(
-        "src.authentication.youtube_auth.pickle"
-    ) as mock_pickle, patch(
+        "src.authentication.youtube_auth.save_token"
+    ) as mock_save, patch(
         "src.authentication.youtube_auth.InstalledAppFlow.from_client_secrets_file"
     ) as mock_flow_instance, patch(
         "src.authentication.youtube_auth.sys"
@@ -85,8 +97,7 @@ def test_authenticate_youtube_no_token(mock_build, mock_installed_app_flow):
         youtube_service = MagicMock()
         mock_build.return_value = youtube_service
 
-        with patch("src.authentication.youtube_auth.open", mock_open=MagicMock()):
-            service = authenticate_youtube()
+        service = authenticate_youtube()
 
         assert service == youtube_service
         mock_flow_instance.assert_called_once_with(
@@ -97,7 +108,61 @@ def test_authenticate_youtube_no_token(mock_build, mock_installed_app_flow):
             "v3",
             credentials=mock_flow_instance.return_value.run_local_server.return_value,
         )
-        mock_pickle.dump.assert_called_once()
+        mock_save.assert_called_once()
+
+
+def test_save_token_writes_owner_only_json(tmp_path):
+    token_path = tmp_path / "token.json"
+    creds = MagicMock()
+    creds.to_json.return_value = '{"token": "abc"}'
+
+    save_token(creds, str(token_path))
+
+    assert token_path.read_text() == '{"token": "abc"}'
+    assert token_path.stat().st_mode & 0o777 == 0o600
+
+
+def test_load_token_converts_legacy_pickle(tmp_path):
+    import pickle
+
+    with open(tmp_path / "token.pickle", "wb") as token:
+        pickle.dump({"token": "abc"}, token)
+
+    with patch("src.authentication.youtube_auth.save_token") as mock_save:
+        creds = load_token(str(tmp_path / "token.json"))
+
+    assert creds == {"token": "abc"}
+    mock_save.assert_called_once_with(creds, str(tmp_path / "token.json"))
+
+
+def test_token_refresher_refreshes_before_expiry():
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    creds = MagicMock(valid=True, expiry=now + timedelta(minutes=10))
+
+    def refresh(request):
+        creds.expiry = now + timedelta(hours=1)
+
+    creds.refresh.side_effect = refresh
+    refresher = TokenRefresher(creds, margin=300, clock=lambda: now)
+
+    with patch("src.authentication.youtube_auth.Request"):
+        assert refresher.refresh_due() == 300
+        now += timedelta(minutes=5)
+        assert refresher.refresh_due() == 3600 - 300
+
+    creds.refresh.assert_called_once()
+    assert refresher.refreshes == 1
+
+
+def test_token_refresher_retries_after_failure():
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    creds = MagicMock(valid=False, expiry=now)
+    creds.refresh.side_effect = OSError("offline")
+    refresher = TokenRefresher(creds, retry_interval=30, clock=lambda: now)
+
+    with patch("src.authentication.youtube_auth.Request"):
+        assert refresher.refresh_due() == 30
+    assert refresher.refreshes == 0
 
 
 def mock_open(mock=None, data=None):
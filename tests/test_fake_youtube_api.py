@@ -0,0 +1,209 @@
+import os
+import sys
+
+import pytest
+
+# Add the src and benchmarks directories to sys.path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from fake_youtube_api import FakeYouTubeAPI, FakeYouTubeServer
+
+
+@pytest.fixture
+def fast_rate_limit(monkeypatch):
+    from utils import rate_limiter
+
+    monkeypatch.setattr(
+        rate_limiter, "_rate_limiter", rate_limiter.TokenBucket(rate=1000, burst=1000)
+    )
+
+
+@pytest.fixture
+def server():
+    server = FakeYouTubeServer(FakeYouTubeAPI(burst_every=5, burst_length=2)).start()
+    yield server
+    server.stop()
+
+
+def test_pipeline_runs_end_to_end_against_fake_api(
+    server, fast_rate_limit, tmp_path, monkeypatch
+):
+    """
+    Test that run_sync uploads every song through the real client stack,
+    retrying the fake server's injected 429 bursts.
+    """
+    from google.oauth2.credentials import Credentials
+
+    from authentication.service_factory import ServiceFactory
+    from config import config
+    from main import run_sync
+    from utils.query_normalizer import QueryMemo
+    from utils.run_journal import RunJournal
+
+    csv_path = tmp_path / "playlist.csv"
+    csv_path.write_text(
+        "Track name,Artist name,Album,Playlist name,Type,ISRC,Spotify - id\n"
+        "Creep,Radiohead,Pablo Honey,Rock,Track,,\n"
+        "Imagine,John Lennon,Imagine,Rock,Track,,\n"
+        "Creep,Radiohead,Pablo Honey,Mix,Track,,\n"
+        "Bad Guy,Billie Eilish,WWAFA,Mix,Track,,\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setitem(config, "playlist_file", str(csv_path))
+    monkeypatch.setitem(config, "csv", {"engine": "csv"})
+    # One search at a time, in CSV order, so the injected 429 bursts hit the
+    # same calls every run.
+    monkeypatch.setitem(config, "scheduler", {"enabled": False})
+    concurrency = config.get("concurrency", {}) or {}
+    monkeypatch.setitem(config, "concurrency", {**concurrency, "search_workers": 1})
+    youtube = ServiceFactory(Credentials(token="test"), client_options={"api_endpoint": server.url})
+
+    memo = QueryMemo()
+    run_sync(youtube, RunJournal(str(tmp_path / "journal.jsonl")), memo)
+
+    stats = server.api.stats()
+    assert stats["playlists"] == 2
+    assert stats["items"] == 4
+    assert stats["errors"]["429"] > 0
+    # Calls rejected with 429 are retried, so count the admitted ones.
+    assert stats["admitted"]["search.list"] == 3
+    assert memo.saved == 1
+
+
+def test_scheduled_run_against_fake_api(server, fast_rate_limit, tmp_path, monkeypatch):
+    """
+    Test that a scheduled run adds every song once, creating each playlist
+    with its first chunk and searching shared songs only once.
+    """
+    from google.oauth2.credentials import Credentials
+
+    from authentication.service_factory import ServiceFactory
+    from config import config
+    from main import run_sync
+    from utils.query_normalizer import QueryMemo
+    from utils.run_journal import RunJournal
+
+    server.api.burst_every = 0
+    csv_path = tmp_path / "playlist.csv"
+    csv_path.write_text(
+        "Track name,Artist name,Playlist name\n"
+        "Imagine,John Lennon,Rock\n"
+        "Creep,Radiohead,Rock\n"
+        "Bad Guy,Billie Eilish,Mix\n"
+        "Creep,Radiohead,Mix\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setitem(config, "playlist_file", str(csv_path))
+    monkeypatch.setitem(config, "csv", {"engine": "csv"})
+    monkeypatch.setitem(config, "scheduler", {"enabled": True, "slice_size": 1})
+    youtube = ServiceFactory(Credentials(token="test"), client_options={"api_endpoint": server.url})
+
+    run_sync(youtube, RunJournal(str(tmp_path / "journal.jsonl")), QueryMemo())
+
+    stats = server.api.stats()
+    assert stats["playlists"] == 2
+    assert stats["items"] == 4
+    assert stats["calls"]["search.list"] == 3
+
+
+def test_second_run_only_processes_new_rows(server, fast_rate_limit, tmp_path, monkeypatch):
+    """
+    Test that rows uploaded by a complete run are skipped by the next run
+    without any API call, while an added row is searched and inserted.
+    """
+    from google.oauth2.credentials import Credentials
+
+    from authentication.service_factory import ServiceFactory
+    from config import config
+    from main import run_sync
+    from utils import row_fingerprints
+    from utils.query_normalizer import QueryMemo
+    from utils.run_journal import RunJournal
+
+    server.api.burst_every = 0
+    monkeypatch.setitem(
+        config,
+        "row_fingerprints",
+        {"enabled": True, "path": str(tmp_path / "fingerprints.npz")},
+    )
+    monkeypatch.setattr(row_fingerprints, "_row_fingerprints", None)
+    csv_path = tmp_path / "playlist.csv"
+    rows = (
+        "Track name,Artist name,Playlist name\n"
+        "Creep,Radiohead,Rock\n"
+        "Bad Guy,Billie Eilish,Mix\n"
+    )
+    csv_path.write_text(rows, encoding="utf-8")
+    monkeypatch.setitem(config, "playlist_file", str(csv_path))
+    monkeypatch.setitem(config, "csv", {"engine": "csv"})
+    youtube = ServiceFactory(Credentials(token="test"), client_options={"api_endpoint": server.url})
+
+    journal = RunJournal(str(tmp_path / "journal.jsonl"))
+    run_sync(youtube, journal, QueryMemo())
+    row_fingerprints.get_row_fingerprints().commit(
+        lambda playlist, query: journal.get(playlist, query)["status"] == "added"
+    )
+    journal.reset()
+    assert server.api.stats()["calls"]["search.list"] == 2
+
+    csv_path.write_text(rows + "Imagine,John Lennon,Rock\n", encoding="utf-8")
+    run_sync(youtube, journal, QueryMemo())
+
+    stats = server.api.stats()
+    assert stats["calls"]["search.list"] == 3
+    assert stats["items"] == 3
+
+
+def test_plan_and_apply_against_fake_api(server, fast_rate_limit, tmp_path, monkeypatch):
+    """
+    Test that --plan previews the changes without making them and --apply
+    adds, prunes and reorders until the playlist matches the CSV.
+    """
+    from google.oauth2.credentials import Credentials
+
+    from authentication.service_factory import ServiceFactory
+    from config import config
+    from main import build_plan
+    from planner import apply_plan
+
+    server.api.burst_every = 0
+    rock = server.api.insert_playlist({"snippet": {"title": "Rock"}})["id"]
+    for query in ("Imagine John Lennon", "Unwanted Song", "Creep Radiohead"):
+        video_id = server.api.search(query)["items"][0]["id"]["videoId"]
+        server.api.insert_item(
+            {"snippet": {"playlistId": rock, "resourceId": {"videoId": video_id}}}
+        )
+    csv_path = tmp_path / "playlist.csv"
+    csv_path.write_text(
+        "Track name,Artist name,Playlist name\n"
+        "Creep,Radiohead,Rock\n"
+        "Bad Guy,Billie Eilish,Rock\n"
+        "Imagine,John Lennon,Rock\n"
+        "Bad Guy,Billie Eilish,Mix\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setitem(config, "playlist_file", str(csv_path))
+    monkeypatch.setitem(config, "csv", {"engine": "csv"})
+    youtube = ServiceFactory(Credentials(token="test"), client_options={"api_endpoint": server.url})
+
+    plan = build_plan(youtube, None, prune=True, reorder=True)
+
+    assert server.api.stats()["items"] == 3
+    assert plan["cost"]["total"] == 50 * (1 + 2 + 1 + 1)
+    desired = [
+        server.api.search(query)["items"][0]["id"]["videoId"]
+        for query in ("Creep Radiohead", "Bad Guy Billie Eilish", "Imagine John Lennon")
+    ]
+
+    totals = apply_plan(youtube, plan)
+
+    assert totals == {"created": 1, "removed": 1, "added": 2, "moved": 1, "failed": 0}
+    assert server.api.video_ids(rock) == desired
+    calls = server.api.stats()["calls"]
+    assert calls["playlistItems.update"] == 1 and calls["playlistItems.delete"] == 1
+
+    # Applying the same plan again changes nothing more.
+    assert apply_plan(youtube, plan)["added"] == 0
+    assert server.api.video_ids(rock) == desired
@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import queue
+import sys
+
+import pytest
+
+# Add the src directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import logger as logger_module
+from config import config
+from logger import JsonFormatter, SamplingFilter, configure_song_lines, song_logger
+
+
+def make_record(level=logging.INFO, **extra):
+    record = logging.makeLogRecord(
+        {"name": "songs", "levelno": level, "levelname": logging.getLevelName(level)}
+    )
+    record.msg, record.args = "Added video ID %s for '%s'.", ("V1", "Song")
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    line = JsonFormatter().format(make_record(video_id="V1", status="added"))
+
+    entry = json.loads(line)
+    assert entry["message"] == "Added video ID V1 for 'Song'."
+    assert entry["level"] == "INFO"
+    assert entry["video_id"] == "V1"
+    assert entry["status"] == "added"
+
+
+def test_sampling_filter_keeps_one_in_n_and_every_warning():
+    sampling = SamplingFilter(3)
+    kept = [sampling.filter(make_record()) for _ in range(7)]
+    assert kept == [True, False, False, True, False, False, True]
+    assert SamplingFilter(0).filter(make_record(logging.WARNING))
+    assert not SamplingFilter(0).filter(make_record())
+
+
+def test_deferred_queue_handler_merges_only_mutable_args():
+    handler = logger_module.DeferredQueueHandler(queue.SimpleQueue())
+
+    scalar = handler.prepare(make_record())
+    assert scalar.args == ("V1", "Song")
+
+    videos = ["V1"]
+    record = make_record()
+    record.msg, record.args = "Videos: %s", (videos,)
+    handler.prepare(record)
+    videos.append("V2")
+    assert record.getMessage() == "Videos: ['V1']"
+    assert record.args is None
+
+
+def test_song_lines_setting_filters_the_song_logger(monkeypatch):
+    monkeypatch.setitem(config, "logging", {"song_lines": "none"})
+    configure_song_lines()
+    try:
+        assert not song_logger.filter(make_record())
+        assert song_logger.filter(make_record(logging.WARNING))
+    finally:
+        monkeypatch.setitem(config, "logging", {})
+        configure_song_lines()
+    assert song_logger.filter(make_record())
+
+
+@pytest.fixture
+def fresh_logging(monkeypatch):
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    monkeypatch.setattr(logger_module, "_configured", False)
+    yield root
+    logger_module.shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_setup_logging_writes_through_queue_to_rotating_and_json_files(
+    tmp_path, monkeypatch, fresh_logging
+):
+    text_path = tmp_path / "run.log"
+    json_path = tmp_path / "run.jsonl"
+    monkeypatch.setitem(
+        config,
+        "logging",
+        {
+            "level": "INFO",
+            "format": "%(levelname)s %(message)s",
+            "handlers": {
+                "console": {"level": "CRITICAL"},
+                "file": {"filename": str(text_path), "max_bytes": 200, "backup_count": 2},
+                "json": {"enabled": True, "filename": str(json_path)},
+            },
+        },
+    )
+
+    logger_module.setup_logging()
+    assert [type(handler) for handler in fresh_logging.handlers[-1:]] == [
+        logger_module.DeferredQueueHandler
+    ]
+    for number in range(20):
+        song_logger.info(
+            "Added video ID %s for '%s'.", f"V{number}", "Song", extra={"n": number}
+        )
+    logger_module.shutdown_logging()
+
+    assert os.path.exists(f"{text_path}.1")
+    assert "INFO Added video ID V19 for 'Song'." in text_path.read_text(encoding="utf-8")
+    entries = [json.loads(line) for line in json_path.read_text(encoding="utf-8").splitlines()]
+    assert [entry["n"] for entry in entries] == list(range(20))
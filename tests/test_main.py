@@ -1,7 +1,7 @@
 # tests/test_main.py
 
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 import os
 import sys
 
@@ -11,6 +11,8 @@ sys.path.insert(
 )
 
 from main import (
+    add_songs_to_playlist,
+    parse_playlist_csv,
     process_playlists,
 )  # Adjust the import path based on your project structure
 
@@ -38,7 +40,7 @@ def test_process_playlists_create_new_playlist(
 
     # Mock create_playlist, get_existing_videos, search_video, and add_video_to_playlist
     with patch(
-        "main.create_playlist", return_value="PLNEW123"
+        "playlist_management.pooled.create_playlist", return_value="PLNEW123"
     ) as mock_create_playlist, patch(
         "main.get_existing_videos", return_value=[]
     ), patch(
@@ -101,7 +103,7 @@ def test_process_playlists_existing_playlist(
     with patch("main.get_existing_videos", return_value=["VID123", "VID456"]), patch(
         "main.search_video", side_effect=["VID789", "VID456", "VID101112", "VID131415"]
     ), patch("main.add_video_to_playlist") as mock_add_video, patch(
-        "main.create_playlist", return_value="PLNEW456"
+        "playlist_management.pooled.create_playlist", return_value="PLNEW456"
     ) as mock_create_playlist:
 
         # Iterate over each playlist and process
@@ -149,7 +151,7 @@ def test_process_playlists_no_video_found(
 
     # Mock create_playlist, get_existing_videos, search_video, and add_video_to_playlist
     with patch(
-        "main.create_playlist", return_value="PLTEST123"
+        "playlist_management.pooled.create_playlist", return_value="PLTEST123"
     ) as mock_create_playlist, patch(
         "main.get_existing_videos", return_value=[]
     ), patch(
@@ -178,6 +180,234 @@ def test_process_playlists_no_video_found(
         ), "Playlist 'Test Playlist' should have ID 'PLTEST123'."
 
 
+def test_add_songs_to_playlist_concurrent_search_keeps_csv_order(mock_logger):
+    """
+    Test that concurrent searches hand results to the insert step in CSV order.
+    """
+    import time
+
+    songs = [f"Song {i}" for i in range(8)]
+
+    def slow_search(youtube, query, http=None):
+        # Earlier songs take longer, so they finish last.
+        time.sleep(0.01 * (8 - int(query.split()[-1])))
+        return f"VID{query.split()[-1]}"
+
+    with patch("main.config", {"concurrency": {"search_workers": 4}}), patch(
+        "main.search_video", side_effect=slow_search
+    ), patch("main.add_video_to_playlist") as mock_add_video:
+        add_songs_to_playlist(MagicMock(), songs, "PL123", set())
+
+    added = [call.args[1] for call in mock_add_video.call_args_list]
+    assert added == [f"VID{i}" for i in range(8)]
+
+
+def test_search_songs_drops_pending_searches_when_stopped_early(mock_logger):
+    """
+    Test that closing the search generator cancels searches that have not started.
+    """
+    import threading
+    import time
+
+    from main import search_songs
+    from utils.track import Track
+
+    searched = []
+    lock = threading.Lock()
+
+    def slow_search(youtube, query, http=None):
+        with lock:
+            searched.append(query)
+        time.sleep(0.02)
+        return f"VID-{query}"
+
+    songs = [Track(f"Song {i}") for i in range(20)]
+    with patch("main.config", {"concurrency": {"search_workers": 2}}), patch(
+        "main.search_video", side_effect=slow_search
+    ):
+        results = search_songs(MagicMock(), songs)
+        assert next(results) == (songs[0], "VID-Song 0")
+        results.close()
+
+    assert len(searched) < len(songs)
+
+
+def test_process_playlists_resumes_from_journal(tmp_path, mock_logger):
+    """
+    Test that songs completed by an interrupted run are not searched again.
+    """
+    from utils.run_journal import RunJournal
+
+    journal = RunJournal(str(tmp_path / "journal.jsonl"))
+    journal.record("Rock", "Done Song", "VID1", "added")
+    journal.record("Rock", "Found Song", "VID2", "searched")
+
+    with patch("main.config", {}), patch(
+        "main.get_existing_videos", return_value=["VID1"]
+    ), patch("main.search_video", return_value="VID3") as mock_search, patch(
+        "main.add_video_to_playlist", return_value=True
+    ) as mock_add_video:
+        process_playlists(
+            MagicMock(),
+            "Rock",
+            ["Done Song", "Found Song", "New Song"],
+            {"rock": "PL1"},
+            journal,
+        )
+
+    mock_search.assert_called_once_with(ANY, "New Song")
+    assert [call.args[1] for call in mock_add_video.call_args_list] == ["VID2", "VID3"]
+    assert journal.is_done("Rock", "Found Song")
+    assert journal.is_done("Rock", "New Song")
+
+
+def test_process_playlists_skips_fully_journaled_playlist(tmp_path, mock_logger):
+    """
+    Test that a playlist whose songs are all done is not listed again.
+    """
+    from utils.run_journal import RunJournal
+
+    journal = RunJournal(str(tmp_path / "journal.jsonl"))
+    journal.record("Rock", "Done Song", "VID1", "added")
+
+    with patch("main.get_existing_videos") as mock_get_existing_videos:
+        process_playlists(MagicMock(), "Rock", ["Done Song"], {}, journal)
+
+    mock_get_existing_videos.assert_not_called()
+
+
+def test_parse_playlist_csv_light_engine_matches_pandas(tmp_path, mock_logger):
+    """
+    Test that the csv-module parser produces the same playlists as pandas.
+    """
+    path = tmp_path / "playlist.csv"
+    path.write_text(
+        "Track name,Artist name,Album,Playlist name,Type,ISRC,Spotify - id\n"
+        " Creep ,radiohead,Pablo Honey,rock,Track,ISRC1,SP1\n"
+        "Bad Guy,Billie Eilish,WWAFA,Pop,Track,ISRC2,SP2\n"
+        "根本不是我對手,Jolin Tsai,Ugly Beauty, rock ,Track,ISRC3,SP3\n"
+        ",Missing Track,Album,Rock,Track,ISRC4,SP4\n",
+        encoding="utf-8",
+    )
+
+    with patch("main.config", {"csv": {"engine": "pandas"}}):
+        expected = parse_playlist_csv(str(path))
+    with patch("main.config", {"csv": {"engine": "csv"}}):
+        light = parse_playlist_csv(str(path))
+
+    assert light == expected
+    assert list(light) == ["Pop", "Rock"]
+
+
+def test_process_playlists_uses_match_index_before_search(tmp_path, mock_logger):
+    """
+    Test that tracks with an indexed ISRC skip search and new matches are indexed.
+    """
+    from utils.match_index import MatchIndex
+    from utils.track import Track
+
+    index = MatchIndex(str(tmp_path / "index.sqlite3"))
+    index.record(Track("Known Song", "GBAYE9200001"), "VID1")
+    songs = [Track("Known Song", "GBAYE9200001"), Track("New Song", None, "SP2")]
+
+    with patch("main.config", {}), patch("main.get_match_index", return_value=index), patch(
+        "main.get_existing_videos", return_value=set()
+    ), patch("main.search_video", return_value="VID2") as mock_search, patch(
+        "main.add_video_to_playlist", return_value=True
+    ) as mock_add_video:
+        process_playlists(MagicMock(), "Rock", songs, {"rock": "PL1"})
+
+    mock_search.assert_called_once_with(ANY, "New Song")
+    assert [call.args[1] for call in mock_add_video.call_args_list] == ["VID1", "VID2"]
+    assert index.lookup(Track("New Song", None, "SP2")) == "VID2"
+    index.close()
+
+
+def test_duplicate_songs_across_playlists_are_searched_once(mock_logger):
+    """
+    Test that the same recording in several playlists is resolved once per run.
+    """
+    from utils.query_normalizer import QueryMemo
+
+    memo = QueryMemo()
+    with patch("main.config", {}), patch(
+        "main.get_existing_videos", side_effect=lambda *args: set()
+    ), patch("main.search_video", return_value="VID1") as mock_search, patch(
+        "main.add_video_to_playlist", return_value=True
+    ) as mock_add_video:
+        process_playlists(MagicMock(), "Rock", ["Creep Radiohead"], {"rock": "PL1"}, memo=memo)
+        process_playlists(
+            MagicMock(), "Pop", ["creep - Remastered radiohead"], {"pop": "PL2"}, memo=memo
+        )
+
+    mock_search.assert_called_once_with(ANY, "Creep Radiohead")
+    assert [call.args[1:] for call in mock_add_video.call_args_list] == [
+        ("VID1", "PL1"),
+        ("VID1", "PL2"),
+    ]
+    assert memo.saved == 1
+
+
+def test_memo_hits_the_search_cache_would_answer_are_not_counted_as_saved(mock_logger):
+    """
+    Test that a repeat the search cache already holds does not count as a saved search.
+    """
+    from utils.query_normalizer import QueryMemo
+    from utils.search_cache import MISS
+
+    memo = QueryMemo()
+    cache = MagicMock()
+    # Only the exact query searched first is in the cache.
+    cache.peek.side_effect = lambda query, _: "VID1" if query == "Creep Radiohead" else MISS
+    with patch("main.config", {}), patch("main.get_search_cache", return_value=cache), patch(
+        "main.get_existing_videos", side_effect=lambda *args: set()
+    ), patch("main.search_video", return_value="VID1") as mock_search, patch(
+        "main.add_video_to_playlist", return_value=True
+    ):
+        process_playlists(MagicMock(), "Rock", ["Creep Radiohead"], {"rock": "PL1"}, memo=memo)
+        process_playlists(MagicMock(), "Pop", ["Creep Radiohead"], {"pop": "PL2"}, memo=memo)
+        process_playlists(
+            MagicMock(), "Indie", ["creep - Remastered radiohead"], {"indie": "PL3"}, memo=memo
+        )
+
+    mock_search.assert_called_once_with(ANY, "Creep Radiohead")
+    assert memo.saved == 1
+
+
+def test_process_playlists_async_inserts_in_csv_order(mock_logger):
+    """
+    Test that the async engine searches concurrently but inserts in CSV order.
+    """
+    import asyncio
+
+    from main import process_playlists_async
+
+    async def slow_search(client, query):
+        # Earlier songs take longer, so they finish last.
+        await asyncio.sleep(0.01 * (4 - int(query.split()[-1])))
+        return f"VID{query.split()[-1]}"
+
+    added = []
+
+    async def add_video(client, video_id, playlist_id):
+        added.append(video_id)
+        return True
+
+    async def no_videos(client, playlist_id):
+        return set()
+
+    with patch("main.async_client.search_video", side_effect=slow_search), patch(
+        "main.async_client.add_video_to_playlist", side_effect=add_video
+    ), patch("main.async_client.get_existing_videos", side_effect=no_videos):
+        asyncio.run(
+            process_playlists_async(
+                MagicMock(), "Rock", [f"Song {i}" for i in range(4)], {"rock": "PL1"}
+            )
+        )
+
+    assert added == ["VID0", "VID1", "VID2", "VID3"]
+
+
 @pytest.fixture
 def mock_logger():
     with patch("main.logger") as mock_logger:
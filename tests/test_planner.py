@@ -0,0 +1,90 @@
+import itertools
+import json
+import os
+import random
+import sys
+
+import pytest
+
+# Add the src directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from planner import load_plan, new_plan, plan_moves, plan_playlist, save_plan, stable_items
+
+
+def lcs_length(a, b):
+    table = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            if x == y:
+                table[i + 1][j + 1] = table[i][j] + 1
+            else:
+                table[i + 1][j + 1] = max(table[i][j + 1], table[i + 1][j])
+    return table[-1][-1]
+
+
+def apply_moves(current, moves):
+    items = list(enumerate(current))
+    for index, _, position in moves:
+        item = next(item for item in items if item[0] == index)
+        items.remove(item)
+        items.insert(position, item)
+    return [video_id for _, video_id in items]
+
+
+def test_moves_are_minimal_and_produce_desired_order():
+    rng = random.Random(7)
+    for size in range(1, 8):
+        for desired in itertools.islice(itertools.permutations("abcdefg"[:size]), 50):
+            current = list(desired)
+            rng.shuffle(current)
+            moves = plan_moves(current, list(desired))
+            assert apply_moves(current, moves) == list(desired)
+            assert len(moves) == size - lcs_length(current, list(desired))
+
+
+def test_moves_leave_other_items_and_duplicates_in_place():
+    current = ["x", "c", "a", "y", "b", "a"]
+    moves = plan_moves(current, ["a", "b", "c"])
+
+    assert len(moves) == 1
+    assert apply_moves(current, moves) == ["x", "a", "y", "b", "c", "a"]
+    assert stable_items(current, ["a", "b", "c"]) == {2, 4}
+
+
+def test_plan_playlist_adds_prunes_and_reorders():
+    resolved = [("A", "a"), ("B", "b"), ("Missing", None), ("A again", "a"), ("C", "c")]
+    items = [("i1", "c"), ("i2", "x"), ("i3", "a"), ("i4", "a")]
+
+    entry = plan_playlist("Rock", "PL1", resolved, items, prune=True, reorder=True)
+
+    assert entry["videos"] == ["a", "b", "c"]
+    assert entry["add"] == ["b"]
+    assert entry["remove"] == [
+        {"item_id": "i2", "video_id": "x"},
+        {"item_id": "i4", "video_id": "a"},
+    ]
+    assert entry["not_found"] == ["Missing"]
+    # After the removals and the insert the playlist reads c, a, b.
+    assert entry["moves"] == [{"video_id": "c", "position": 2}]
+
+
+def test_plan_without_prune_only_adds():
+    entry = plan_playlist("Mix", None, [("A", "a")], [])
+    assert entry["create"] and entry["add"] == ["a"]
+    assert entry["remove"] == entry["moves"] == []
+
+    plan = new_plan([entry])
+    assert plan["cost"] == {"playlists.insert": 50, "playlistItems.insert": 50, "total": 100}
+
+
+def test_plan_round_trips_through_a_file(tmp_path):
+    plan = new_plan([plan_playlist("Mix", None, [("A", "a")], [])])
+    path = str(tmp_path / "plans" / "plan.json")
+    save_plan(plan, path)
+    assert load_plan(path) == plan
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"version": 99}, file)
+    with pytest.raises(ValueError):
+        load_plan(path)
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Adjust the path to import src modules
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+httpx = pytest.importorskip("httpx")
+
+from playlist_management import async_client
+from playlist_management.async_client import AsyncYouTubeClient
+from utils.quota import QuotaExhausted, get_quota_ledger
+from utils.rate_limiter import TokenBucket
+
+
+@pytest.fixture(autouse=True)
+def fast_rate_limit():
+    with patch.object(
+        async_client, "get_rate_limiter", return_value=TokenBucket(rate=1000, burst=1000)
+    ):
+        yield
+
+
+def make_credentials(token="token-1"):
+    credentials = MagicMock(valid=True, token=token)
+
+    def refresh(request):
+        credentials.token = "token-2"
+
+    credentials.refresh.side_effect = refresh
+    return credentials
+
+
+def run(handler, coroutine_factory, credentials=None, max_in_flight=10):
+    async def main():
+        async with AsyncYouTubeClient(
+            credentials or make_credentials(),
+            max_in_flight=max_in_flight,
+            transport=httpx.MockTransport(handler),
+        ) as client:
+            return await coroutine_factory(client)
+
+    return asyncio.run(main())
+
+
+def test_search_video_sends_query_and_charges_quota():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={"items": [{"id": {"videoId": "VID1"}}]})
+
+    video_id = run(handler, lambda client: async_client.search_video(client, "Creep Radiohead"))
+
+    assert video_id == "VID1"
+    assert seen[0].url.path == "/youtube/v3/search"
+    assert seen[0].url.params["q"] == "Creep Radiohead"
+    assert seen[0].headers["Authorization"] == "Bearer token-1"
+    assert get_quota_ledger().spent_by_method() == {"search.list": 100}
+
+
+def test_refreshes_credentials_once_on_401():
+    credentials = make_credentials()
+
+    def handler(request):
+        if request.headers["Authorization"] == "Bearer token-1":
+            return httpx.Response(401)
+        return httpx.Response(200, json={"id": "ITEM1"})
+
+    added = run(
+        handler,
+        lambda client: async_client.add_video_to_playlist(client, "VID1", "PL1"),
+        credentials,
+    )
+
+    assert added is True
+    credentials.refresh.assert_called_once()
+
+
+def test_quota_exceeded_raises_quota_exhausted():
+    body = {"error": {"errors": [{"reason": "quotaExceeded"}], "message": "Quota"}}
+
+    def handler(request):
+        return httpx.Response(403, json=body)
+
+    with pytest.raises(QuotaExhausted):
+        run(handler, lambda client: async_client.search_video(client, "Creep"))
+
+
+def test_http_errors_are_logged_and_swallowed():
+    def handler(request):
+        return httpx.Response(404, json={"error": {"message": "Not found"}})
+
+    assert run(handler, lambda client: async_client.create_playlist(client, "Rock")) is None
+
+
+def test_lists_follow_page_tokens():
+    def handler(request):
+        if request.url.params.get("pageToken") == "P2":
+            return httpx.Response(
+                200, json={"items": [{"snippet": {"resourceId": {"videoId": "VID2"}}}]}
+            )
+        return httpx.Response(
+            200,
+            json={
+                "nextPageToken": "P2",
+                "items": [{"snippet": {"resourceId": {"videoId": "VID1"}}}],
+            },
+        )
+
+    video_ids = run(handler, lambda client: async_client.get_existing_videos(client, "PL1"))
+
+    assert video_ids == {"VID1", "VID2"}
+
+
+def test_requests_in_flight_are_bounded():
+    state = {"current": 0, "peak": 0}
+
+    async def handler(request):
+        state["current"] += 1
+        state["peak"] = max(state["peak"], state["current"])
+        await asyncio.sleep(0.01)
+        state["current"] -= 1
+        return httpx.Response(200, json={"items": []})
+
+    async def search_all(client):
+        return await asyncio.gather(
+            *(async_client.search_video(client, f"Song {i}") for i in range(20))
+        )
+
+    assert run(handler, search_all, max_in_flight=3) == [None] * 20
+    assert state["peak"] == 3
+
+
+def test_retries_transient_errors():
+    responses = [httpx.Response(503), httpx.Response(200, json={"items": []})]
+
+    def handler(request):
+        return responses.pop(0)
+
+    assert run(handler, lambda client: async_client.search_video(client, "Creep")) is None
+    assert responses == []
+
+
+def test_network_failures_that_outlast_retries_are_swallowed():
+    def handler(request):
+        raise httpx.ConnectError("connection refused")
+
+    with patch.object(async_client, "get_retry_policy") as policy:
+        policy.return_value.max_attempts = 2
+        policy.return_value.delay.return_value = 0
+        result = run(handler, lambda client: async_client.search_video(client, "Creep"))
+
+    assert result is None
+
+
+def test_valid_token_does_not_take_the_refresh_lock():
+    async def main():
+        client = AsyncYouTubeClient(make_credentials(), transport=httpx.MockTransport(None))
+        async with client._refresh_lock:
+            # Would wait forever if the lock were taken for a valid token.
+            await asyncio.wait_for(client._ensure_token(), timeout=1)
+        await client.aclose()
+
+    asyncio.run(main())
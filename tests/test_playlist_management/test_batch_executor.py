@@ -0,0 +1,136 @@
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+from googleapiclient.errors import HttpError
+
+# Adjust the path to import src modules
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from playlist_management.batch_executor import execute_batch
+from playlist_management import playlist_adder
+from utils import metrics
+
+
+class FakeBatch:
+    """Stand-in for BatchHttpRequest that answers from a script of outcomes."""
+
+    def __init__(self, outcomes, executed, callback):
+        self.outcomes = outcomes
+        self.executed = executed
+        self.callback = callback
+        self.requests = {}
+
+    def add(self, request, request_id):
+        self.requests[request_id] = request
+
+    def execute(self):
+        self.executed.append(len(self.requests))
+        for request_id, request in self.requests.items():
+            outcome = self.outcomes[request].pop(0)
+            if isinstance(outcome, Exception):
+                self.callback(request_id, None, outcome)
+            else:
+                self.callback(request_id, outcome, None)
+
+
+def http_error(status):
+    return HttpError(MagicMock(status=status), b"error")
+
+
+@pytest.fixture
+def youtube():
+    youtube = MagicMock()
+    youtube.outcomes = {}
+    youtube.executed = []
+    youtube.new_batch_http_request.side_effect = lambda callback: FakeBatch(
+        youtube.outcomes, youtube.executed, callback
+    )
+    return youtube
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit():
+    with patch("playlist_management.batch_executor.get_rate_limiter"):
+        yield
+
+
+def test_execute_batch_splits_into_batches(youtube):
+    requests = {f"key{i}": f"request{i}" for i in range(5)}
+    youtube.outcomes = {f"request{i}": [{"id": i}] for i in range(5)}
+
+    responses, errors = execute_batch(youtube, requests, "search.list", batch_size=2)
+
+    assert responses == {f"key{i}": {"id": i} for i in range(5)}
+    assert errors == {}
+    assert youtube.executed == [2, 2, 1]
+
+
+def test_execute_batch_retries_only_failed_sub_requests(youtube):
+    requests = {"a": "request_a", "b": "request_b", "c": "request_c"}
+    youtube.outcomes = {
+        "request_a": [{"id": "A"}],
+        "request_b": [http_error(503), {"id": "B"}],
+        "request_c": [http_error(404)],
+    }
+
+    responses, errors = execute_batch(youtube, requests, "search.list", batch_size=50)
+
+    assert responses == {"a": {"id": "A"}, "b": {"id": "B"}}
+    assert list(errors) == ["c"]
+    assert youtube.executed == [3, 1]
+
+
+def test_execute_batch_gives_up_after_max_retries(youtube):
+    youtube.outcomes = {"request_a": [http_error(500)] * 3}
+
+    responses, errors = execute_batch(
+        youtube, {"a": "request_a"}, "search.list", batch_size=50, max_retries=2
+    )
+
+    assert responses == {}
+    assert list(errors) == ["a"]
+    assert youtube.executed == [1, 1, 1]
+
+
+def test_execute_batch_splits_elapsed_time_across_sub_requests(youtube):
+    requests = {f"key{i}": f"request{i}" for i in range(4)}
+    youtube.outcomes = {f"request{i}": [{"id": i}] for i in range(4)}
+
+    with patch("playlist_management.batch_executor.time") as clock:
+        clock.perf_counter.side_effect = [10.0, 12.0]
+        execute_batch(youtube, requests, "search.list", batch_size=50)
+
+    histogram = metrics.get_metrics().histogram(
+        "youtube_api_request_seconds", method="search.list"
+    )
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.0)
+
+
+def test_search_videos_batches_uncached_queries(youtube):
+    youtube.search().list.side_effect = lambda **kwargs: kwargs["q"]
+    youtube.outcomes = {
+        "Song A": [{"items": [{"id": {"videoId": "VIDA"}}]}],
+        "Song B": [{"items": []}],
+    }
+
+    with patch.object(playlist_adder, "get_search_cache", return_value=None):
+        results = playlist_adder.search_videos(youtube, ["Song A", "Song B", "Song A"])
+
+    assert results == {"Song A": "VIDA", "Song B": None}
+    assert youtube.executed == [2]
+
+
+def test_add_videos_to_playlist_returns_added_ids(youtube):
+    youtube.playlistItems().insert.side_effect = lambda part, body: body["snippet"][
+        "resourceId"
+    ]["videoId"]
+    youtube.outcomes = {"VID1": [{"id": "ITEM1"}], "VID2": [http_error(400)]}
+
+    added = playlist_adder.add_videos_to_playlist(youtube, ["VID1", "VID2"], "PL1")
+
+    assert added == ["VID1"]
@@ -0,0 +1,214 @@
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+from googleapiclient.errors import HttpError
+
+# Adjust the path to import src modules
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from playlist_management.playlist_mirror import PlaylistMirror
+
+
+def not_modified():
+    return HttpError(MagicMock(status=304), b"")
+
+
+def playlists_page(etag, playlists):
+    return {
+        "etag": etag,
+        "items": [
+            {
+                "id": playlist_id,
+                "etag": playlist_etag,
+                "snippet": {"title": title},
+                "contentDetails": {"itemCount": count},
+            }
+            for playlist_id, title, playlist_etag, count in playlists
+        ],
+    }
+
+
+def items_page(video_ids):
+    return {
+        "items": [
+            {"snippet": {"resourceId": {"videoId": video_id}}} for video_id in video_ids
+        ]
+    }
+
+
+def make_request(outcome):
+    request = MagicMock()
+    request.headers = {}
+    if isinstance(outcome, Exception):
+        request.execute.side_effect = outcome
+    else:
+        request.execute.return_value = outcome
+    return request
+
+
+@pytest.fixture
+def youtube():
+    youtube = MagicMock()
+    youtube.playlists().list_next.return_value = None
+    youtube.playlistItems().list_next.return_value = None
+    return youtube
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit():
+    with patch("playlist_management.request_executor.get_rate_limiter"):
+        yield
+
+
+def test_sync_and_reuse_unchanged_playlists(tmp_path, youtube):
+    path = str(tmp_path / "mirror.json")
+    mirror = PlaylistMirror(path)
+    list_request = make_request(
+        playlists_page("P1", [("PL1", "Rock", "E1", 2), ("PL2", "Pop", "E2", 1)])
+    )
+    youtube.playlists().list.return_value = list_request
+    youtube.playlistItems().list.side_effect = [
+        make_request(items_page(["VID1", "VID2"])),
+        make_request(items_page(["VID3"])),
+    ]
+
+    assert mirror.sync_playlists(youtube) == {"rock": "PL1", "pop": "PL2"}
+    assert mirror.get_video_ids(youtube, "PL1") == {"VID1", "VID2"}
+    assert mirror.get_video_ids(youtube, "PL2") == {"VID3"}
+
+    mirror.save()
+
+    # Next run: the playlist page is unchanged (304) and so are the playlists.
+    reloaded = PlaylistMirror(path)
+    cached_request = make_request(not_modified())
+    youtube.playlists().list.return_value = cached_request
+    youtube.playlistItems().list.reset_mock()
+
+    assert reloaded.sync_playlists(youtube) == {"rock": "PL1", "pop": "PL2"}
+    assert cached_request.headers["If-None-Match"] == "P1"
+    assert reloaded.get_video_ids(youtube, "PL1") == {"VID1", "VID2"}
+    youtube.playlistItems().list.assert_not_called()
+
+
+def test_changed_playlist_is_listed_again(tmp_path, youtube):
+    path = str(tmp_path / "mirror.json")
+    mirror = PlaylistMirror(path)
+    youtube.playlists().list.return_value = make_request(
+        playlists_page("P1", [("PL1", "Rock", "E1", 1)])
+    )
+    youtube.playlistItems().list.return_value = make_request(items_page(["VID1"]))
+    mirror.sync_playlists(youtube)
+    mirror.get_video_ids(youtube, "PL1")
+
+    youtube.playlists().list.return_value = make_request(
+        playlists_page("P2", [("PL1", "Rock", "E9", 2)])
+    )
+    youtube.playlistItems().list.return_value = make_request(
+        items_page(["VID1", "VID4"])
+    )
+    mirror.sync_playlists(youtube)
+
+    assert mirror.get_video_ids(youtube, "PL1") == {"VID1", "VID4"}
+
+
+def test_own_inserts_keep_mirror_fresh(tmp_path, youtube):
+    mirror = PlaylistMirror(str(tmp_path / "mirror.json"))
+    youtube.playlists().list.return_value = make_request(
+        playlists_page("P1", [("PL1", "Rock", "E1", 1)])
+    )
+    youtube.playlistItems().list.return_value = make_request(items_page(["VID1"]))
+    mirror.sync_playlists(youtube)
+    mirror.get_video_ids(youtube, "PL1")
+    mirror.record_video("PL1", "VID2")
+
+    # Our insert changed the ETag; the mirror reads the new one back.
+    youtube.playlists().list.return_value = make_request(
+        playlists_page(None, [("PL1", "Rock", "E2", 2)])
+    )
+    mirror.refresh_changed(youtube)
+    youtube.playlists().list.return_value = make_request(
+        playlists_page("P2", [("PL1", "Rock", "E2", 2)])
+    )
+    mirror.sync_playlists(youtube)
+    youtube.playlistItems().list.reset_mock()
+
+    assert mirror.get_video_ids(youtube, "PL1") == {"VID1", "VID2"}
+    youtube.playlistItems().list.assert_not_called()
+
+
+def test_outside_change_with_same_item_count_is_listed_again(tmp_path, youtube):
+    mirror = PlaylistMirror(str(tmp_path / "mirror.json"))
+    youtube.playlists().list.return_value = make_request(
+        playlists_page("P1", [("PL1", "Rock", "E1", 2)])
+    )
+    youtube.playlistItems().list.return_value = make_request(items_page(["VID1", "VID2"]))
+    mirror.sync_playlists(youtube)
+    mirror.get_video_ids(youtube, "PL1")
+
+    # Someone removed VID2 and added VID3: same count, new ETag.
+    youtube.playlists().list.return_value = make_request(
+        playlists_page("P2", [("PL1", "Rock", "E2", 2)])
+    )
+    youtube.playlistItems().list.return_value = make_request(items_page(["VID1", "VID3"]))
+    mirror.sync_playlists(youtube)
+
+    assert mirror.get_video_ids(youtube, "PL1") == {"VID1", "VID3"}
+
+
+def test_refresh_drops_playlists_whose_count_disagrees(tmp_path, youtube):
+    mirror = PlaylistMirror(str(tmp_path / "mirror.json"))
+    mirror.record_playlist("PL9")
+    mirror.record_video("PL9", "VID1")
+    youtube.playlists().list.return_value = make_request(
+        playlists_page(None, [("PL9", "Mix", "E5", 2)])
+    )
+
+    mirror.refresh_changed(youtube)
+
+    assert "PL9" not in mirror.items
+
+
+def test_changes_are_written_once_on_save(tmp_path, youtube):
+    path = tmp_path / "mirror.json"
+    mirror = PlaylistMirror(str(path))
+    youtube.playlists().list.return_value = make_request(
+        playlists_page("P1", [("PL1", "Rock", "E1", 1)])
+    )
+    youtube.playlistItems().list.return_value = make_request(items_page(["VID1"]))
+    mirror.sync_playlists(youtube)
+    mirror.get_video_ids(youtube, "PL1")
+    mirror.record_video("PL1", "VID2")
+    assert not path.exists()
+
+    mirror.save()
+    assert PlaylistMirror(str(path)).items["PL1"]["video_ids"] == {"VID1", "VID2"}
+
+    path.unlink()
+    mirror.save()  # Nothing changed since the last save.
+    assert not path.exists()
+
+
+def test_refresh_keeps_playlists_that_hold_a_video_twice(tmp_path, youtube):
+    mirror = PlaylistMirror(str(tmp_path / "mirror.json"))
+    youtube.playlists().list.return_value = make_request(
+        playlists_page("P1", [("PL1", "Rock", "E1", 3)])
+    )
+    youtube.playlistItems().list.return_value = make_request(
+        items_page(["VID1", "VID1", "VID2"])
+    )
+    mirror.sync_playlists(youtube)
+    mirror.get_video_ids(youtube, "PL1")
+    mirror.record_video("PL1", "VID3")
+    mirror.forget_videos("PL1", set(), 1)  # Removed the extra copy of VID1.
+
+    youtube.playlists().list.return_value = make_request(
+        playlists_page(None, [("PL1", "Rock", "E2", 3)])
+    )
+    mirror.refresh_changed(youtube)
+
+    assert mirror.items["PL1"]["item_count"] == 3
+    assert mirror.items["PL1"]["etag"] == "E2"
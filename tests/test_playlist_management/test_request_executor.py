@@ -0,0 +1,148 @@
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+# Adjust the path to import src modules
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from playlist_management import request_executor
+from playlist_management.request_executor import classify_error, execute_request, retry_after
+from utils.quota import QuotaExhausted
+from utils.retry import PERMANENT, QUOTA, RETRYABLE, RetryPolicy
+
+
+def http_error(status, reason=None, headers=None):
+    content = b"error"
+    if reason:
+        content = ('{"error": {"errors": [{"reason": "%s"}]}}' % reason).encode()
+    return HttpError(httplib2.Response({"status": status, **(headers or {})}), content)
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit():
+    with patch.object(request_executor, "get_rate_limiter"):
+        yield
+
+
+@pytest.fixture
+def sleeps():
+    sleeps = []
+    policy = RetryPolicy(max_attempts=3, base_delay=1, sleep=sleeps.append)
+    with patch.object(request_executor, "get_retry_policy", return_value=policy):
+        yield sleeps
+
+
+@pytest.mark.parametrize(
+    "error, kind",
+    [
+        (http_error(500), RETRYABLE),
+        (http_error(503), RETRYABLE),
+        (http_error(429), RETRYABLE),
+        (http_error(403, "rateLimitExceeded"), RETRYABLE),
+        (http_error(409, "SERVICE_UNAVAILABLE"), RETRYABLE),
+        (http_error(403, "quotaExceeded"), QUOTA),
+        (http_error(403, "forbidden"), PERMANENT),
+        (http_error(404), PERMANENT),
+        (http_error(400), PERMANENT),
+        (TimeoutError("timed out"), RETRYABLE),
+        (ConnectionResetError(), RETRYABLE),
+        (httplib2.ServerNotFoundError("no such host"), RETRYABLE),
+        (ValueError("bad"), PERMANENT),
+    ],
+)
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+
+def test_retry_after_parses_seconds_and_ignores_missing_header():
+    assert retry_after(http_error(503, headers={"retry-after": "7"})) == 7
+    assert retry_after(http_error(503)) is None
+    assert retry_after(HttpError(MagicMock(status=503), b"")) is None
+
+
+def test_execute_request_retries_transient_errors(sleeps):
+    request = MagicMock()
+    request.execute.side_effect = [
+        http_error(503),
+        http_error(403, "rateLimitExceeded", {"retry-after": "5"}),
+        {"items": []},
+    ]
+
+    assert execute_request(request, "search.list") == {"items": []}
+    assert request.execute.call_count == 3
+    assert len(sleeps) == 2
+    assert sleeps[1] >= 5
+
+
+def test_execute_request_gives_up_after_max_attempts(sleeps):
+    request = MagicMock()
+    request.execute.side_effect = http_error(500)
+
+    with pytest.raises(HttpError):
+        execute_request(request, "search.list")
+    assert request.execute.call_count == 3
+
+
+def test_network_failures_that_outlast_retries_are_reported_not_raised(sleeps):
+    from playlist_management.playlist_adder import search_video
+    from utils.retry import get_failure_report
+
+    youtube = MagicMock()
+    youtube.search().list().execute.side_effect = ConnectionResetError("reset by peer")
+
+    assert search_video(youtube, "Creep Radiohead") is None
+    assert youtube.search().list().execute.call_count == 3
+    failure = get_failure_report().failures[0]
+    assert failure["status"] is None
+    assert "ConnectionResetError" in failure["error"]
+
+
+def test_execute_request_does_not_retry_permanent_or_quota_errors(sleeps):
+    request = MagicMock()
+    request.execute.side_effect = http_error(404)
+    with pytest.raises(HttpError):
+        execute_request(request, "search.list")
+
+    request.execute.side_effect = http_error(403, "quotaExceeded")
+    with pytest.raises(QuotaExhausted):
+        execute_request(request, "search.list")
+
+    assert request.execute.call_count == 2
+    assert sleeps == []
+
+
+def test_permanent_failures_are_reported():
+    from playlist_management.playlist_adder import search_video
+    from utils.retry import get_failure_report
+
+    youtube = MagicMock()
+    youtube.search().list().execute.side_effect = http_error(400)
+
+    assert search_video(youtube, "Creep Radiohead") is None
+    assert get_failure_report().failures[0]["item"] == "Creep Radiohead"
+    assert get_failure_report().failures[0]["status"] == 400
+
+
+def test_execute_request_records_latency_outcome_and_quota(sleeps):
+    from utils.metrics import get_metrics
+
+    request = MagicMock()
+    request.execute.side_effect = [http_error(503), {"items": []}]
+
+    execute_request(request, "search.list")
+
+    metrics = get_metrics()
+    assert metrics.histogram("youtube_api_request_seconds", method="search.list").count == 2
+    assert metrics.counter_value(
+        "youtube_api_requests_total", method="search.list", outcome=RETRYABLE
+    ) == 1
+    assert metrics.counter_value(
+        "youtube_api_requests_total", method="search.list", outcome="success"
+    ) == 1
+    assert metrics.counter_value("youtube_quota_units_total", method="search.list") == 200
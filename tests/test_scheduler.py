@@ -0,0 +1,107 @@
+import os
+import sys
+
+# Add the src directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from scheduler import (
+    CREATE_COST,
+    INSERT_COST,
+    SEARCH_COST,
+    get_scheduler_settings,
+    playlist_cost,
+    schedule_playlists,
+)
+from config import config
+from utils.track import Track
+
+
+def tracks(*queries):
+    return [Track(query) for query in queries]
+
+
+def names(chunks):
+    return [(name, [song.query for song in songs]) for name, songs in chunks]
+
+
+def test_resolved_songs_come_first_existing_playlists_before_new_ones():
+    playlists = {
+        "New": tracks("n1", "cached-n2"),
+        "Old": tracks("o1", "cached-o2", "o3"),
+    }
+
+    chunks = schedule_playlists(
+        playlists, {"old": "PL1"}, lambda song: song.query.startswith("cached")
+    )
+
+    assert names(chunks)[:2] == [("Old", ["cached-o2"]), ("New", ["cached-n2"])]
+    assert sorted(query for _, songs in names(chunks)[2:] for query in songs) == [
+        "n1",
+        "o1",
+        "o3",
+    ]
+
+
+def test_round_robin_takes_turns_between_playlists_smallest_first():
+    playlists = {
+        "Big": tracks(*[f"b{i}" for i in range(5)]),
+        "Small": tracks("s0", "s1", "s2"),
+    }
+
+    chunks = schedule_playlists(playlists, {}, lambda song: False, slice_size=2)
+
+    assert names(chunks) == [
+        ("Small", ["s0", "s1"]),
+        ("Big", ["b0", "b1"]),
+        ("Small", ["s2"]),
+        ("Big", ["b2", "b3"]),
+        ("Big", ["b4"]),
+    ]
+
+
+def test_songs_objective_puts_shared_searches_first():
+    playlists = {
+        "A": tracks("a1", "Shared Song"),
+        "B": tracks("b1", "shared   song"),
+    }
+
+    chunks = schedule_playlists(playlists, {}, lambda song: False, "songs", slice_size=10)
+
+    assert names(chunks) == [
+        ("A", ["Shared Song"]),
+        ("B", ["shared   song"]),
+        ("A", ["a1"]),
+        ("B", ["b1"]),
+    ]
+
+
+def test_playlists_objective_completes_cheapest_playlists_within_budget():
+    playlists = {
+        "Large": tracks("l1", "l2", "l3"),
+        "Small": tracks("s1"),
+        "Medium": tracks("m1", "m2"),
+    }
+    small = playlist_cost("Small", playlists["Small"], {}, lambda song: False)
+    medium = playlist_cost("Medium", playlists["Medium"], {}, lambda song: False)
+    assert small == CREATE_COST + SEARCH_COST + INSERT_COST
+
+    chunks = schedule_playlists(
+        playlists, {}, lambda song: False, "playlists", budget=small + medium
+    )
+
+    assert names(chunks)[:2] == [("Small", ["s1"]), ("Medium", ["m1", "m2"])]
+    # What does not fit is still scheduled, after the playlists that do.
+    assert names(chunks)[2:] == [("Large", ["l1", "l2", "l3"])]
+
+
+def test_playlist_cost_counts_shared_and_already_searched_queries_once():
+    songs = tracks("Song", "song", "Other")
+    cost = playlist_cost("Mix", songs, {"mix": "PL1"}, lambda song: False, searched={"other"})
+    assert cost == 3 * INSERT_COST + SEARCH_COST
+
+
+def test_settings_fall_back_to_songs_objective(monkeypatch):
+    monkeypatch.setitem(
+        config, "scheduler", {"enabled": True, "objective": "albums", "slice_size": 0}
+    )
+    assert get_scheduler_settings() == (True, "songs", 1)
@@ -0,0 +1,117 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Adjust the path to import src modules
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from utils.csv_stream import MissingColumnsError, iter_playlist_chunks, prefetch
+from utils.track import Track
+
+HEADER = "Track name,Artist name,Album,Playlist name,Type,ISRC,Spotify - id\n"
+COLUMNS = ("Track name", "Artist name", "Playlist name")
+
+
+def write_csv(tmp_path, rows):
+    path = tmp_path / "playlist.csv"
+    path.write_text(HEADER + "".join(rows), encoding="utf-8")
+    return str(path)
+
+
+def chunks(path, **kwargs):
+    return [
+        (playlist, [str(track) for track in tracks])
+        for playlist, tracks in iter_playlist_chunks(path, "utf-8", *COLUMNS, **kwargs)
+    ]
+
+
+def test_sorted_file_streams_one_playlist_at_a_time(tmp_path):
+    path = write_csv(
+        tmp_path,
+        [
+            " Shape of You ,ed sheeran,Divide, rock mix ,Track,ISRC1,SP1\n",
+            "Creep,Radiohead,Pablo Honey,Rock Mix,Track,ISRC2,SP2\n",
+            "Bad Guy,Billie Eilish,WWAFA,Pop,Track,ISRC3,SP3\n",
+        ],
+    )
+
+    assert chunks(path) == [
+        ("Rock Mix", ["Shape of You Ed Sheeran", "Creep Radiohead"]),
+        ("Pop", ["Bad Guy Billie Eilish"]),
+    ]
+
+
+def test_rows_missing_required_fields_and_bad_lines_are_skipped(tmp_path):
+    path = write_csv(
+        tmp_path,
+        [
+            "Creep,Radiohead,Pablo Honey,Rock,Track,ISRC2,SP2\n",
+            ",Nobody,Album,Rock,Track,ISRC,SP\n",
+            "Too,Many,Fields,Rock,Track,ISRC,SP,extra\n",
+        ],
+    )
+
+    assert chunks(path) == [("Rock", ["Creep Radiohead"])]
+
+
+def test_chunk_size_and_buffer_ceiling(tmp_path):
+    rows = [f"Song {i},Artist,Album,{'AB'[i % 2]},Track,I,S\n" for i in range(7)]
+    path = write_csv(tmp_path, rows)
+
+    result = chunks(path, chunk_size=2)
+    assert all(len(songs) <= 2 for _, songs in result)
+    assert sorted(song for _, songs in result for song in songs) == sorted(
+        f"Song {i} Artist" for i in range(7)
+    )
+
+    # Interleaved playlists flush on every change of playlist name.
+    assert len(chunks(path, max_buffered_rows=1)) == 7
+
+
+def test_tracks_carry_identifiers(tmp_path):
+    path = write_csv(tmp_path, ["Creep,Radiohead,Pablo Honey,Rock,Track,gb-aye-92-00001,SP2\n"])
+
+    [(_, [track])] = iter_playlist_chunks(
+        path, "utf-8", *COLUMNS, isrc_col="ISRC", spotify_col="Spotify - id"
+    )
+
+    assert track == Track("Creep Radiohead", "GBAYE9200001", "SP2")
+
+
+def test_missing_columns(tmp_path):
+    path = tmp_path / "playlist.csv"
+    path.write_text("Track name,Playlist name\nCreep,Rock\n", encoding="utf-8")
+
+    with pytest.raises(MissingColumnsError) as excinfo:
+        chunks(str(path))
+    assert excinfo.value.missing == ["Artist name"]
+
+
+def test_prefetch_preserves_order_and_errors():
+    assert list(prefetch(iter(range(10)), max_pending=2)) == list(range(10))
+
+    def failing():
+        yield 1
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        list(prefetch(failing()))
+
+
+def test_prefetch_stops_the_producer_when_the_consumer_stops_early():
+    items = prefetch(iter(range(2)), max_pending=1)
+    assert next(items) == 0
+    # The producer has queued 1 and now waits to queue the end marker.
+    time.sleep(0.05)
+    items.close()
+
+    for _ in range(50):
+        if not any(thread.name == "csv-reader" for thread in threading.enumerate()):
+            break
+        time.sleep(0.05)
+    assert not any(thread.name == "csv-reader" for thread in threading.enumerate())
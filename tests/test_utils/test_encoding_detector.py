@@ -69,7 +69,7 @@ def test_detect_file_encoding_with_parameter():
     """
     Test encoding detection with a specified file path.
     """
-    sample_bytes = b"Some other test data."
+    sample_bytes = b"Some other test data: caf\xe9."
     with patch(
         "builtins.open", mock_open(read_data=sample_bytes)
     ) as mocked_file, patch(
@@ -80,3 +80,62 @@ def test_detect_file_encoding_with_parameter():
         encoding = detect_file_encoding(file_path="custom/path.csv")
         assert encoding == "ISO-8859-1"
         mocked_file.assert_called_once_with("custom/path.csv", "rb")
+
+
+def test_detect_file_encoding_bom(tmp_path):
+    """
+    Test that a byte order mark decides the encoding without chardet.
+    """
+    path = tmp_path / "bom.csv"
+    path.write_bytes(b"\xef\xbb\xbfTrack name\n")
+    with patch("src.utils.encoding_detector.chardet") as mock_chardet:
+        assert detect_file_encoding(str(path)) == "utf-8-sig"
+        mock_chardet.detect.assert_not_called()
+
+    path.write_bytes("Track name\n".encode("utf-16"))
+    assert detect_file_encoding(str(path)) == "utf-16"
+
+
+def test_detect_file_encoding_validates_whole_file(tmp_path):
+    """
+    Test that non-ASCII text far past the sample is still detected as UTF-8.
+    """
+    path = tmp_path / "late.csv"
+    path.write_bytes(b"a" * 50000 + "根本不是我對手".encode("utf-8"))
+    with patch("src.utils.encoding_detector.chardet") as mock_chardet:
+        assert detect_file_encoding(str(path)) == "utf-8"
+        mock_chardet.detect.assert_not_called()
+
+
+def test_detect_file_encoding_falls_back_on_invalid_utf8(tmp_path):
+    """
+    Test that chardet sees the bytes that broke UTF-8 validation.
+    """
+    path = tmp_path / "latin1.csv"
+    path.write_bytes(b"a" * 50000 + "Beyoncé".encode("latin-1"))
+    with patch(
+        "src.utils.encoding_detector.chardet.detect",
+        return_value={"encoding": "ISO-8859-1", "confidence": 0.7},
+    ) as mock_detect:
+        assert detect_file_encoding(str(path)) == "ISO-8859-1"
+    assert b"\xe9" in mock_detect.call_args.args[0]
+
+
+def test_detect_file_encoding_cache(tmp_path):
+    """
+    Test that results are cached by path, size and mtime.
+    """
+    path = tmp_path / "cached.csv"
+    path.write_bytes("Beyoncé".encode("latin-1"))
+    settings = {"encoding_cache": {"enabled": True, "path": str(tmp_path / "enc.json")}}
+    with patch("src.utils.encoding_detector.config", settings), patch(
+        "src.utils.encoding_detector.chardet.detect",
+        return_value={"encoding": "ISO-8859-1", "confidence": 0.7},
+    ) as mock_detect:
+        assert detect_file_encoding(str(path)) == "ISO-8859-1"
+        assert detect_file_encoding(str(path)) == "ISO-8859-1"
+        assert mock_detect.call_count == 1
+
+        path.write_bytes("Beyoncé and more".encode("latin-1"))
+        assert detect_file_encoding(str(path)) == "ISO-8859-1"
+        assert mock_detect.call_count == 2
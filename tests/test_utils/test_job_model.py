@@ -0,0 +1,64 @@
+import os
+import pickle
+import sys
+
+# Adjust the path to import src modules
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from utils.job_model import (
+    VideoHandles,
+    VideoSet,
+    get_video_handles,
+    intern_text,
+    pack_outcome,
+    unpack_outcome,
+)
+
+
+def test_video_handles_are_stable_and_zero_means_no_video():
+    handles = VideoHandles()
+    first = handles.handle("VIDEO_A")
+    assert handles.handle("VIDEO_B") != first
+    assert handles.handle("VIDEO_A") == first
+    assert handles.handle(None) == 0
+    assert handles.find("VIDEO_C") is None
+    assert handles.video_id(first) == "VIDEO_A"
+    assert len(handles) == 2
+
+
+def test_pack_outcome_round_trips():
+    for video_id, status in (("VIDEO_A", "added"), (None, "not_found"), ("VIDEO_B", "rejected")):
+        assert unpack_outcome(pack_outcome(video_id, status)) == (video_id, status)
+
+
+def test_video_set_behaves_like_a_set_of_ids():
+    videos = VideoSet(["VIDEO_A", "VIDEO_B", "VIDEO_A"])
+    assert len(videos) == 2
+    assert "VIDEO_A" in videos
+    assert "NEVER_SEEN" not in videos
+    assert get_video_handles().find("NEVER_SEEN") is None
+
+    videos.add("VIDEO_C")
+    videos.update(["VIDEO_D"])
+    videos.discard("VIDEO_A")
+    videos.discard("NEVER_SEEN")
+    videos -= ["VIDEO_B"]
+    assert videos == {"VIDEO_C", "VIDEO_D"}
+    assert {"VIDEO_C", "VIDEO_D"} == videos
+    assert sorted(videos) == ["VIDEO_C", "VIDEO_D"]
+
+
+def test_video_set_pickles_ids_not_handles():
+    videos = VideoSet(["VIDEO_A", "VIDEO_B"])
+    state = pickle.dumps(videos)
+    assert b"VIDEO_A" in state
+    assert pickle.loads(state) == {"VIDEO_A", "VIDEO_B"}
+
+
+def test_intern_text_shares_equal_strings():
+    first = intern_text("".join(["Rock", " Classics"]))
+    second = intern_text("".join(["Rock ", "Classics"]))
+    assert first is second
+    assert intern_text(None) is None
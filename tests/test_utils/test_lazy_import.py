@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+# Adjust the path to import src modules
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+sys.path.insert(0, SRC_DIR)
+
+from utils.lazy_import import LazyImport
+
+
+def test_lazy_import_defers_until_first_use():
+    lazy_json = LazyImport("json")
+    assert "not loaded" in repr(lazy_json)
+
+    assert lazy_json.dumps([1]) == "[1]"
+    assert "loaded" in repr(lazy_json)
+
+
+def test_lazy_attribute_is_callable():
+    dumps = LazyImport("json", "dumps")
+    assert dumps({"a": 1}) == '{"a": 1}'
+
+
+def test_importing_main_has_no_heavy_imports_or_side_effects(tmp_path):
+    code = (
+        "import sys, logging, main, config; "
+        "heavy = [m for m in ('pandas', 'googleapiclient.discovery', "
+        "'google_auth_oauthlib', 'chardet', 'yaml') if m in sys.modules]; "
+        "print(heavy, config.config._data is None, len(logging.getLogger().handlers))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=str(tmp_path),
+        env={**os.environ, "PYTHONPATH": SRC_DIR},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.strip() == "[] True 0"
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,75 @@
+import os
+import sys
+
+import pytest
+
+# Add the src directory to sys.path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from utils.match_index import MatchIndex
+from utils.track import Track, clean_identifier
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = MatchIndex(str(tmp_path / "index.sqlite3"))
+    yield index
+    index.close()
+
+
+def test_clean_identifier():
+    assert clean_identifier(" gb-aye-92-00001 ", upper=True) == "GBAYE9200001"
+    assert clean_identifier(float("nan")) is None
+    assert clean_identifier("  ") is None
+    assert clean_identifier("4uLU6hMCjMI75M1A2tKUQC") == "4uLU6hMCjMI75M1A2tKUQC"
+
+
+def test_lookup_prefers_isrc_and_counts_hits(index):
+    index.record(Track("A", "ISRC1"), "VID1")
+    index.record(Track("B", None, "SP1"), "VID2")
+
+    assert index.lookup(Track("Other Query", "isrc1", "SP1")) == "VID1"
+    assert index.lookup(Track("Other Query", None, "SP1")) == "VID2"
+    assert index.lookup(Track("A")) is None
+    assert index.hits == 2
+
+
+def test_index_persists_between_instances(tmp_path):
+    path = str(tmp_path / "index.sqlite3")
+    first = MatchIndex(path)
+    first.record(Track("A", "ISRC1", "SP1"), "VID1")
+    first.close()
+
+    second = MatchIndex(path)
+    assert len(second) == 2
+    assert second.lookup(Track("A", None, "SP1")) == "VID1"
+    second.close()
+
+
+def test_csv_round_trip(index, tmp_path):
+    source = tmp_path / "matches.csv"
+    source.write_text(
+        "isrc,spotify_id,video_id\nGB-AYE-92-00001,SP1,VID1\n,SP2,VID2\nISRC3,,\n",
+        encoding="utf-8",
+    )
+
+    assert index.import_csv(str(source)) == 3
+    assert index.lookup(Track("A", "GBAYE9200001")) == "VID1"
+
+    exported = tmp_path / "export.csv"
+    assert index.export_csv(str(exported)) == 3
+    copy = MatchIndex(":memory:")
+    assert copy.import_csv(str(exported)) == 3
+    assert copy.lookup(Track("B", None, "SP2")) == "VID2"
+    copy.close()
+
+
+def test_forget_removes_every_mapping_to_a_video(index):
+    index.record(Track("A", "ISRC1", "SP1"), "VID1")
+    index.record(Track("B", "ISRC2"), "VID2")
+
+    assert index.forget("VID1") == 2
+    assert index.lookup(Track("A", "ISRC1", "SP1")) is None
+    assert index.lookup(Track("B", "ISRC2")) == "VID2"
@@ -0,0 +1,143 @@
+import json
+import os
+import sys
+import urllib.request
+
+import pytest
+
+# Add the src directory to sys.path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from utils.metrics import Histogram, MetricsRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram(buckets=(0.1, 0.2, 0.5))
+    for value in [0.05] * 50 + [0.15] * 40 + [0.4] * 9 + [3.0]:
+        histogram.observe(value)
+
+    assert histogram.counts == [50, 40, 9, 1]
+    assert histogram.count == 100
+    assert histogram.sum == pytest.approx(0.05 * 50 + 0.15 * 40 + 0.4 * 9 + 3.0)
+    assert histogram.quantile(0.5) == pytest.approx(0.1)
+    assert 0.1 < histogram.quantile(0.9) <= 0.2
+    assert 0.2 < histogram.quantile(0.99) <= 0.5
+    assert histogram.quantile(1.0) == pytest.approx(3.0)
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_timer_observes_block_duration_even_on_error():
+    clock = FakeClock()
+    metrics = MetricsRegistry(clock=clock)
+
+    with metrics.timer("phase_seconds", phase="search"):
+        clock.now += 0.25
+    with pytest.raises(RuntimeError):
+        with metrics.timer("phase_seconds", phase="search"):
+            clock.now += 0.5
+            raise RuntimeError("boom")
+
+    histogram = metrics.histogram("phase_seconds", phase="search")
+    assert histogram.count == 2
+    assert histogram.sum == pytest.approx(0.75)
+
+
+def test_prometheus_text_format():
+    metrics = MetricsRegistry(buckets=(0.1, 1.0))
+    metrics.inc("requests_total", method="search.list", outcome="success")
+    metrics.inc("requests_total", 2, method="search.list", outcome="success")
+    metrics.observe("request_seconds", 0.05, method="search.list")
+    metrics.observe("request_seconds", 0.5, method="search.list")
+
+    lines = metrics.to_prometheus().splitlines()
+
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{method="search.list",outcome="success"} 3' in lines
+    assert "# TYPE request_seconds histogram" in lines
+    assert 'request_seconds_bucket{method="search.list",le="0.1"} 1' in lines
+    assert 'request_seconds_bucket{method="search.list",le="1.0"} 2' in lines
+    assert 'request_seconds_bucket{method="search.list",le="+Inf"} 2' in lines
+    assert 'request_seconds_sum{method="search.list"} 0.55' in lines
+    assert 'request_seconds_count{method="search.list"} 2' in lines
+
+
+def test_json_summary_and_files(tmp_path):
+    metrics = MetricsRegistry()
+    metrics.inc("requests_total", method="playlists.list", outcome="retryable")
+    for _ in range(10):
+        metrics.observe("request_seconds", 0.02, method="playlists.list")
+
+    metrics.write_json(str(tmp_path / "metrics.json"))
+    metrics.write_prometheus(str(tmp_path / "out" / "metrics.prom"))
+
+    with open(tmp_path / "metrics.json", encoding="utf-8") as file:
+        summary = json.load(file)
+    assert summary["counters"]["requests_total"] == [
+        {"labels": {"method": "playlists.list", "outcome": "retryable"}, "value": 1}
+    ]
+    series = summary["histograms"]["request_seconds"][0]
+    assert series["count"] == 10
+    assert series["mean"] == pytest.approx(0.02)
+    assert series["p50"] <= series["p95"] <= series["p99"] <= series["max"] == 0.02
+    assert (tmp_path / "out" / "metrics.prom").read_text().startswith("# TYPE")
+
+
+def test_serve_exposes_metrics_endpoint():
+    metrics = MetricsRegistry()
+    metrics.inc("requests_total", method="search.list", outcome="success")
+    server = metrics.serve(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            body = response.read().decode("utf-8")
+        assert 'requests_total{method="search.list",outcome="success"} 1' in body
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/other")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_merge_adds_snapshot_of_another_registry():
+    import pickle
+
+    worker = MetricsRegistry(buckets=(0.1, 1.0))
+    worker.inc("requests_total", 2, method="search.list")
+    worker.observe("request_seconds", 0.5, method="search.list")
+    coordinator = MetricsRegistry(buckets=(0.1, 1.0))
+    coordinator.inc("requests_total", method="search.list")
+    coordinator.observe("request_seconds", 0.05, method="search.list")
+
+    coordinator.merge(pickle.loads(pickle.dumps(worker.snapshot())))
+
+    assert coordinator.counter_value("requests_total", method="search.list") == 3
+    histogram = coordinator.histogram("request_seconds", method="search.list")
+    assert histogram.counts == [1, 1, 0]
+    assert histogram.count == 2
+    assert histogram.max == 0.5
+
+
+def test_time_to_first_call_is_observed_once():
+    clock = FakeClock()
+    metrics = MetricsRegistry(clock=clock)
+    assert metrics.mark_first_call() is None
+
+    metrics.mark_started()
+    clock.now += 1.5
+    assert metrics.mark_first_call() == pytest.approx(1.5)
+    clock.now += 1.0
+    assert metrics.mark_first_call() is None
+
+    histogram = metrics.histogram("time_to_first_call_seconds")
+    assert histogram.count == 1
+    assert histogram.sum == pytest.approx(1.5)
@@ -0,0 +1,107 @@
+import os
+import sys
+import threading
+import time
+
+# Add the src directory to sys.path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from utils.query_normalizer import QueryMemo, canonical_query, count_unique_queries
+from utils.search_cache import MISS
+
+
+def test_canonical_query_collapses_variants():
+    assert canonical_query("Feels (feat. Pharrell Williams, Katy Perry & Big Sean) Calvin Harris") == (
+        "feels calvin harris"
+    )
+    assert canonical_query("Come Together - Remastered 2009 The Beatles") == (
+        canonical_query("come together the beatles")
+    )
+    assert canonical_query("Let It Be (2021 Remaster) The Beatles") == "let it be the beatles"
+    assert canonical_query("Don't Start Now  Dua Lipa") == canonical_query("dont start now dua lipa")
+    assert canonical_query("Rock & Roll Led Zeppelin") == "rock and roll led zeppelin"
+    assert canonical_query("根本不是我對手 Jolin Tsai") == "根本不是我對手 jolin tsai"
+
+
+def test_canonical_query_keeps_distinct_recordings():
+    assert canonical_query("Creep (Live) Radiohead") != canonical_query("Creep Radiohead")
+    assert canonical_query("Creep (Acoustic) Radiohead") != canonical_query("Creep Radiohead")
+
+
+def test_count_unique_queries():
+    queries = ["Creep Radiohead", "creep radiohead", "Creep - Remastered Radiohead", "Imagine John Lennon"]
+    assert count_unique_queries(queries) == (4, 2)
+
+
+def test_memo_resolves_each_key_once():
+    memo = QueryMemo()
+    calls = []
+
+    def resolver(query):
+        calls.append(query)
+        return "VID1"
+
+    assert memo.resolve("Creep Radiohead", resolver) == "VID1"
+    assert memo.resolve("CREEP radiohead!", resolver) == "VID1"
+    assert memo.get("creep radiohead") == "VID1"
+    assert memo.get("Imagine John Lennon") is MISS
+    assert calls == ["Creep Radiohead"]
+    assert memo.saved == 2
+
+
+def test_memo_waits_for_concurrent_resolution():
+    memo = QueryMemo()
+    calls = []
+
+    def resolver(query):
+        calls.append(query)
+        time.sleep(0.05)
+        return "VID1"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(memo.resolve("Creep Radiohead", resolver)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["VID1"] * 4
+    assert len(calls) == 1
+    assert memo.saved == 3
+
+
+def test_memo_resolve_async_single_flight():
+    import asyncio
+
+    memo = QueryMemo()
+    calls = []
+
+    async def resolver(query):
+        calls.append(query)
+        await asyncio.sleep(0.01)
+        return "VID1"
+
+    async def main():
+        return await asyncio.gather(
+            memo.resolve_async("Creep Radiohead", resolver),
+            memo.resolve_async("creep radiohead", resolver),
+        )
+
+    assert asyncio.run(main()) == ["VID1", "VID1"]
+    assert calls == ["Creep Radiohead"]
+    assert memo.get("Creep Radiohead") == "VID1"
+    assert memo.saved == 2
+
+
+def test_memo_counts_only_hits_that_would_search():
+    memo = QueryMemo()
+    memo.set("Creep Radiohead", "VID1")
+
+    assert memo.get("creep radiohead", lambda query: False) == "VID1"
+    assert memo.resolve("Creep - Remastered Radiohead", None, lambda query: True) == "VID1"
+    assert memo.saved == 1
@@ -0,0 +1,138 @@
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from googleapiclient.errors import HttpError
+
+# Adjust the path to import src modules
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from utils.quota import (
+    QuotaExhausted,
+    QuotaLedger,
+    estimate_run_cost,
+    next_reset,
+    quota_day,
+)
+from playlist_management import request_executor
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_quota_day_uses_pacific_time():
+    # 05:00 UTC is still the previous day in California.
+    assert quota_day(utc(2024, 6, 2, 5, 0)) == "2024-06-01"
+    assert quota_day(utc(2024, 6, 2, 8, 0)) == "2024-06-02"
+
+
+def test_next_reset_is_pacific_midnight():
+    reset = next_reset(utc(2024, 6, 2, 5, 0))
+    assert reset.astimezone(timezone.utc) == utc(2024, 6, 2, 7, 0)
+
+
+def test_charge_records_units_per_method():
+    ledger = QuotaLedger(None, daily_limit=1000)
+    ledger.charge("search.list")
+    ledger.charge("playlistItems.insert", count=2)
+    ledger.charge("playlists.list")
+
+    assert ledger.spent() == 201
+    assert ledger.remaining() == 799
+    assert ledger.spent_by_method() == {
+        "search.list": 100,
+        "playlistItems.insert": 100,
+        "playlists.list": 1,
+    }
+
+
+def test_charge_stops_before_budget_runs_out():
+    ledger = QuotaLedger(None, daily_limit=300, reserve=50)
+    ledger.charge("search.list")
+    ledger.charge("search.list")
+
+    assert not ledger.can_afford("search.list")
+    with pytest.raises(QuotaExhausted):
+        ledger.charge("search.list")
+    assert ledger.spent() == 200
+    ledger.charge("playlistItems.insert")
+
+
+def test_ledger_persists_per_day(tmp_path):
+    path = str(tmp_path / "ledger.json")
+    now = utc(2024, 6, 2, 12, 0)
+    ledger = QuotaLedger(path, clock=lambda: now)
+    ledger.charge("search.list")
+    ledger.flush()
+
+    reloaded = QuotaLedger(path, clock=lambda: now)
+    assert reloaded.spent() == 100
+
+    next_day = QuotaLedger(path, clock=lambda: utc(2024, 6, 3, 12, 0))
+    assert next_day.spent() == 0
+    with open(path) as file:
+        assert json.load(file)["days"]["2024-06-02"]["total"] == 100
+
+
+def test_charges_are_saved_by_timer_not_on_every_call(tmp_path):
+    path = tmp_path / "ledger.json"
+    ledger = QuotaLedger(str(path), save_interval=0.05)
+    ledger.charge("search.list")
+    ledger.charge("playlistItems.insert")
+    assert not path.exists()
+    assert ledger.spent() == 150
+
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert QuotaLedger(str(path)).spent() == 150
+
+
+def test_estimate_run_cost():
+    playlists = {"Rock": ["A", "B", "C"], "Pop": ["C", "D"]}
+    estimate = estimate_run_cost(playlists, {"rock": "PL1"}, cached_queries={"A"})
+
+    assert estimate["search.list"] == 300  # B, C, D
+    assert estimate["playlists.insert"] == 50  # Pop
+    assert estimate["playlistItems.insert"] == 250
+    assert estimate["playlistItems.list"] == 1
+    assert estimate["total"] == 601
+
+
+def test_execute_request_charges_quota():
+    ledger = QuotaLedger(None, daily_limit=150)
+    request = MagicMock()
+    request.execute.return_value = {"items": []}
+
+    with patch.object(request_executor, "get_quota_ledger", return_value=ledger), patch.object(
+        request_executor, "get_rate_limiter"
+    ):
+        assert request_executor.execute_request(request, "search.list") == {"items": []}
+        with pytest.raises(QuotaExhausted):
+            request_executor.execute_request(request, "search.list")
+
+    assert request.execute.call_count == 1
+
+
+def test_execute_request_converts_quota_exceeded_error():
+    ledger = QuotaLedger(None, daily_limit=10000)
+    request = MagicMock()
+    request.execute.side_effect = HttpError(
+        MagicMock(status=403),
+        b'{"error": {"errors": [{"reason": "quotaExceeded"}]}}',
+    )
+
+    with patch.object(request_executor, "get_quota_ledger", return_value=ledger), patch.object(
+        request_executor, "get_rate_limiter"
+    ):
+        with pytest.raises(QuotaExhausted):
+            request_executor.execute_request(request, "search.list")
+
+    assert ledger.remaining() == 0
@@ -0,0 +1,71 @@
+import os
+import sys
+
+import pytest
+
+# Adjust the path to import src modules
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from utils.ranking import (
+    Candidate,
+    best_candidates,
+    candidates_from_search,
+    durations_from_videos,
+    parse_duration,
+    score_candidates,
+)
+
+CREEP = [
+    Candidate("COVER", "Radiohead - Creep (Cover)", "Kid Covers", 230),
+    Candidate("TOPIC", "Creep", "Radiohead - Topic", 236),
+    Candidate("LIVE", "Radiohead - Creep (Live at Glastonbury)", "Radiohead", 300),
+    Candidate("MIX", "Radiohead - Creep / Karma Police / No Surprises", "Radiohead", 1500),
+]
+
+
+def test_prefers_official_upload_over_cover_and_live():
+    assert best_candidates(["Creep Radiohead"], [CREEP]) == ["TOPIC"]
+    assert best_candidates(["Creep Radiohead"], [CREEP], rejected={"TOPIC", "MIX"}) == ["COVER"]
+    # Asking for a live version lifts the penalty.
+    assert best_candidates(["Creep Radiohead Live"], [CREEP], rejected={"TOPIC"}) == ["LIVE"]
+    assert best_candidates(["Creep Radiohead"], [CREEP[:1]], rejected={"COVER"}) == [None]
+
+
+def test_duration_prefers_expected_length():
+    candidates = [
+        Candidate("SHORT", "Song Artist", "Artist", 120),
+        Candidate("RIGHT", "Song Artist", "Artist", 241),
+    ]
+    assert best_candidates(["Song Artist"], [candidates], expected_durations=[240]) == ["RIGHT"]
+    assert best_candidates(["Song Artist"], [candidates]) == ["SHORT"]
+
+
+def test_batched_scores_match_single_query_scores():
+    queries = ["Creep Radiohead", "Hello Adele", "Nothing"]
+    lists = [CREEP, [Candidate("VEVO", "Adele - Hello", "AdeleVEVO", 367)], []]
+
+    batched = score_candidates(queries, lists)
+
+    for query, candidates, scores in zip(queries, lists, batched):
+        assert scores.tolist() == pytest.approx(
+            score_candidates([query], [candidates])[0].tolist()
+        )
+    assert len(batched[2]) == 0
+
+
+def test_parses_search_and_videos_responses():
+    search = {
+        "items": [
+            {"id": {"videoId": "V1"}, "snippet": {"title": "Creep", "channelTitle": "Radiohead"}},
+            {"id": {"channelId": "C1"}, "snippet": {"title": "A channel"}},
+        ]
+    }
+    videos = {"items": [{"id": "V1", "contentDetails": {"duration": "PT3M56S"}}]}
+
+    assert candidates_from_search(search) == [Candidate("V1", "Creep", "Radiohead")]
+    assert durations_from_videos(videos) == {"V1": 236}
+    assert parse_duration("PT1H2M3S") == 3723
+    assert parse_duration("P0D") == 0
+    assert parse_duration("garbage") is None
@@ -0,0 +1,101 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# Adjust the path to import src modules
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from utils.rate_limiter import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_burst_then_throttle():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock, sleep=clock.sleep)
+
+    for _ in range(3):
+        assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    clock.now += 0.5
+    assert bucket.try_acquire()
+
+
+def test_take_or_wait_returns_the_exact_wait():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=4, burst=1, clock=clock, sleep=clock.sleep)
+
+    assert bucket.take_or_wait() == 0
+    assert bucket.take_or_wait() == pytest.approx(0.25)
+    clock.now += 0.1
+    assert bucket.take_or_wait() == pytest.approx(0.15)
+    clock.now += 0.15
+    assert bucket.take_or_wait() == 0
+
+
+def test_acquire_rejects_more_tokens_than_the_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=4, burst=2, clock=clock, sleep=clock.sleep)
+
+    with pytest.raises(ValueError):
+        bucket.acquire(3)
+    bucket.acquire(2)
+    assert clock.now == 0
+
+
+def test_acquire_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=4, burst=1, clock=clock, sleep=clock.sleep)
+
+    for _ in range(5):
+        bucket.acquire()
+
+    # One token was available up front, the remaining four refill at 4/s.
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_tokens_do_not_exceed_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=2, clock=clock, sleep=clock.sleep)
+
+    clock.now += 100
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_acquire_is_thread_safe():
+    bucket = TokenBucket(rate=1000, burst=50)
+    acquired = []
+
+    def worker():
+        for _ in range(10):
+            bucket.acquire()
+            acquired.append(1)
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(acquired) == 50
+
+
+def test_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
@@ -0,0 +1,91 @@
+import json
+import os
+import random
+import sys
+
+# Add the src directory to sys.path
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from utils.retry import CircuitBreaker, FailureReport, RetryPolicy
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_backoff_uses_full_jitter_within_exponential_ceiling():
+    policy = RetryPolicy(base_delay=1, max_delay=10, rng=random.Random(0))
+
+    for attempt, ceiling in [(1, 1), (2, 2), (3, 4), (4, 8), (5, 10), (9, 10)]:
+        delays = [policy.delay(attempt) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert max(delays) > ceiling / 2
+
+
+def test_backoff_honours_retry_after_up_to_max_delay():
+    policy = RetryPolicy(base_delay=1, max_delay=30, rng=random.Random(0))
+
+    assert policy.delay(1, retry_after=12) >= 12
+    assert policy.delay(1, retry_after=3600) == 30
+
+
+def test_circuit_breaker_opens_on_error_spike_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        window=10, failure_rate=0.5, min_calls=4, cooldown=30, clock=clock, sleep=clock.sleep
+    )
+
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.remaining() == 0
+    breaker.record_failure()
+    assert breaker.remaining() == 30
+    assert breaker.trips == 1
+
+    breaker.wait()
+    assert clock.now == 30
+    assert breaker.remaining() == 0
+    # The window starts over, so a single failure does not reopen it.
+    breaker.record_failure()
+    assert breaker.remaining() == 0
+
+
+def test_circuit_breaker_ignores_isolated_failures():
+    breaker = CircuitBreaker(window=10, failure_rate=0.5, min_calls=4)
+    for _ in range(3):
+        breaker.record_success()
+        breaker.record_success()
+        breaker.record_failure()
+
+    assert breaker.remaining() == 0
+    assert breaker.trips == 0
+
+
+def test_failure_report_summary_and_write(tmp_path):
+    report = FailureReport()
+    report.add("search.list", "Creep Radiohead", ValueError("bad request"))
+    report.add("playlistItems.insert", "PL1/VID1", ValueError("forbidden"))
+    report.add("search.list", "Imagine", ValueError("bad request"))
+
+    assert len(report) == 3
+    assert report.summary() == {"search.list": 2, "playlistItems.insert": 1}
+
+    path = tmp_path / "reports" / "failures.json"
+    report.write(str(path))
+    failures = json.loads(path.read_text(encoding="utf-8"))
+    assert failures[0] == {
+        "method": "search.list",
+        "item": "Creep Radiohead",
+        "status": None,
+        "error": "bad request",
+    }
@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+
+# Adjust the path to import src modules
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from utils.row_fingerprints import RowFingerprints
+from utils.track import Track
+
+
+def queries(pending):
+    return {name: [song.query for song in songs] for name, songs in pending.items()}
+
+
+def test_delta_classifies_new_changed_unchanged_and_removed_rows(tmp_path):
+    path = str(tmp_path / "fingerprints.npz")
+    first = RowFingerprints(path)
+    pending, summary = first.delta(
+        {
+            "Rock": [Track("Creep Radiohead", "GBAYE9200070"), Track("Imagine John Lennon")],
+            "Pop": [Track("Bad Guy Billie Eilish")],
+        }
+    )
+    assert summary["Rock"] == {"added": 2, "changed": 0, "unchanged": 0}
+    assert queries(pending)["Rock"] == ["Creep Radiohead", "Imagine John Lennon"]
+    first.commit(lambda playlist, query: True)
+
+    store = RowFingerprints(path)
+    assert len(store) == 3
+    pending, summary = store.delta(
+        {
+            "Rock": [
+                Track("Creep Radiohead", "GBAYE9200070"),
+                Track("Imagine John Lennon", "GBAYE0601498"),
+                Track("Karma Police Radiohead"),
+            ],
+        }
+    )
+
+    assert queries(pending) == {"Rock": ["Imagine John Lennon", "Karma Police Radiohead"]}
+    assert summary["Rock"] == {"added": 1, "changed": 1, "unchanged": 1}
+    assert store.removed() == {"Pop": 1}
+
+
+def test_commit_keeps_only_uploaded_rows_and_drops_removed_ones(tmp_path):
+    path = str(tmp_path / "fingerprints.npz")
+    store = RowFingerprints(path)
+    store.delta({"Rock": ["Creep Radiohead", "Unknown Song"], "Pop": ["Bad Guy Billie Eilish"]})
+    store.commit(lambda playlist, query: query != "Unknown Song")
+
+    store = RowFingerprints(path)
+    store.delta({"Rock": ["Creep Radiohead", "Unknown Song"]})
+    store.commit(lambda playlist, query: False)
+
+    pending, summary = RowFingerprints(path).delta(
+        {"Rock": ["Creep Radiohead", "Unknown Song"], "Pop": ["Bad Guy Billie Eilish"]}
+    )
+    assert queries(pending) == {"Rock": ["Unknown Song"], "Pop": ["Bad Guy Billie Eilish"]}
+    assert summary["Pop"]["added"] == 1
+
+
+def test_same_query_in_another_playlist_is_a_new_row(tmp_path):
+    store = RowFingerprints(str(tmp_path / "fingerprints.npz"))
+    store.delta({"Rock": ["Creep Radiohead"]})
+    store.commit(lambda playlist, query: True)
+
+    pending, _ = store.delta({"Rock": ["Creep Radiohead"], "Mix": ["Creep Radiohead"]})
+
+    assert queries(pending) == {"Rock": [], "Mix": ["Creep Radiohead"]}
+
+
+def test_reset_and_unreadable_file(tmp_path):
+    path = tmp_path / "fingerprints.npz"
+    store = RowFingerprints(str(path))
+    store.delta({"Rock": ["Creep Radiohead"]})
+    store.commit(lambda playlist, query: True)
+    store.reset()
+    assert not path.exists()
+    assert len(store) == 0
+
+    path.write_bytes(b"not a numpy file")
+    assert len(RowFingerprints(str(path))) == 0
+
+
+def test_delta_on_large_unchanged_csv_is_fast(tmp_path):
+    playlists = {
+        f"Playlist {p}": [Track(f"Song {p}-{i} Artist {i % 97}") for i in range(1000)]
+        for p in range(100)
+    }
+    path = str(tmp_path / "fingerprints.npz")
+    store = RowFingerprints(path)
+    store.delta(playlists)
+    store.commit(lambda playlist, query: True)
+
+    store = RowFingerprints(path)
+    started = time.perf_counter()
+    pending, _ = store.delta(playlists)
+    elapsed = time.perf_counter() - started
+
+    assert not any(pending.values())
+    assert store.removed() == {}
+    # Generous bound for slow CI machines; typically well under 0.3s for 100k rows.
+    assert elapsed < 5
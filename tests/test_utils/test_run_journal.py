@@ -0,0 +1,114 @@
+import os
+import sys
+import threading
+
+# Adjust the path to import src modules
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from utils.run_journal import RunJournal
+
+
+def test_record_and_replay(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = RunJournal(path, sync_every=3)
+    journal.record("Rock", "Creep Radiohead", "VID1", "searched")
+    journal.record("Rock", "Creep Radiohead", "VID1", "added")
+    journal.record("Rock", "Unknown Song", None, "not_found")
+    journal.record("Pop", "Bad Guy Billie Eilish", "VID2", "searched")
+
+    # Only complete batches are on disk before flush().
+    assert len(RunJournal(path).replay()) == 2
+    journal.flush()
+
+    replayed = RunJournal(path)
+    state = replayed.replay()
+    assert state[("Rock", "Creep Radiohead")]["status"] == "added"
+    assert replayed.is_done("Rock", "Creep Radiohead")
+    assert replayed.is_done("Rock", "Unknown Song")
+    assert not replayed.is_done("Pop", "Bad Guy Billie Eilish")
+    assert replayed.for_playlist("Pop").resolved_video("Bad Guy Billie Eilish") == "VID2"
+
+
+def test_replay_ignores_torn_last_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text(
+        '{"playlist": "Rock", "query": "A", "video_id": "V", "status": "added"}\n'
+        '{"playlist": "Rock", "query": "B", "vid',
+        encoding="utf-8",
+    )
+
+    state = RunJournal(str(path)).replay()
+
+    assert list(state) == [("Rock", "A")]
+
+
+def test_reset_removes_journal(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = RunJournal(path)
+    journal.record("Rock", "A", "V", "added")
+    journal.flush()
+
+    journal.reset()
+
+    assert not os.path.exists(path)
+    assert journal.replay() == {}
+
+
+def test_fork_and_merge(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = RunJournal(path)
+    journal.record("Rock", "Creep Radiohead", "VID1", "added")
+    journal.flush()
+
+    worker = journal.fork(path + ".worker-1")
+    assert worker.is_done("Rock", "Creep Radiohead")
+    worker.record("Rock", "Imagine John Lennon", "VID2", "searched")
+    worker.record("Rock", "Imagine John Lennon", "VID2", "added")
+    worker.record("Pop", "Unknown Song", None, "not_found")
+    worker.flush()
+    assert len(RunJournal(path).replay()) == 1
+
+    assert journal.merge(path + ".worker-1") == {"added": 1, "not_found": 1}
+    assert not os.path.exists(path + ".worker-1")
+    assert len(RunJournal(path).replay()) == 3
+    assert journal.merge(path + ".worker-2") == {}
+
+
+def test_reject_video_reopens_matched_songs(tmp_path):
+    journal = RunJournal(str(tmp_path / "journal.jsonl"))
+    journal.record("Rock", "Creep Radiohead", "VID1", "added")
+    journal.record("Mix", "Creep Radiohead", "VID1", "exists")
+    journal.record("Rock", "Imagine John Lennon", "VID2", "added")
+
+    assert journal.reject_video("VID1") == 2
+    journal.flush()
+
+    journal = RunJournal(journal.path)
+    journal.replay()
+    assert not journal.is_done("Rock", "Creep Radiohead")
+    assert not journal.is_done("Mix", "Creep Radiohead")
+    assert journal.is_done("Rock", "Imagine John Lennon")
+
+
+def test_background_writes_leave_the_recording_thread(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = RunJournal(path, sync_every=2)
+    recorder = threading.get_ident()
+    writers = []
+    write = journal._write
+
+    def tracking_write(lines):
+        writers.append(threading.get_ident())
+        write(lines)
+
+    journal._write = tracking_write
+    with journal.background_writes():
+        for number in range(5):
+            journal.record("Rock", f"Song {number}", f"VID{number}", "added")
+        journal.flush()
+        assert len(RunJournal(path).replay()) == 5
+
+    assert len(writers) == 3
+    assert recorder not in writers
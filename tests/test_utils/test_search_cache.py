@@ -0,0 +1,211 @@
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Adjust the path to import src modules
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from utils import search_cache
+from utils.search_cache import MISS, SearchCache, normalize_query
+from playlist_management import playlist_adder
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SearchCache(str(tmp_path / "cache.sqlite3"), ttl=100, negative_ttl=10)
+    yield cache
+    cache.close()
+
+
+def test_normalize_query():
+    assert normalize_query("  Shape  of You   Ed Sheeran ") == "shape of you ed sheeran"
+
+
+def test_cache_hit_and_miss(cache):
+    assert cache.get("Shape of You Ed Sheeran", "10") is MISS
+    cache.set("Shape of You Ed Sheeran", "10", "VID123")
+
+    assert cache.get("shape of  you ed sheeran", "10") == "VID123"
+    assert cache.get("Shape of You Ed Sheeran", "20") is MISS
+    assert cache.stats() == {"hits": 1, "misses": 2, "entries": 1}
+
+
+def test_cache_persists_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = SearchCache(path)
+    first.set("Creep Radiohead", "10", "VID646566")
+    first.close()
+
+    second = SearchCache(path)
+    assert second.get("Creep Radiohead", "10") == "VID646566"
+    second.close()
+
+
+def test_negative_entry_uses_shorter_ttl(cache):
+    with patch("utils.search_cache.time.time", return_value=1000.0):
+        cache.set("Unknown Song", "10", None)
+        cache.set("Known Song", "10", "VID1")
+
+    with patch("utils.search_cache.time.time", return_value=1005.0):
+        assert cache.get("Unknown Song", "10") is None
+
+    with patch("utils.search_cache.time.time", return_value=1050.0):
+        assert cache.get("Unknown Song", "10") is MISS
+        assert cache.get("Known Song", "10") == "VID1"
+
+    with patch("utils.search_cache.time.time", return_value=1200.0):
+        assert cache.get("Known Song", "10") is MISS
+
+
+def test_lru_eviction(tmp_path):
+    cache = SearchCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    with patch("utils.search_cache.time.time", return_value=1.0):
+        cache.set("a", "10", "A")
+    with patch("utils.search_cache.time.time", return_value=2.0):
+        cache.set("b", "10", "B")
+    with patch("utils.search_cache.time.time", return_value=3.0):
+        assert cache.get("a", "10") == "A"  # "a" is now more recent than "b"
+    with patch("utils.search_cache.time.time", return_value=4.0):
+        cache.set("c", "10", "C")
+
+    assert len(cache) == 2
+    with patch("utils.search_cache.time.time", return_value=5.0):
+        assert cache.get("b", "10") is MISS
+        assert cache.get("a", "10") == "A"
+        assert cache.get("c", "10") == "C"
+    cache.close()
+
+
+def test_cache_hits_write_access_times_in_one_batch(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SearchCache(path)
+    with patch("utils.search_cache.time.time", return_value=1.0):
+        cache.set("a", "10", "A")
+        cache.set("b", "10", "B")
+    changes = cache._conn.total_changes
+
+    with patch("utils.search_cache.time.time", return_value=2.0):
+        assert cache.get("a", "10") == "A"
+        assert cache.get("b", "10") == "B"
+    assert cache._conn.total_changes == changes
+
+    cache.close()
+    reopened = SearchCache(path)
+    rows = reopened._conn.execute("SELECT last_access FROM search_results").fetchall()
+    assert rows == [(2.0,), (2.0,)]
+    assert len(reopened) == 2
+    reopened.close()
+
+
+def test_search_video_uses_cache(cache):
+    youtube = MagicMock()
+    youtube.search().list().execute.return_value = {
+        "items": [{"id": {"videoId": "VID999"}}]
+    }
+    youtube.search().list.reset_mock()
+
+    with patch.object(playlist_adder, "get_search_cache", return_value=cache):
+        assert playlist_adder.search_video(youtube, "Hey Jude The Beatles") == "VID999"
+        assert playlist_adder.search_video(youtube, "hey jude the beatles") == "VID999"
+
+    assert youtube.search().list.call_count == 1
+
+
+def test_search_video_caches_negative_result(cache):
+    youtube = MagicMock()
+    youtube.search().list().execute.return_value = {"items": []}
+    youtube.search().list.reset_mock()
+
+    with patch.object(playlist_adder, "get_search_cache", return_value=cache):
+        assert playlist_adder.search_video(youtube, "Nonexistent Song") is None
+        assert playlist_adder.search_video(youtube, "Nonexistent Song") is None
+
+    assert youtube.search().list.call_count == 1
+
+
+def test_ranked_search_reuses_cached_candidates_after_reject(cache, monkeypatch):
+    from config import config
+
+    monkeypatch.setitem(config, "ranking", {"enabled": True, "candidates": 5})
+    youtube = MagicMock()
+    youtube.search().list().execute.return_value = {
+        "items": [
+            {"id": {"videoId": video_id}, "snippet": {"title": title, "channelTitle": channel}}
+            for video_id, title, channel in [
+                ("COVER", "Creep (Cover)", "Kid Covers"),
+                ("TOPIC", "Creep", "Radiohead - Topic"),
+                ("LIVE", "Creep Live", "Radiohead"),
+            ]
+        ]
+    }
+    youtube.videos().list().execute.return_value = {
+        "items": [{"id": "TOPIC", "contentDetails": {"duration": "PT3M56S"}}]
+    }
+    youtube.search().list.reset_mock()
+    youtube.videos().list.reset_mock()
+
+    with patch.object(playlist_adder, "get_search_cache", return_value=cache):
+        assert playlist_adder.search_video(youtube, "Creep Radiohead") == "TOPIC"
+        assert cache.reject("TOPIC") == 1
+        assert playlist_adder.search_video(youtube, "Creep Radiohead") == "LIVE"
+
+    assert youtube.search().list.call_count == 1
+    assert youtube.search().list.call_args.kwargs["maxResults"] == 5
+    assert youtube.videos().list.call_count == 1
+    assert cache.rejected() == {"TOPIC"}
+
+
+def test_rejected_videos_are_loaded_once_and_persist(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = SearchCache(path)
+    first.reject("VID1")
+    assert first.rejected() == {"VID1"}
+    first.close()
+
+    second = SearchCache(path)
+    second.reject("VID2")
+    second.close()
+
+    # close() shut the connection, so this answer comes from memory.
+    assert second.rejected() == {"VID1", "VID2"}
+
+
+def test_all_candidates_rejected_is_not_cached_as_no_results(cache, monkeypatch):
+    from config import config
+
+    monkeypatch.setitem(config, "ranking", {"enabled": True, "candidates": 5})
+    youtube = MagicMock()
+    youtube.search().list().execute.return_value = {
+        "items": [
+            {"id": {"videoId": "TOPIC"}, "snippet": {"title": "Creep", "channelTitle": "x"}}
+        ]
+    }
+    youtube.videos().list().execute.return_value = {"items": []}
+    cache.reject("TOPIC")
+
+    with patch.object(playlist_adder, "get_search_cache", return_value=cache):
+        assert playlist_adder.search_video(youtube, "Creep Radiohead") is None
+        assert playlist_adder.search_videos(youtube, ["Creep Radiohead"]) == {
+            "Creep Radiohead": None
+        }
+
+    assert cache.peek("Creep Radiohead", "10") is MISS
+
+
+def test_candidates_are_purged_periodically(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_cache, "CANDIDATE_PURGE_EVERY", 3)
+    cache = SearchCache(str(tmp_path / "cache.sqlite3"), ttl=100, max_entries=2)
+    for number, now in enumerate([1.0, 2.0, 3.0, 4.0]):
+        with patch("utils.search_cache.time.time", return_value=now):
+            cache.set_candidates(f"query {number}", "10", [("VID", "Title", "Channel")])
+
+    # The purge after the third write kept the two newest; the fourth was added later.
+    with patch("utils.search_cache.time.time", return_value=5.0):
+        assert cache.get_candidates("query 0", "10") is MISS
+        assert cache.get_candidates("query 1", "10") is not MISS
+        assert cache.get_candidates("query 3", "10") is not MISS
+    cache.close()
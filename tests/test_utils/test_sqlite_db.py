@@ -0,0 +1,34 @@
+import os
+import sqlite3
+import sys
+
+# Adjust the path to import src modules
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+)
+
+from utils import sqlite_db
+from utils.search_cache import MISS, SearchCache
+
+
+def test_connect_uses_wal(tmp_path):
+    conn = sqlite_db.connect(str(tmp_path / "db" / "cache.sqlite3"))
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    conn.close()
+
+
+def test_locked_cache_write_is_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite_db, "BUSY_TIMEOUT", 0.05)
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SearchCache(path)
+    other = sqlite3.connect(path)
+    other.execute("BEGIN IMMEDIATE")  # Another process holds the write lock.
+
+    cache.set("Creep Radiohead", "10", "VID1")
+    assert cache.get("Creep Radiohead", "10") is MISS
+
+    other.rollback()
+    other.close()
+    cache.set("Creep Radiohead", "10", "VID1")
+    assert cache.get("Creep Radiohead", "10") == "VID1"
+    cache.close()
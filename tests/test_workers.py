@@ -0,0 +1,104 @@
+import logging
+import os
+import queue
+import sys
+from unittest.mock import patch
+
+import pytest
+
+# Add the src and benchmarks directories to sys.path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from fake_youtube_api import FakeYouTubeAPI, FakeYouTubeServer
+from workers import partition_playlists, run_worker, worker_journal_path
+
+
+def test_partition_keeps_playlists_together_and_balances_songs():
+    chunks = [
+        ("Rock", ["a"] * 500),
+        ("Pop", ["b"] * 300),
+        ("rock", ["c"] * 100),
+        ("Jazz", ["d"] * 250),
+        ("Folk", ["e"] * 200),
+    ]
+
+    partitions = partition_playlists(chunks, 2)
+
+    assert len(partitions) == 2
+    loads = sorted(sum(len(songs) for _, songs in part) for part in partitions)
+    assert loads == [600, 750]
+    rock = [part for part in partitions if ("Rock", ["a"] * 500) in part][0]
+    assert ("rock", ["c"] * 100) in rock
+    assert partition_playlists(chunks[:1], 4) == [chunks[:1]]
+
+
+@pytest.fixture
+def server():
+    server = FakeYouTubeServer(FakeYouTubeAPI()).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def root_handlers():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_run_worker_processes_its_partition_and_reports_results(
+    server, root_handlers, tmp_path, monkeypatch
+):
+    """
+    Test a worker in-process: it uploads its playlists, journals to its own
+    file, forwards tagged logs and returns what the coordinator merges.
+    """
+    from google.oauth2.credentials import Credentials
+
+    from authentication.service_factory import ServiceFactory
+    from config import config
+    from main import process_playlists
+    from utils.run_journal import RunJournal
+
+    journal_path = str(tmp_path / "journal.jsonl")
+    monkeypatch.setattr(config, "_data", dict(config.data))
+    worker_config = dict(config.data)
+    worker_config["journal"] = {"path": journal_path}
+    worker_config["rate_limit"] = {"qps": 1000, "burst": 1000}
+    log_queue = queue.Queue()
+
+    def factory(credentials):
+        return ServiceFactory(credentials, client_options={"api_endpoint": server.url})
+
+    with patch("workers.ServiceFactory", side_effect=factory), patch(
+        "utils.rate_limiter._rate_limiter", None
+    ):
+        result = run_worker(
+            2,
+            worker_config,
+            log_queue,
+            Credentials(token="test"),
+            [("Rock", ["Creep Radiohead", "Imagine John Lennon"]), ("Mix", ["Creep Radiohead"])],
+            {},
+            1000,
+            process_playlists,
+        )
+
+    assert server.api.stats()["items"] == 3
+    assert result["quota"]["search.list"] == 200
+    assert result["quota"]["playlistItems.insert"] == 150
+    assert result["memo_saved"] == 1
+    assert not result["quota_exhausted"]
+    assert result["metrics"]["counters"]["youtube_api_requests_total"]
+    messages = [log_queue.get_nowait().getMessage() for _ in range(log_queue.qsize())]
+    assert all(message.startswith("[worker 2] ") for message in messages)
+
+    journal = RunJournal(journal_path)
+    statuses = journal.merge(worker_journal_path(journal_path, 2))
+    assert statuses == {"added": 3}
+    assert not os.path.exists(worker_journal_path(journal_path, 2))
+    assert journal.is_done("Mix", "Creep Radiohead")